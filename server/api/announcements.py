@@ -0,0 +1,52 @@
+"""
+The active announcement feed.
+
+Announcements leave the feed only by expiring or by being edited, and edits
+invalidate the announcements cache scope. So one aggregate over the active
+rows, their ETag stamp and the time of the next expiry, is cached until that
+expiry, and responses built from the feed are cached no longer. Pages,
+``fields=`` selections and ``since=`` fetches stay in SQL.
+"""
+import math
+
+from django.conf import settings
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from api import cache
+from api.models import Announcement
+
+
+def _seconds_until(when, now):
+    if when is None:
+        return settings.API_CACHE_TIMEOUT
+    return min(max(math.ceil((when - now).total_seconds()), 1), settings.API_CACHE_TIMEOUT)
+
+
+def _load():
+    now = timezone.now()
+    state = Announcement.objects.active().order_by().aggregate(
+        last_modified=Max('updated_at'), count=Count('pk'), next_expiry=Min('expires_at'),
+    )
+    return state, _seconds_until(state['next_expiry'], now)
+
+
+def _state():
+    return cache.cached_value('active_announcements', [cache.ANNOUNCEMENTS], _load)
+
+
+def next_expiry():
+    """When the next active announcement expires, or None if none will."""
+    return _state()['next_expiry']
+
+
+def time_to_live():
+    """Seconds until the feed next changes on its own, for caching responses built from it."""
+    return _seconds_until(next_expiry(), timezone.now())
+
+
+def stamp():
+    # Same shape as api.conditional.queryset_stamp over the active rows.
+    state = _state()
+    last_modified = state['last_modified']
+    return last_modified, f"{last_modified.isoformat() if last_modified else '-'}|{state['count']}"
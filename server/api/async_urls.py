@@ -0,0 +1,26 @@
+from django.urls import path
+
+from api.async_views import (
+    AsyncAnnouncementView, AsyncFixturesView, AsyncStandingsView, AsyncTeamView, AsyncTournamentDetailView,
+    AsyncTournamentView, TournamentEventsView,
+)
+from api.urls import urlpatterns as sync_urlpatterns
+
+# Same routes as api.urls, with the read endpoints served by async views, plus
+# the live event stream, which needs ASGI.
+async_urlpatterns = [
+    path('announcements/', AsyncAnnouncementView.as_view(), name='announcements'),
+    path('tournaments/', AsyncTournamentView.as_view(), name='tournaments'),
+    path('tournaments/<int:tournament_id>/', AsyncTournamentDetailView.as_view(), name='tournament_detail'),
+    path('tournaments/<int:tournament_id>/fixtures/', AsyncFixturesView.as_view(), name='tournament_fixtures'),
+    path('tournaments/<int:tournament_id>/events/', TournamentEventsView.as_view(), name='tournament_events'),
+    path('teams/', AsyncTeamView.as_view(), name='teams'),
+    path('standings/', AsyncStandingsView.as_view(), name='standings'),
+    path('standings/<int:tournament_id>/', AsyncStandingsView.as_view(), name='tournament_standings'),
+]
+
+_async_names = {pattern.name for pattern in async_urlpatterns}
+
+urlpatterns = async_urlpatterns + [
+    pattern for pattern in sync_urlpatterns if pattern.name not in _async_names
+]
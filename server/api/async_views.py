@@ -0,0 +1,169 @@
+"""
+Async versions of the read views, mounted by api.async_urls when the server
+runs under ASGI (API_ASYNC_VIEWS). They share querysets and schemas
+with api.views and use the async ORM, so a slow client holds a coroutine
+rather than a worker thread.
+
+Independent queries are awaited together with asyncio.gather. Django still
+executes ORM calls on the request's database thread, so this overlaps the
+waiting on them rather than running the SQL in parallel.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from api import announcements, cache, serializers
+from api.cache import cached_response
+from api.events import ANNOUNCEMENTS_CHANNEL, broker, tournament_channel
+from api.conditional import (
+    standings_stamp, teams_stamp, tournament_stamp, tournaments_stamp
+)
+from api.models import Tournament
+from api.responses import JsonResponse
+from api.pagination import PaginationError, add_next_link, apaginate, select_fields
+from api.standings import compute_standings, standings_payload, stored_standings
+from api.views import (
+    TeamView, announcement_page, detail_matches, detail_teams, fixture_matches, team_page,
+    tournament_detail_payload, tournament_page,
+)
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+
+class AsyncAnnouncementView(View):
+    @cached_response(
+        'announcements', lambda: [cache.ANNOUNCEMENTS], announcements.stamp, announcements.time_to_live,
+    )
+    async def get(self, request):
+        try:
+            fields = select_fields(request, serializers.ANNOUNCEMENT.names)
+            rows, next_cursor = await apaginate(request, *announcement_page(request, fields))
+        except PaginationError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        announcement_list = serializers.ANNOUNCEMENT.dump_rows(rows, fields)
+        return add_next_link(request, JsonResponse(announcement_list, safe=False), next_cursor)
+
+
+class AsyncTournamentView(View):
+    @cached_response('tournaments', lambda: [cache.TOURNAMENTS], tournaments_stamp)
+    async def get(self, request):
+        try:
+            fields = select_fields(request, serializers.TOURNAMENT.names)
+            tournaments, next_cursor = await apaginate(request, *tournament_page(fields))
+        except PaginationError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        tournament_list = serializers.TOURNAMENT.dump_many(tournaments, fields)
+        return add_next_link(request, JsonResponse(tournament_list, safe=False), next_cursor)
+
+
+class AsyncTournamentDetailView(View):
+    @cached_response('tournament_detail', lambda tournament_id: [cache.tournament_scope(tournament_id)], tournament_stamp)
+    async def get(self, request, tournament_id):
+        try:
+            tournament, teams, matches = await asyncio.gather(
+                Tournament.objects.aget(id=tournament_id),
+                alist(detail_teams().filter(tournaments=tournament_id)),
+                alist(detail_matches().filter(tournaments=tournament_id)),
+            )
+        except Tournament.DoesNotExist:
+            return JsonResponse({'error': 'Tournament not found'}, status=404)
+
+        return JsonResponse(tournament_detail_payload(tournament, teams, matches), safe=False)
+
+
+class AsyncFixturesView(View):
+    @cached_response('fixtures', lambda tournament_id: [cache.tournament_scope(tournament_id)], tournament_stamp)
+    async def get(self, request, tournament_id):
+        exists, matches = await asyncio.gather(
+            Tournament.objects.filter(id=tournament_id).aexists(),
+            alist(fixture_matches(tournament_id)),
+        )
+        if not exists:
+            return JsonResponse({'error': 'Tournament not found'}, status=404)
+
+        return JsonResponse(serializers.MATCH.dump_many(matches), safe=False)
+
+
+class AsyncStandingsView(View):
+    @cached_response('standings', lambda tournament_id=None: [
+        cache.STANDINGS if tournament_id is None else cache.tournament_scope(tournament_id)
+    ], standings_stamp)
+    async def get(self, request, tournament_id=None):
+        if tournament_id is not None:
+            rows = await alist(stored_standings(tournament_id))
+            if not rows and not await Tournament.objects.filter(id=tournament_id).aexists():
+                return JsonResponse({'error': 'Tournament not found'}, status=404)
+        else:
+            rows = await alist(compute_standings(limit=10))
+
+        return JsonResponse(standings_payload(rows), safe=False)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncTeamView(View):
+    @cached_response('teams', lambda: [cache.TEAMS], teams_stamp)
+    async def get(self, request):
+        try:
+            fields = select_fields(request, serializers.TEAM.names)
+            teams, next_cursor = await apaginate(request, *team_page(fields))
+        except PaginationError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        team_list = serializers.TEAM.dump_rows(teams, fields)
+        return add_next_link(request, JsonResponse(team_list, safe=False), next_cursor)
+
+    async def post(self, request):
+        # Writes stay synchronous; run the regular handler off the event loop.
+        return await sync_to_async(TeamView().post)(request)
+
+
+async def event_stream(subscription):
+    try:
+        yield 'retry: 3000\n\n'
+        if subscription.resync:
+            # Missed events are gone; the client should refetch standings and fixtures.
+            yield 'event: resync\ndata: {}\n\n'
+        for event in subscription.backlog:
+            yield event.encode()
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), settings.API_EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing the idle connection.
+                yield ': keep-alive\n\n'
+                continue
+            if event is None:
+                # Fell too far behind; the client reconnects with Last-Event-ID.
+                return
+            yield event.encode()
+    finally:
+        broker.unsubscribe(subscription)
+
+
+class TournamentEventsView(View):
+    """
+    Server-Sent Events for one tournament: match-completed, score-updated,
+    team-joined and announcement-created. Only mounted under ASGI, where an
+    open stream costs a coroutine instead of a worker thread.
+    """
+    async def get(self, request, tournament_id):
+        if not await Tournament.objects.filter(id=tournament_id).aexists():
+            return JsonResponse({'error': 'Tournament not found'}, status=404)
+
+        subscription = broker.subscribe(
+            [tournament_channel(tournament_id), ANNOUNCEMENTS_CHANNEL],
+            request.headers.get('Last-Event-ID') or request.GET.get('last_event_id'),
+        )
+        response = StreamingHttpResponse(event_stream(subscription), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
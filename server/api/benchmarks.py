@@ -0,0 +1,256 @@
+"""
+Latency and query benchmarks for every API route.
+
+run_benchmarks() seeds the database with populate_db at each scale and drives
+each case through the test client, recording latency percentiles, query
+counts and SQL time. The benchmark_api command runs them against a throwaway
+test database and compares the results with benchmark_budgets.json.
+
+Query counts do not depend on the machine: check_budgets() fails any case
+over its "queries" budget, or answering with an error. Latency does, so
+check_latency() only reports cases over their "p95_ms" budget. Those
+budgets are about twice the p95 measured at the default scales (1, 10 and
+100) on SQLite in memory, CPython 3.11 and one Xeon vCPU; the standings
+cases serve the teams the join cases add to the benchmark tournament.
+"""
+import json
+import statistics
+import time
+from datetime import date
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from api import cache
+from api.models import Player, Team, Tournament
+
+BUDGETS_PATH = Path(__file__).with_name('benchmark_budgets.json')
+
+
+def _get(route, *ids):
+    return lambda context, i: ('get', reverse(route, args=[context[name] for name in ids]), None)
+
+
+def _register(context, i):
+    return 'post', reverse('register'), {
+        'username': f'bench_{i}', 'phone_number': f'+1999{i:07d}', 'password': 'bench-password',
+    }
+
+
+def _join_tournament(context, i):
+    team = Team.objects.create(name=f'Bench join {i}')
+    return 'post', reverse('join_tournament'), {'tournament_id': context['tournament_id'], 'team_id': team.id}
+
+
+BULK_ITEMS = 100
+
+
+def _bulk_teams(context, i):
+    return 'post', reverse('bulk_teams'), {
+        'teams': [{'name': f'Bench bulk {i}-{n}', 'passcode': 'bench'} for n in range(BULK_ITEMS)],
+    }
+
+
+def _bulk_register(context, i):
+    # Without passwords: hashing cost is what the register case measures.
+    return 'post', reverse('bulk_register'), {
+        'players': [
+            {'username': f'bench_bulk_{i}_{n}', 'phone_number': f'+1777{i:03d}{n:04d}'} for n in range(BULK_ITEMS)
+        ],
+    }
+
+
+BULK_PASSWORDS = 5
+
+
+def _bulk_register_passwords(context, i):
+    # A few players with passwords: each is a full hash on the bulk slots.
+    return 'post', reverse('bulk_register'), {
+        'players': [
+            {'username': f'bench_bulk_pw_{i}_{n}', 'phone_number': f'+1666{i:03d}{n:04d}', 'password': 'bench-password'}
+            for n in range(BULK_PASSWORDS)
+        ] + [
+            {'username': f'bench_bulk_nopw_{i}_{n}', 'phone_number': f'+1555{i:03d}{n:04d}'}
+            for n in range(BULK_ITEMS - BULK_PASSWORDS)
+        ],
+    }
+
+
+def _bulk_join_tournament(context, i):
+    teams = Team.objects.bulk_create(Team(name=f'Bench bulk join {i}-{n}') for n in range(BULK_ITEMS))
+    return 'post', reverse('bulk_join_tournament'), {
+        'tournament_id': context['tournament_id'], 'teams': [{'team_id': team.id} for team in teams],
+    }
+
+
+def _schedule_tournament(context, i):
+    tournament = Tournament.objects.create(
+        title=f'Bench schedule {i}', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31),
+    )
+    tournament.teams.add(*Team.objects.order_by('id')[:16])
+    return 'post', reverse('tournament_schedule', args=[tournament.id]), {
+        'format': 'round_robin', 'venues': [f'Bench court {i}-{n}' for n in range(4)],
+        'start': '2026-01-01T09:00:00+00:00', 'end': '2026-12-31T21:00:00+00:00', 'match_minutes': 60,
+    }
+
+
+# (case, route name, request factory). A factory receives the context and the
+# iteration number; any setup it does happens outside the timed request.
+CASES = [
+    ('announcements', 'announcements', _get('announcements')),
+    ('tournaments', 'tournaments', _get('tournaments')),
+    ('tournament_detail', 'tournament_detail', _get('tournament_detail', 'tournament_id')),
+    ('tournament_fixtures', 'tournament_fixtures', _get('tournament_fixtures', 'tournament_id')),
+    ('tournament_bracket', 'tournament_bracket', _get('tournament_bracket', 'tournament_id')),
+    ('teams', 'teams', _get('teams')),
+    ('create_team', 'teams', lambda context, i: (
+        'post', reverse('teams'), {'name': f'Bench team {i}', 'passcode': 'bench'}
+    )),
+    ('register', 'register', _register),
+    ('login', 'login', lambda context, i: (
+        'post', reverse('login'), {'username': context['username'], 'password': 'password123'}
+    )),
+    ('join_tournament', 'join_tournament', _join_tournament),
+    ('bulk_teams', 'bulk_teams', _bulk_teams),
+    ('bulk_register', 'bulk_register', _bulk_register),
+    ('bulk_register_passwords', 'bulk_register', _bulk_register_passwords),
+    ('bulk_join_tournament', 'bulk_join_tournament', _bulk_join_tournament),
+    ('tournament_schedule', 'tournament_schedule', _schedule_tournament),
+    ('report', 'report', lambda context, i: (
+        'post', reverse('report'), {'type': 'bug', 'description': 'Benchmark report'}
+    )),
+    ('standings', 'standings', _get('standings')),
+    ('tournament_standings', 'tournament_standings', _get('tournament_standings', 'tournament_id')),
+    ('cache_stats', 'cache_stats', _get('cache_stats')),
+    ('metrics', 'metrics', _get('metrics')),
+]
+
+STAFF_ROUTES = {
+    'bulk_teams', 'bulk_register', 'bulk_join_tournament', 'tournament_schedule', 'cache_stats', 'metrics',
+}
+
+
+class QueryTimer:
+    """Execute wrapper counting queries and their wall time."""
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    index = (len(ordered) - 1) * percent / 100
+    lower = int(index)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (index - lower)
+
+
+def _context():
+    staff, _ = Player.objects.get_or_create(
+        username='bench_staff', defaults={'phone_number': '+18880000000', 'is_staff': True},
+    )
+    staff_client = Client()
+    staff_client.force_login(staff)
+    return {
+        'tournament_id': Tournament.objects.order_by('id').values_list('id', flat=True).first(),
+        'username': Player.objects.filter(is_staff=False).order_by('id').values_list('username', flat=True).first(),
+        'client': Client(),
+        'staff_client': staff_client,
+    }
+
+
+def benchmark_case(context, route, factory, iterations, warm=False):
+    client = context['staff_client' if route in STAFF_ROUTES else 'client']
+    latencies, query_counts, sql_times, statuses = [], [], [], set()
+    for i in range(iterations):
+        if not warm:
+            cache.get_cache().clear()
+        method, path, data = factory(context, i)
+        kwargs = {'data': json.dumps(data), 'content_type': 'application/json'} if data is not None else {}
+        timer = QueryTimer()
+        with connection.execute_wrapper(timer):
+            started = time.perf_counter()
+            response = getattr(client, method)(path, **kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+        query_counts.append(timer.count)
+        sql_times.append(timer.seconds * 1000)
+        statuses.add(response.status_code)
+
+    return {
+        'route': route,
+        'method': method.upper(),
+        'statuses': sorted(statuses),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'queries': max(query_counts),
+        'sql_ms': round(statistics.fmean(sql_times), 3),
+    }
+
+
+def run_benchmarks(scales, iterations=20, warm=False, seed=0, stdout=None):
+    """
+    Seed the database at each scale and benchmark every case. Returns
+    {scale: {case: stats}}; the database is left populated at the last scale.
+    """
+    results = {}
+    for scale in scales:
+        call_command('populate_db', scale=scale, seed=seed, stdout=StringIO())
+        context = _context()
+        results[str(scale)] = {}
+        for case, route, factory in CASES:
+            stats = benchmark_case(context, route, factory, iterations, warm)
+            results[str(scale)][case] = stats
+            if stdout is not None:
+                stdout.write(
+                    f'scale {scale:>5} {case:<22} p50 {stats["p50_ms"]:8.2f}ms  p95 {stats["p95_ms"]:8.2f}ms  '
+                    f'{stats["queries"]:3d} queries  {stats["sql_ms"]:8.2f}ms SQL'
+                )
+    return results
+
+
+def load_budgets(path=BUDGETS_PATH):
+    with open(path) as budgets:
+        return json.load(budgets)
+
+
+def check_budgets(results, budgets):
+    """
+    Return a message for every case that answered with an error or went over
+    its "queries" budget at any scale.
+    """
+    violations = []
+    for scale, cases in results.items():
+        for case, stats in cases.items():
+            budget = budgets.get(case)
+            if budget is None:
+                violations.append(f'{case}: no budget')
+                continue
+            if any(status >= 400 for status in stats['statuses']):
+                violations.append(f'{case} at scale {scale}: responded with {stats["statuses"]}')
+            if stats['queries'] > budget['queries']:
+                violations.append(f'{case} at scale {scale}: {stats["queries"]} queries, budget {budget["queries"]}')
+    return violations
+
+
+def check_latency(results, budgets):
+    """Return a message for every case over its "p95_ms" budget at any scale."""
+    warnings = []
+    for scale, cases in results.items():
+        for case, stats in cases.items():
+            budget = budgets.get(case)
+            if budget is not None and stats['p95_ms'] > budget['p95_ms']:
+                warnings.append(f'{case} at scale {scale}: p95 {stats["p95_ms"]}ms, budget {budget["p95_ms"]}ms')
+    return warnings
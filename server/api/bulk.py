@@ -0,0 +1,217 @@
+"""
+Batch registration for organizers onboarding whole leagues.
+
+Each function validates a list of items together: one query checks every
+name in the batch for uniqueness, the valid items are written with
+bulk_create, and every item gets a result, {'index': i, 'id': ...} or
+{'index': i, 'error': ...}. Invalid items do not stop the others, and
+neither does a name another request takes between the check and the write.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed
+
+from api import cache, hashers
+from api.models import Player, Team, Tournament
+
+BATCH_SIZE = 500
+
+
+class BatchError(Exception):
+    pass
+
+
+def batch_items(data, key):
+    """The list under ``key`` in a request body, within API_BULK_MAX_ITEMS."""
+    items = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise BatchError(f'"{key}" must be a non-empty list')
+    if len(items) > settings.API_BULK_MAX_ITEMS:
+        raise BatchError(f'At most {settings.API_BULK_MAX_ITEMS} {key} per request')
+    return items
+
+
+def summary(results):
+    failed = sum('error' in result for result in results)
+    return {'succeeded': len(results) - failed, 'failed': failed, 'results': results}
+
+
+def _error(index, message):
+    return {'index': index, 'error': message}
+
+
+def _fields(item, *names):
+    if not isinstance(item, dict):
+        return (None,) * len(names)
+    return tuple(item.get(name) for name in names)
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _insert(model, new, results, message):
+    """
+    bulk_create the objects in ``new``, a list of (index, object), and return
+    the pairs that were written. If a concurrent request took a unique value
+    since the batch was checked, each object is retried on its own and the
+    ones that still conflict get ``message`` as their error.
+    """
+    if not new:
+        return new
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create([obj for _, obj in new], batch_size=BATCH_SIZE)
+        return new
+    except IntegrityError:
+        pass
+    written = []
+    for index, obj in new:
+        obj.pk = None
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create([obj])
+        except IntegrityError:
+            results[index] = _error(index, message)
+        else:
+            written.append((index, obj))
+    return written
+
+
+def create_teams(items):
+    results = [None] * len(items)
+    pending = {}  # name -> index
+    for index, item in enumerate(items):
+        name, passcode = _fields(item, 'name', 'passcode')
+        if not name or not isinstance(name, str):
+            results[index] = _error(index, 'Team name is required')
+        elif not passcode or not isinstance(passcode, str):
+            results[index] = _error(index, 'Team passcode is required')
+        elif name in pending:
+            results[index] = _error(index, 'Duplicate team name in this batch')
+        else:
+            pending[name] = index
+
+    taken = set(Team.objects.filter(name__in=pending).values_list('name', flat=True))
+    new = []
+    for name, index in pending.items():
+        if name in taken:
+            results[index] = _error(index, 'Team name already exists')
+        else:
+            new.append((index, Team(name=name, passcode=items[index]['passcode'])))
+
+    new = _insert(Team, new, results, 'Team name already exists')
+    if new:
+        # bulk_create sends no post_save, so invalidate as team_changed would.
+        cache.invalidate(cache.TEAMS, cache.TOURNAMENTS, cache.STANDINGS)
+    for index, team in new:
+        results[index] = {'index': index, 'id': team.id, 'name': team.name}
+    return results
+
+
+def register_players(items):
+    """
+    Players without a password get an unusable one. At most
+    API_BULK_MAX_PASSWORDS items may have one; they are hashed on the shared
+    hashing pool and may raise hashers.HashingBusy.
+    """
+    if sum(_fields(item, 'password')[0] is not None for item in items) > settings.API_BULK_MAX_PASSWORDS:
+        raise BatchError(f'At most {settings.API_BULK_MAX_PASSWORDS} players with a password per request')
+    results = [None] * len(items)
+    pending = []
+    usernames, phone_numbers = set(), set()
+    for index, item in enumerate(items):
+        username, phone_number, password = _fields(item, 'username', 'phone_number', 'password')
+        if not username or not phone_number or not isinstance(username, str) or not isinstance(phone_number, str):
+            results[index] = _error(index, 'Username and phone number are required')
+        elif password is not None and (not password or not isinstance(password, str)):
+            results[index] = _error(index, 'Password must be a non-empty string')
+        elif username in usernames:
+            results[index] = _error(index, 'Duplicate username in this batch')
+        elif phone_number in phone_numbers:
+            results[index] = _error(index, 'Duplicate phone number in this batch')
+        else:
+            usernames.add(username)
+            phone_numbers.add(phone_number)
+            pending.append((index, username, phone_number, password))
+
+    taken = Player.objects.filter(
+        Q(username__in=usernames) | Q(phone_number__in=phone_numbers)
+    ).values_list('username', 'phone_number')
+    taken_usernames, taken_phone_numbers = set(), set()
+    for username, phone_number in taken:
+        taken_usernames.add(username)
+        taken_phone_numbers.add(phone_number)
+
+    valid = []
+    for index, username, phone_number, password in pending:
+        if username in taken_usernames:
+            results[index] = _error(index, 'Username already exists')
+        elif phone_number in taken_phone_numbers:
+            results[index] = _error(index, 'Phone number already exists')
+        else:
+            valid.append((index, username, phone_number, password))
+
+    hashes = iter(hashers.hash_passwords([password for *_, password in valid if password is not None]))
+    new = [
+        (index, Player(
+            username=username, phone_number=phone_number,
+            password=next(hashes) if password is not None else make_password(None),
+        ))
+        for index, username, phone_number, password in valid
+    ]
+    new = _insert(Player, new, results, 'Username or phone number already exists')
+    for index, player in new:
+        results[index] = {'index': index, 'id': player.id, 'username': player.username}
+    return results
+
+
+def join_teams(tournament_id, items):
+    """
+    Add teams to one tournament, checking passcodes and max_teams under the
+    same row lock as a single join. Raises Tournament.DoesNotExist.
+    """
+    results = [None] * len(items)
+    team_ids = {team_id for team_id in (_fields(item, 'team_id')[0] for item in items) if _is_id(team_id)}
+    through = Tournament.teams.through
+    with transaction.atomic():
+        tournament = Tournament.objects.select_for_update().only('id', 'max_teams').get(id=tournament_id)
+        teams = Team.objects.only('id', 'name', 'passcode').in_bulk(team_ids)
+        entries = through.objects.filter(tournament_id=tournament.id)
+        joined = set(entries.filter(team_id__in=teams).values_list('team_id', flat=True))
+        free = None if tournament.max_teams is None else max(tournament.max_teams - entries.count(), 0)
+
+        pending = {}  # team id -> index
+        for index, item in enumerate(items):
+            team_id, passcode = _fields(item, 'team_id', 'passcode')
+            team = teams.get(team_id) if _is_id(team_id) else None
+            if team_id is None:
+                results[index] = _error(index, 'Team ID is required')
+            elif team is None:
+                results[index] = _error(index, 'Team not found')
+            elif team.passcode and team.passcode != (passcode or ''):
+                results[index] = _error(index, 'Invalid team passcode')
+            elif team.id in joined:
+                results[index] = _error(index, 'Team already joined this tournament')
+            elif team.id in pending:
+                results[index] = _error(index, 'Duplicate team in this batch')
+            elif free is not None and len(pending) >= free:
+                results[index] = _error(index, 'Tournament is full')
+            else:
+                pending[team.id] = index
+
+        if pending:
+            through.objects.bulk_create(
+                [through(tournament_id=tournament.id, team_id=team_id) for team_id in pending],
+                batch_size=BATCH_SIZE,
+            )
+            # Standings, caching and live events, as teams.add() would.
+            m2m_changed.send(
+                sender=through, action='post_add', instance=tournament, reverse=False,
+                model=Team, pk_set=set(pending), using=through.objects.db,
+            )
+    for team_id, index in pending.items():
+        results[index] = {'index': index, 'team_id': team_id}
+    return results
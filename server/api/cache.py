@@ -0,0 +1,240 @@
+import hashlib
+import threading
+import time
+from contextlib import nullcontext
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.http import HttpResponse
+
+from api import routers
+from api.conditional import not_modified, set_validators, version_etag
+
+# Scopes group cached responses that go stale together. Each scope has a
+# version number that is part of every response key stored under it, so
+# invalidating a scope is a single increment and old entries simply expire.
+ANNOUNCEMENTS = 'announcements'
+TOURNAMENTS = 'tournaments'
+TEAMS = 'teams'
+STANDINGS = 'standings'
+
+
+# Response headers that are part of the payload and must survive caching.
+CACHED_HEADERS = ('Link',)
+
+
+def tournament_scope(tournament_id):
+    return f'tournament:{tournament_id}'
+
+
+def get_cache():
+    return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+
+def _version_key(scope):
+    return f'api:version:{scope}'
+
+
+def _fresh_version():
+    # Never restart at 1: if a version key is evicted while responses stored
+    # under it survive, a reused number would serve those stale responses.
+    return time.time_ns()
+
+
+def get_versions(scopes):
+    cache = get_cache()
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _fresh_version(), None)
+            versions[key] = cache.get(key)
+    return [str(versions[key]) for key in keys]
+
+
+def _recent_change_key(scope):
+    return f'api:changed:{scope}'
+
+
+def _bump(scopes):
+    cache = get_cache()
+    for scope in scopes:
+        try:
+            cache.incr(_version_key(scope))
+        except ValueError:
+            cache.set(_version_key(scope), _fresh_version(), None)
+    if routers.replicas():
+        # Marks the scopes as changed for as long as replicas may lag behind.
+        cache.set_many({_recent_change_key(scope): 1 for scope in scopes}, settings.API_REPLICA_LAG_SECONDS)
+
+
+def _may_be_stale(scopes):
+    """Whether a response read from a replica may predate the latest change to ``scopes``."""
+    return routers.reading_from_replicas() and bool(
+        get_cache().get_many([_recent_change_key(scope) for scope in scopes])
+    )
+
+
+def _reading_from(stale):
+    # Reads that a replica may not have caught up with go to the primary.
+    return routers.use_primary() if stale else nullcontext()
+
+
+def cached_value(name, scopes, compute):
+    """
+    A value derived from the database, cached under ``name`` and the current
+    versions of ``scopes``. ``compute()`` returns (value, timeout), where the
+    timeout in seconds says how long the value stays correct without writes.
+    """
+    key = ':'.join(['api:value', name, *get_versions(scopes)])
+    cached = get_cache().get(key)
+    if cached is not None:
+        return cached[0]
+    value, timeout = compute()
+    if not _may_be_stale(scopes):
+        get_cache().set(key, (value,), timeout)
+    return value
+
+
+def invalidate(*scopes):
+    """
+    Bump the given scopes now and again once the surrounding transaction
+    commits, so a concurrent reader cannot re-cache pre-commit data.
+    """
+    scopes = set(scopes)
+    if not scopes:
+        return
+    _bump(scopes)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump(scopes))
+
+
+# Per-process hit/miss counters
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _record(endpoint, hit):
+    with _stats_lock:
+        counters = _stats.setdefault(endpoint, {'hits': 0, 'misses': 0})
+        counters['hits' if hit else 'misses'] += 1
+
+
+def cache_stats():
+    with _stats_lock:
+        return {
+            endpoint: {
+                **counters,
+                'hit_rate': counters['hits'] / (counters['hits'] + counters['misses']),
+            } for endpoint, counters in _stats.items()
+        }
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _response_key(endpoint, request, kwargs, scopes):
+    query = hashlib.md5(request.META.get('QUERY_STRING', '').encode()).hexdigest()
+    return ':'.join([
+        'api:response', endpoint,
+        *(f'{name}={value}' for name, value in sorted(kwargs.items())),
+        query, *get_versions(scopes),
+    ])
+
+
+def _lookup(endpoint, scopes, stamp, timeout, request, kwargs):
+    """
+    Return (response, key, scopes, etag, last_modified, timeout); ``response``
+    is set when the request can be answered from the cache or with a 304.
+    """
+    key = _response_key(endpoint, request, kwargs, scopes)
+    cached = get_cache().get(key)
+    if cached is not None:
+        _record(endpoint, hit=True)
+        status, content, headers, etag, last_modified = cached
+        response = None
+        if etag:
+            response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = HttpResponse(content, status=status, content_type='application/json', headers=headers)
+            response['X-Cache'] = 'HIT'
+        response = set_validators(response, etag, last_modified) if etag else response
+        return response, key, scopes, etag, last_modified, None
+
+    _record(endpoint, hit=False)
+    timeout = timeout(**kwargs) if timeout else settings.API_CACHE_TIMEOUT
+    version = stamp(**kwargs) if stamp else None
+    if version is None:
+        return None, key, scopes, None, None, timeout
+    last_modified, token = version
+    etag = version_etag(request, token)
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response, key, scopes, etag, last_modified, timeout
+
+
+def _store(response, key, scopes, etag, last_modified, timeout):
+    if response.status_code == 200 and not response.streaming:
+        # A lagging replica can still return pre-change rows under the new
+        # scope versions; serve them but do not cache them.
+        if not _may_be_stale(scopes):
+            get_cache().set(
+                key,
+                (
+                    response.status_code, response.content,
+                    {name: response[name] for name in CACHED_HEADERS if response.has_header(name)},
+                    etag, last_modified,
+                ),
+                timeout,
+            )
+        if etag:
+            set_validators(response, etag, last_modified)
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+def cached_response(endpoint, scopes, stamp=None, timeout=None):
+    """
+    Cache a view method's successful JSON responses under ``endpoint``.
+
+    ``scopes`` receives the URL kwargs and returns the scopes whose
+    invalidation should evict the response. ``stamp`` (see api.conditional)
+    receives the same kwargs and versions the response for ETag and
+    Last-Modified validation; the validators are cached with the body.
+    ``timeout``, given the kwargs too, returns how many seconds the response
+    may be cached, API_CACHE_TIMEOUT by default. While a replica may lag
+    behind a change to the scopes, the whole request reads from the primary.
+    Works for both sync and async view methods.
+    """
+    def decorator(view_method):
+        if iscoroutinefunction(view_method):
+            @wraps(view_method)
+            async def async_wrapper(self, request, *args, **kwargs):
+                view_scopes = scopes(**kwargs)
+                with _reading_from(await sync_to_async(_may_be_stale)(view_scopes)):
+                    response, *entry = await sync_to_async(_lookup)(
+                        endpoint, view_scopes, stamp, timeout, request, kwargs,
+                    )
+                    if response is not None:
+                        return response
+                    response = await view_method(self, request, *args, **kwargs)
+                    return await sync_to_async(_store)(response, *entry)
+            return async_wrapper
+
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            view_scopes = scopes(**kwargs)
+            with _reading_from(_may_be_stale(view_scopes)):
+                response, *entry = _lookup(endpoint, view_scopes, stamp, timeout, request, kwargs)
+                if response is not None:
+                    return response
+                return _store(view_method(self, request, *args, **kwargs), *entry)
+        return wrapper
+    return decorator
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core import checks
+
+# Backends that do not share entries between worker processes.
+PER_PROCESS_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+@checks.register(checks.Tags.caches, checks.Tags.database)
+def check_replica_cache(app_configs, **kwargs):
+    """
+    api.cache keeps its "recently changed" markers in the response cache, and
+    they route reads of fresh writes to the primary. With read replicas that
+    cache has to be shared by every worker, or a worker that did not see the
+    write reads stale rows from a replica.
+    """
+    alias = getattr(settings, 'API_CACHE_ALIAS', 'default')
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    if settings.DATABASE_REPLICAS and backend in PER_PROCESS_CACHES:
+        return [checks.Warning(
+            f'Read replicas are configured, but the {alias!r} cache ({backend}) is not shared between workers.',
+            hint='Point CACHE_BACKEND/CACHE_LOCATION at a shared cache such as Redis or Memcached, '
+                 'or reads right after a write may be served from a lagging replica.',
+            id='api.W001',
+        )]
+    return []
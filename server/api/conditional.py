@@ -0,0 +1,64 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from api.models import Match, Team, Tournament
+
+# A stamp is a (last_modified, token) pair that changes whenever the data
+# behind a response does. It is computed with one cheap aggregate so that
+# conditional requests can be answered before any payload is built.
+
+
+def queryset_stamp(queryset):
+    stats = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+    last_modified = stats['last_modified']
+    return last_modified, f"{last_modified.isoformat() if last_modified else '-'}|{stats['count']}"
+
+
+def tournaments_stamp():
+    return queryset_stamp(Tournament.objects.all())
+
+
+def teams_stamp():
+    return queryset_stamp(Team.objects.all())
+
+
+def tournament_stamp(tournament_id):
+    # Changes to a tournament's teams, members and matches touch its updated_at.
+    last_modified = Tournament.objects.filter(pk=tournament_id).values_list('updated_at', flat=True).first()
+    if last_modified is None:
+        return None
+    return last_modified, last_modified.isoformat()
+
+
+def standings_stamp(tournament_id=None):
+    if tournament_id is not None:
+        return tournament_stamp(tournament_id)
+    stamps = [queryset_stamp(Match.objects.all()), queryset_stamp(Team.objects.all())]
+    last_modified = max((stamp[0] for stamp in stamps if stamp[0]), default=None)
+    return last_modified, '/'.join(stamp[1] for stamp in stamps)
+
+
+def version_etag(request, token):
+    digest = hashlib.sha1(f'{request.get_full_path()}|{token}'.encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def not_modified(request, etag, last_modified):
+    """Return a 304 response if the client's validators are still current."""
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def set_validators(response, etag, last_modified):
+    # no-cache lets browsers keep the payload but revalidate it on every use.
+    patch_cache_control(response, no_cache=True)
+    response.headers['ETag'] = etag
+    if last_modified:
+        response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
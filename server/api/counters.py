@@ -0,0 +1,76 @@
+"""
+Stored relation counts: Team.member_count and Tournament.team_count.
+
+Handlers in api.signals adjust them with F() updates as links are added and
+removed, so list views read them instead of counting. reconcile() recounts
+them from the link tables to find and fix drift, e.g. after raw SQL or bulk
+inserts that skip the signals.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from api.models import Team, Tournament
+
+# ``model.field`` counts the ``through`` rows whose ``key`` is the model's
+# id; ``other`` is the through table's column for the other side.
+Counter = namedtuple('Counter', 'model field through key other')
+
+MEMBER_COUNT = Counter(Team, 'member_count', Team.members.through, 'team_id', 'player_id')
+TEAM_COUNT = Counter(Tournament, 'team_count', Tournament.teams.through, 'tournament_id', 'team_id')
+COUNTERS = (MEMBER_COUNT, TEAM_COUNT)
+
+
+def adjust(counter, ids, delta):
+    counter.model.objects.filter(pk__in=ids).update(**{counter.field: F(counter.field) + delta})
+
+
+def links_changed(counter, instance, action, reverse, pk_set):
+    """
+    Apply an m2m_changed action to the counter. post_add's pk_set holds only
+    the links actually inserted. Removals are counted in pre_remove and
+    pre_clear, whose pk_set may name links that do not exist; the update
+    runs in the same transaction as the delete.
+    """
+    if action == 'post_add':
+        if not pk_set:
+            return
+        if reverse:
+            adjust(counter, pk_set, 1)
+        else:
+            adjust(counter, [instance.pk], len(pk_set))
+    elif action in ('pre_remove', 'pre_clear'):
+        links = counter.through.objects.filter(**{counter.other if reverse else counter.key: instance.pk})
+        if action == 'pre_remove':
+            links = links.filter(**{f'{counter.key if reverse else counter.other}__in': pk_set})
+        if reverse:
+            adjust(counter, links.values(counter.key), -1)
+        elif removed := links.count():
+            adjust(counter, [instance.pk], -removed)
+
+
+def actual_count(counter):
+    links = counter.through.objects.filter(**{counter.key: OuterRef('pk')})
+    return Coalesce(
+        Subquery(links.order_by().values(counter.key).annotate(count=Count('pk')).values('count')),
+        0,
+        output_field=IntegerField(),
+    )
+
+
+def reconcile(counter, commit=True):
+    """Return (id, stored, actual) for every drifted row, fixing them unless commit is False."""
+    drift = list(
+        counter.model.objects.annotate(actual=actual_count(counter))
+        .exclude(**{counter.field: F('actual')})
+        .order_by('pk').values_list('pk', counter.field, 'actual')
+    )
+    if drift and commit:
+        with transaction.atomic():
+            # Recounted in the UPDATE itself, so links added since the check still count.
+            counter.model.objects.filter(pk__in=[pk for pk, _, _ in drift]).update(
+                **{counter.field: actual_count(counter)}
+            )
+    return drift
@@ -0,0 +1,131 @@
+"""
+In-process pub/sub for the live tournament feed.
+
+Model save hooks publish events to channels; each SSE connection holds an
+asyncio queue subscribed to the channels it follows. A short per-channel
+history lets reconnecting clients replay what they missed by sending the
+last event id they saw.
+
+The broker lives in one process: subscribers only see events published by
+writes handled in the same process, so the live feed expects the ASGI
+server to run a single process (one uvicorn worker handles thousands of
+idle connections).
+"""
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+
+ANNOUNCEMENTS_CHANNEL = 'announcements'
+
+
+def tournament_channel(tournament_id):
+    return f'tournament:{tournament_id}'
+
+
+@dataclass(frozen=True)
+class Event:
+    id: str
+    seq: int
+    type: str
+    data: dict
+
+    def encode(self):
+        return f'id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data)}\n\n'
+
+
+@dataclass(eq=False)
+class Subscription:
+    channels: tuple
+    queue: asyncio.Queue
+    loop: asyncio.AbstractEventLoop
+    backlog: list = field(default_factory=list)
+    # Set when the client's last id is too old (or from another process
+    # run) to replay, so it should refetch the full state.
+    resync: bool = False
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A client this far behind is cut off; it reconnects and replays.
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class EventBroker:
+    def __init__(self, history=200, queue_size=100):
+        self.history_size = history
+        self.queue_size = queue_size
+        # Ids are "<epoch>-<seq>" so ids from a previous process run are
+        # recognised instead of being compared against a restarted counter.
+        self.epoch = str(time.time_ns())
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+        self._history = defaultdict(lambda: deque(maxlen=self.history_size))
+        self._evicted = defaultdict(int)
+        self._subscribers = defaultdict(set)
+
+    def publish(self, channel, event_type, data):
+        """Safe to call from any thread."""
+        with self._lock:
+            seq = next(self._seq)
+            event = Event(f'{self.epoch}-{seq}', seq, event_type, data)
+            history = self._history[channel]
+            if len(history) == history.maxlen:
+                self._evicted[channel] = history[0].seq
+            history.append(event)
+            subscribers = list(self._subscribers[channel])
+
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's event loop has shut down.
+                self.unsubscribe(subscription)
+        return event
+
+    def _parse(self, last_event_id):
+        epoch, _, seq = (last_event_id or '').partition('-')
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def subscribe(self, channels, last_event_id=None):
+        """Subscribe the running event loop to ``channels``."""
+        subscription = Subscription(
+            tuple(channels), asyncio.Queue(maxsize=self.queue_size), asyncio.get_running_loop()
+        )
+        last_seq = self._parse(last_event_id)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+            if last_event_id:
+                if last_seq is None or any(self._evicted[channel] > last_seq for channel in channels):
+                    subscription.resync = True
+                    last_seq = 0
+                subscription.backlog = sorted(
+                    (
+                        event for channel in channels for event in self._history[channel]
+                        if event.seq > last_seq
+                    ),
+                    key=lambda event: event.seq,
+                )
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].discard(subscription)
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({s for subscribers in self._subscribers.values() for s in subscribers})
+
+
+broker = EventBroker()
@@ -0,0 +1,105 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+# Hasher cost parameters come from settings (and so from the environment).
+# must_update() compares stored hashes against them, so raising a cost makes
+# the next successful login rehash the password.
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return settings.SCRYPT_WORK_FACTOR
+
+    @property
+    def block_size(self):
+        return settings.SCRYPT_BLOCK_SIZE
+
+    @property
+    def parallelism(self):
+        return settings.SCRYPT_PARALLELISM
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
+
+
+class HashingBusy(Exception):
+    pass
+
+
+# Both scrypt and argon2-cffi release the GIL, so a small pool gives real
+# parallelism while capping how many CPU-heavy hashes run per process. The
+# semaphore bounds the backlog; callers that cannot get a slot in time are
+# turned away instead of tying up a worker indefinitely. Batches also need
+# one of the fewer bulk slots, so they never take every slot from logins.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash'
+)
+_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_WORKERS * 2)
+_bulk_slots = threading.BoundedSemaphore(settings.PASSWORD_BULK_HASH_WORKERS)
+
+
+def _submit(function, *args, slots=(_slots,)):
+    acquired = []
+    try:
+        for semaphore in slots:
+            if not semaphore.acquire(timeout=settings.PASSWORD_HASH_TIMEOUT):
+                raise HashingBusy('Too many password checks in progress')
+            acquired.append(semaphore)
+        future = _executor.submit(function, *args)
+    except BaseException:
+        for semaphore in acquired:
+            semaphore.release()
+        raise
+    future.add_done_callback(lambda _: [semaphore.release() for semaphore in acquired])
+    return future
+
+
+def run_hash(function, *args):
+    return _submit(function, *args).result()
+
+
+def hash_password(raw_password):
+    return run_hash(hashers.make_password, raw_password)
+
+
+def hash_passwords(raw_passwords):
+    # Each hash waits for a bulk slot before taking a shared one, so a batch
+    # runs at most PASSWORD_BULK_HASH_WORKERS hashes at a time.
+    futures = [
+        _submit(hashers.make_password, raw_password, slots=(_bulk_slots, _slots))
+        for raw_password in raw_passwords
+    ]
+    return [future.result() for future in futures]
+
+
+def verify_password(player, raw_password):
+    """
+    Check ``raw_password`` against ``player`` off the request thread,
+    rehashing it with the preferred hasher and parameters if they changed.
+    """
+    is_correct, must_update = run_hash(hashers.verify_password, raw_password, player.password)
+    if is_correct and must_update:
+        player.password = hash_password(raw_password)
+        player.save(update_fields=['password'])
+    return is_correct
+
+
+def reject_password(raw_password):
+    # Hash anyway for unknown users so response times do not reveal which
+    # usernames exist.
+    hash_password(raw_password)
+    return False
@@ -0,0 +1,86 @@
+import json
+import platform
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from api.benchmarks import BUDGETS_PATH, check_budgets, check_latency, load_budgets, run_benchmarks
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every API route on a fresh test database and check the results against budgets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100], help='populate_db scales to run')
+        parser.add_argument('--iterations', type=int, default=20, help='Requests per route and scale')
+        parser.add_argument('--seed', type=int, default=0, help='populate_db seed')
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Keep the response cache between requests (default: clear it before each one)',
+        )
+        parser.add_argument('--output', default='benchmark-results.json', help='Where to write the JSON results')
+        parser.add_argument('--budgets', default=str(BUDGETS_PATH), help='Budget file to check against')
+        parser.add_argument('--no-check', action='store_true', help='Record results without enforcing budgets')
+        parser.add_argument(
+            '--strict-latency', action='store_true',
+            help='Fail on p95 latency over budget too (default: only warn, as it depends on the machine)',
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+
+        # Never touch the configured database: seed and measure a test copy.
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = run_benchmarks(
+                options['scales'], options['iterations'], options['warm'], options['seed'], stdout=self.stdout,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        violations, latency_warnings = [], []
+        if not options['no_check']:
+            budgets = load_budgets(options['budgets'])
+            violations = check_budgets(results, budgets)
+            latency_warnings = check_latency(results, budgets)
+            if options['strict_latency']:
+                violations += latency_warnings
+                latency_warnings = []
+        with open(options['output'], 'w') as output:
+            json.dump({
+                'created_at': timezone.now().isoformat(),
+                'revision': git_revision(),
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'iterations': options['iterations'],
+                'warm_cache': options['warm'],
+                'scales': results,
+                'violations': violations,
+                'latency_warnings': latency_warnings,
+            }, output, indent=2)
+        self.stdout.write(f'Results written to {options["output"]}')
+
+        for warning in latency_warnings:
+            self.stderr.write(self.style.WARNING(warning))
+
+        if violations:
+            for violation in violations:
+                self.stderr.write(violation)
+            raise CommandError(f'{len(violations)} budget violation(s)')
+        self.stdout.write(self.style.SUCCESS('All routes within budget'))
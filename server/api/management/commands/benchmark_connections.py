@@ -0,0 +1,74 @@
+import statistics
+import time
+
+from django.core.handlers.base import BaseHandler
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from api.benchmarks import percentile
+from api.models import Team, Tournament
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare per-request latency with a new database connection per request against the '
+        'configured connection reuse. Point DB_HOST/DB_PORT/DB_SSLMODE at a local Postgres, e.g. '
+        '"docker run -e POSTGRES_PASSWORD=postgres -p 5432:5432 postgres", to measure the handshake.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Simulated requests per mode')
+
+    def request(self):
+        # The same lifecycle Django's handlers run: close_old_connections()
+        # on request_started and request_finished applies CONN_MAX_AGE.
+        request_started.send(sender=BaseHandler)
+        started = time.perf_counter()
+        list(Tournament.objects.order_by('-start_date', '-id')[:20])
+        Team.objects.count()
+        elapsed = time.perf_counter() - started
+        request_finished.send(sender=BaseHandler)
+        return elapsed * 1000
+
+    def run(self, label, requests):
+        connects = []
+
+        def count_connect(sender, connection, **kwargs):
+            connects.append(connection.alias)
+
+        connection_created.connect(count_connect)
+        try:
+            self.request()  # warm up
+            connects.clear()
+            latencies = [self.request() for _ in range(requests)]
+        finally:
+            connection_created.disconnect(count_connect)
+        self.stdout.write(
+            f'{label:<34} p50 {percentile(latencies, 50):8.2f}ms  p95 {percentile(latencies, 95):8.2f}ms  '
+            f'mean {statistics.fmean(latencies):8.2f}ms  {len(connects)} connects'
+        )
+
+    def handle(self, *args, **options):
+        settings_dict = connection.settings_dict
+        pooled = 'pool' in settings_dict.get('OPTIONS', {})
+        self.stdout.write(
+            f'{connection.vendor} at {settings_dict.get("HOST") or settings_dict["NAME"]}, '
+            f'{options["requests"]} requests per mode'
+        )
+
+        configured = settings_dict['CONN_MAX_AGE']
+        if pooled:
+            self.stdout.write('Connection pool configured; run with DB_POOL=0 DB_CONN_MAX_AGE=0 for the baseline')
+        else:
+            settings_dict['CONN_MAX_AGE'] = 0
+            connection.close()
+            try:
+                self.run('new connection per request', options['requests'])
+            finally:
+                settings_dict['CONN_MAX_AGE'] = configured
+                connection.close()
+
+        label = 'psycopg pool' if pooled else f'CONN_MAX_AGE={configured}'
+        self.run(label, options['requests'])
@@ -0,0 +1,49 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Report password hashes per second for each configured hasher, alone and per pool worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=3.0, help='How long to hash for each run')
+        parser.add_argument(
+            '--workers', type=int, default=settings.PASSWORD_HASH_WORKERS,
+            help='Pool size for the concurrent run (default: PASSWORD_HASH_WORKERS)',
+        )
+
+    def hash_for(self, hasher, seconds):
+        salt = hasher.salt()
+        count, deadline = 0, time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            hasher.encode('correct horse battery staple', salt)
+            count += 1
+        return count
+
+    def handle(self, *args, **options):
+        seconds, workers = options['seconds'], options['workers']
+        for hasher in get_hashers():
+            try:
+                hasher.encode('warm up', hasher.salt())
+            except ValueError as e:
+                # Optional hashers whose library is not installed
+                self.stdout.write(self.style.WARNING(f'{hasher.algorithm}: skipped ({e})'))
+                continue
+
+            started = time.perf_counter()
+            single = self.hash_for(hasher, seconds) / (time.perf_counter() - started)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                total = sum(pool.map(lambda _: self.hash_for(hasher, seconds), range(workers)))
+            pooled = total / (time.perf_counter() - started)
+
+            self.stdout.write(
+                f'{hasher.algorithm:>14}: {single:8.1f} hashes/s on one thread, '
+                f'{pooled:8.1f} hashes/s with {workers} workers '
+                f'({pooled / workers:.1f} per worker)'
+            )
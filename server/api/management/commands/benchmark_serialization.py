@@ -0,0 +1,73 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+
+from api import serializers
+from api.models import Match, Team
+
+
+def legacy_fixtures_payload(matches):
+    # The fixtures payload as the views built it before api.serializers.
+    return [
+        {
+            'id': match.id,
+            'team_a': {'id': match.team_a.id, 'name': match.team_a.name},
+            'team_b': {'id': match.team_b.id, 'name': match.team_b.name},
+            'scheduled_time': match.scheduled_time.isoformat(),
+            'location': match.location,
+            'is_completed': match.is_completed,
+            'score_a': match.score_a,
+            'score_b': match.score_b,
+            'result': match.result,
+        } for match in matches
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Time building and encoding the fixtures payload for in-memory matches, before and after api.serializers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fixtures', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per encoder; the fastest is reported')
+
+    def fixtures(self, count):
+        teams = [Team(id=i, name=f'Team {i}') for i in range(1, 33)]
+        start = datetime(2026, 1, 1, 18, 30, tzinfo=timezone.utc)
+        matches = []
+        for i in range(count):
+            completed = i % 3 != 0
+            matches.append(Match(
+                id=i + 1, team_a=teams[i % 32], team_b=teams[(i + 7) % 32],
+                scheduled_time=start + timedelta(hours=i), location=f'Court {i % 8 + 1}',
+                is_completed=completed, score_a=i % 5 if completed else None, score_b=i % 4 if completed else None,
+            ))
+        return matches
+
+    def time(self, label, build, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            content = build()
+            best = min(best, time.perf_counter() - started)
+        self.stdout.write(f'{label:<40} {best * 1000:9.2f}ms  {len(content):>10} bytes')
+        return best
+
+    def handle(self, *args, **options):
+        matches = self.fixtures(options['fixtures'])
+        repeat = options['repeat']
+        self.stdout.write(f'{len(matches)} fixtures, best of {repeat}')
+
+        before = self.time(
+            'dicts + django JsonResponse (before)',
+            lambda: JsonResponse(legacy_fixtures_payload(matches), safe=False).content, repeat,
+        )
+        encoders = [('schema + stdlib json', serializers.stdlib_dumps)]
+        if serializers.orjson is not None:
+            encoders.append(('schema + orjson', serializers.orjson_dumps))
+        else:
+            self.stdout.write('orjson is not installed; skipping it')
+        for label, dumps in encoders:
+            after = self.time(label, lambda: dumps(serializers.MATCH.dump_many(matches)), repeat)
+            self.stdout.write(f'{"":<40} {before / after:9.2f}x faster')
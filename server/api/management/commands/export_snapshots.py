@@ -0,0 +1,30 @@
+import shutil
+
+from django.core.management.base import BaseCommand
+
+from api import snapshots
+from api.models import Tournament
+
+
+class Command(BaseCommand):
+    help = 'Write the static detail, fixtures and standings snapshots of tournaments under STATIC_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tournament_ids', nargs='*', type=int, help='Tournaments to export (default: all)')
+
+    def handle(self, *args, **options):
+        tournament_ids = options['tournament_ids'] or list(
+            Tournament.objects.order_by('id').values_list('id', flat=True)
+        )
+        exported = sum(snapshots.export(tournament_id) is not None for tournament_id in tournament_ids)
+        directory = snapshots.tournaments_directory()
+        self.stdout.write(self.style.SUCCESS(f'Exported {exported} tournament snapshot(s) to {directory}'))
+
+        if not options['tournament_ids'] and directory.is_dir():
+            # Snapshots of tournaments deleted while exports were off.
+            existing = set(map(str, tournament_ids))
+            stale = [path for path in directory.iterdir() if path.name not in existing]
+            for path in stale:
+                shutil.rmtree(path, ignore_errors=True)
+            if stale:
+                self.stdout.write(f'Removed {len(stale)} stale snapshot(s)')
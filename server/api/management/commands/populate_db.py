@@ -1,153 +1,240 @@
-from django.core.management.base import BaseCommand
+import random
+import time
+
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
 from django.utils import timezone
 from datetime import timedelta
-from api.models import Player, Team, Announcement, Match, Tournament
+from api import cache
+from api.models import Player, Team, Announcement, Match, Standing, Tournament
+from api.standings import tally_standings
+
+BATCH_SIZE = 2000
+
+PLAYER_NAMES = [
+    'john_doe', 'jane_smith', 'mike_ross', 'sarah_connor', 'tony_stark',
+    'bruce_wayne', 'peter_parker', 'clark_kent', 'diana_prince', 'barry_allen',
+    'hal_jordan', 'wade_wilson', 'steve_rogers', 'natasha_romanoff', 'clint_barton',
+    'wanda_maximoff', 'vision_android', 'sam_wilson', 'bucky_barnes', 'scott_lang'
+]
+
+# (name, first of the four consecutive players on the team)
+TEAMS = [
+    ('Raptors', 0), ('Warriors', 4), ('Lakers', 8), ('Bulls', 12),
+    ('Heat', 16), ('Celtics', 0), ('Nets', 4), ('Mavericks', 8),
+]
+
+MATCHES_PER_SET = 12
+
+ANNOUNCEMENTS = [
+    (
+        'Welcome to DLS 2026!',
+        'We are excited to announce the start of the 2026 tournament season. Register your teams now and compete for amazing prizes!',
+        30,
+    ),
+    (
+        'New Tournament Rules',
+        'Please review the updated tournament rules. All teams must comply with the new fair play guidelines.',
+        15,
+    ),
+    (
+        'Prize Pool Increased!',
+        'Great news! The prize pool for the Central Finest tournament has been increased to $10,000. Don\'t miss your chance to win!',
+        20,
+    ),
+    (
+        'Registration Deadline Reminder',
+        'Only 5 days left to register for the upcoming tournaments. Make sure your team is signed up before the deadline!',
+        5,
+    ),
+    (
+        'Match Schedule Updated',
+        'The match schedule has been updated. Please check your team\'s schedule and confirm your availability.',
+        10,
+    ),
+]
+
+# (title, start in days from now, length in days, entry fee, team slice, match slice)
+TOURNAMENTS = [
+    ('Central Finest', 0, 30, 700.00, (0, 5), (0, 4)),
+    ('Happy New 2026', 10, 30, 850.00, (2, 7), (4, 8)),
+    ('Best of the Best', 20, 30, 1000.00, (3, 8), (8, 12)),
+    ('Winter Championship', 5, 30, 500.00, (0, 6), (0, 0)),
+]
 
 
 class Command(BaseCommand):
     help = 'Populate database with dummy data'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=int, default=1,
+            help='Number of player/team/match/tournament sets to generate (default: 1)',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the generated sets')
+
+    def handle(self, *args, **options):
+        if options['scale'] < 1:
+            raise CommandError('--scale must be at least 1')
         self.stdout.write('Creating dummy data...')
 
-        # Clear existing data (optional)
-        Match.objects.all().delete()
-        Tournament.objects.all().delete()
-        Announcement.objects.all().delete()
-        Team.objects.all().delete()
-        Player.objects.filter(is_superuser=False).delete()
-
-        # Create Players
-        players = []
-        player_names = [
-            'john_doe', 'jane_smith', 'mike_ross', 'sarah_connor', 'tony_stark',
-            'bruce_wayne', 'peter_parker', 'clark_kent', 'diana_prince', 'barry_allen',
-            'hal_jordan', 'wade_wilson', 'steve_rogers', 'natasha_romanoff', 'clint_barton',
-            'wanda_maximoff', 'vision_android', 'sam_wilson', 'bucky_barnes', 'scott_lang'
-        ]
-        
-        for name in player_names:
-            player = Player(
-                username=name,
-                phone_number=f'+1234567{players.__len__():04d}'
-            )
-            # Use a simple password for testing
-            player.password = 'pbkdf2_sha256$600000$test$test'  # Dummy hash
-            player.save()
-            players.append(player)
-            self.stdout.write(f'Created player: {name}')
-
-        # Create Teams
-        teams = []
-        team_data = [
-            ('Raptors', players[0:4]),
-            ('Warriors', players[4:8]),
-            ('Lakers', players[8:12]),
-            ('Bulls', players[12:16]),
-            ('Heat', players[16:20]),
-            ('Celtics', players[0:4]),
-            ('Nets', players[4:8]),
-            ('Mavericks', players[8:12]),
-        ]
+        started = time.perf_counter()
+        with transaction.atomic():
+            self.clear()
+            counts = self.populate(options['scale'], random.Random(options['seed']))
+        elapsed = time.perf_counter() - started
 
-        for team_name, team_members in team_data:
-            team = Team.objects.create(name=team_name, passcode=f'{team_name.lower()}123')
-            team.members.set(team_members)
-            teams.append(team)
-            self.stdout.write(f'Created team: {team_name} with {len(team_members)} members')
-
-        # Create Announcements
-        announcements_data = [
-            {
-                'title': 'Welcome to DLS 2026!',
-                'content': 'We are excited to announce the start of the 2026 tournament season. Register your teams now and compete for amazing prizes!',
-                'expires_at': timezone.now() + timedelta(days=30)
-            },
-            {
-                'title': 'New Tournament Rules',
-                'content': 'Please review the updated tournament rules. All teams must comply with the new fair play guidelines.',
-                'expires_at': timezone.now() + timedelta(days=15)
-            },
-            {
-                'title': 'Prize Pool Increased!',
-                'content': 'Great news! The prize pool for the Central Finest tournament has been increased to $10,000. Don\'t miss your chance to win!',
-                'expires_at': timezone.now() + timedelta(days=20)
-            },
-            {
-                'title': 'Registration Deadline Reminder',
-                'content': 'Only 5 days left to register for the upcoming tournaments. Make sure your team is signed up before the deadline!',
-                'expires_at': timezone.now() + timedelta(days=5)
-            },
-            {
-                'title': 'Match Schedule Updated',
-                'content': 'The match schedule has been updated. Please check your team\'s schedule and confirm your availability.',
-                'expires_at': timezone.now() + timedelta(days=10)
-            },
-        ]
+        for model, count in counts.items():
+            self.stdout.write(f'Created {count} {model}')
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully populated database with dummy data! '
+            f'{total} rows in {elapsed:.2f}s ({total / elapsed:.0f} rows/s)'
+        ))
 
-        for ann_data in announcements_data:
-            announcement = Announcement.objects.create(**ann_data)
-            self.stdout.write(f'Created announcement: {announcement.title}')
-
-        # Create Matches
-        matches = []
-        for i in range(12):
-            match = Match.objects.create(
-                team_a=teams[i % len(teams)],
-                team_b=teams[(i + 1) % len(teams)],
-                scheduled_time=timezone.now() + timedelta(days=i+1, hours=i*2),
-                location=f'Court {(i % 4) + 1}',
-                is_completed=i < 6,  # First 6 matches are completed
-                result=f'{teams[i % len(teams)].name} wins' if i < 6 else None
-            )
-            matches.append(match)
-            self.stdout.write(f'Created match: {match}')
-
-        # Create Tournaments
-        tournaments_data = [
-            {
-                'title': 'Central Finest',
-                'start_date': timezone.now().date(),
-                'end_date': (timezone.now() + timedelta(days=30)).date(),
-                'entry_fee': 700.00,
-                'teams': teams[0:5],
-                'matches': matches[0:4]
-            },
-            {
-                'title': 'Happy New 2026',
-                'start_date': (timezone.now() + timedelta(days=10)).date(),
-                'end_date': (timezone.now() + timedelta(days=40)).date(),
-                'entry_fee': 850.00,
-                'teams': teams[2:7],
-                'matches': matches[4:8]
-            },
-            {
-                'title': 'Best of the Best',
-                'start_date': (timezone.now() + timedelta(days=20)).date(),
-                'end_date': (timezone.now() + timedelta(days=50)).date(),
-                'entry_fee': 1000.00,
-                'teams': teams[3:8],
-                'matches': matches[8:12]
-            },
-            {
-                'title': 'Winter Championship',
-                'start_date': (timezone.now() + timedelta(days=5)).date(),
-                'end_date': (timezone.now() + timedelta(days=35)).date(),
-                'entry_fee': 500.00,
-                'teams': teams[0:6],
-                'matches': []
-            },
+    def clear(self):
+        # Truncate instead of deleting row by row: the delete signals would
+        # update standings and caches once per match and team. Sequences are
+        # reset so a given seed always produces the same ids.
+        old_tournament_ids = list(Tournament.objects.values_list('id', flat=True))
+        models = [
+            Standing, Tournament.teams.through, Tournament.matches.through, Team.members.through,
+            Match, Tournament, Team, Announcement,
         ]
+        connection.ops.execute_sql_flush(
+            connection.ops.sql_flush(no_style(), [model._meta.db_table for model in models], reset_sequences=True)
+        )
+        # Superusers are kept, so players cannot be flushed; they and their
+        # remaining links go in plain DELETEs, again without per-row signals.
+        quote = connection.ops.quote_name
+        players = quote(Player._meta.db_table)
+        demo_players = f"{quote('is_superuser')} = %s"
+        with connection.cursor() as cursor:
+            for model, column in (
+                (LogEntry, 'user_id'),
+                (Player.groups.through, 'player_id'),
+                (Player.user_permissions.through, 'player_id'),
+            ):
+                cursor.execute(
+                    f"DELETE FROM {quote(model._meta.db_table)} WHERE {quote(column)} IN "
+                    f"(SELECT {quote('id')} FROM {players} WHERE {demo_players})",
+                    [False],
+                )
+            cursor.execute(f'DELETE FROM {players} WHERE {demo_players}', [False])
+        cache.invalidate(
+            cache.ANNOUNCEMENTS, cache.TOURNAMENTS, cache.TEAMS, cache.STANDINGS,
+            *(cache.tournament_scope(tournament_id) for tournament_id in old_tournament_ids),
+        )
+
+    def populate(self, scale, rng):
+        """
+        Bulk-insert ``scale`` sets of players, teams, matches and tournaments.
+        The first set is the fixed sample data; later sets get numbered names
+        and seeded random fixtures and results.
+        """
+        now = timezone.now()
+        # Every dummy player shares one real hash, so seeding stays fast
+        password = make_password('password123')
+
+        players = Player.objects.bulk_create(
+            [
+                Player(
+                    username=name if n == 0 else f'{name}_{n}',
+                    phone_number=f'+1234567{n * len(PLAYER_NAMES) + i:04d}',
+                    password=password,
+                )
+                for n in range(scale) for i, name in enumerate(PLAYER_NAMES)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        teams = Team.objects.bulk_create(
+            [
+                Team(
+                    name=name if n == 0 else f'{name} {n}', passcode=f'{name.lower()}123',
+                    member_count=len(PLAYER_NAMES[first:first + 4]),
+                )
+                for n in range(scale) for name, first in TEAMS
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        members = Team.members.through.objects.bulk_create(
+            [
+                Team.members.through(team_id=teams[n * len(TEAMS) + t].id, player_id=player.id)
+                for n in range(scale) for t, (_, first) in enumerate(TEAMS)
+                for player in players[n * len(PLAYER_NAMES) + first:n * len(PLAYER_NAMES) + first + 4]
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        announcements = Announcement.objects.bulk_create(
+            Announcement(title=title, content=content, expires_at=now + timedelta(days=days))
+            for title, content, days in ANNOUNCEMENTS
+        )
+
+        match_rows = []
+        for n in range(scale):
+            set_teams = teams[n * len(TEAMS):(n + 1) * len(TEAMS)]
+            for i in range(MATCHES_PER_SET):
+                if n == 0:
+                    team_a, team_b = set_teams[i % len(TEAMS)], set_teams[(i + 1) % len(TEAMS)]
+                    hours, court, scores = i * 2, i % 4, ((i % 3) + 1, i % 2)
+                else:
+                    team_a, team_b = rng.sample(set_teams, 2)
+                    hours, court, scores = rng.randrange(24), rng.randrange(4), (rng.randrange(6), rng.randrange(6))
+                completed = i < MATCHES_PER_SET // 2  # First half of each set is completed
+                match_rows.append(Match(
+                    team_a=team_a,
+                    team_b=team_b,
+                    scheduled_time=now + timedelta(days=i + 1, hours=hours),
+                    location=f'Court {court + 1}',
+                    is_completed=completed,
+                    score_a=scores[0] if completed else None,
+                    score_b=scores[1] if completed else None,
+                ))
+        matches = Match.objects.bulk_create(match_rows, batch_size=BATCH_SIZE)
+
+        tournaments = Tournament.objects.bulk_create(
+            [
+                Tournament(
+                    title=title if n == 0 else f'{title} #{n + 1}',
+                    start_date=(now + timedelta(days=start)).date(),
+                    end_date=(now + timedelta(days=start + length)).date(),
+                    entry_fee=fee,
+                    team_count=team_end - team_start,
+                )
+                for n in range(scale) for title, start, length, fee, (team_start, team_end), _ in TOURNAMENTS
+            ],
+            batch_size=BATCH_SIZE,
+        )
 
-        for tourn_data in tournaments_data:
-            tournament = Tournament.objects.create(
-                title=tourn_data['title'],
-                start_date=tourn_data['start_date'],
-                end_date=tourn_data['end_date'],
-                entry_fee=tourn_data['entry_fee']
+        tournament_teams, tournament_matches, standings = [], [], []
+        for index, tournament in enumerate(tournaments):
+            n = index // len(TOURNAMENTS)
+            _, _, _, _, (team_start, team_end), (match_start, match_end) = TOURNAMENTS[index % len(TOURNAMENTS)]
+            entered = teams[n * len(TEAMS) + team_start:n * len(TEAMS) + team_end]
+            played = matches[n * MATCHES_PER_SET + match_start:n * MATCHES_PER_SET + match_end]
+            tournament_teams += [Tournament.teams.through(tournament_id=tournament.id, team_id=team.id) for team in entered]
+            tournament_matches += [Tournament.matches.through(tournament_id=tournament.id, match_id=match.id) for match in played]
+            # Bulk inserts skip the signals that maintain stored standings.
+            table = tally_standings(
+                [team.id for team in entered],
+                [(m.team_a_id, m.team_b_id, m.score_a, m.score_b) for m in played if m.has_result],
             )
-            tournament.teams.set(tourn_data['teams'])
-            tournament.matches.set(tourn_data['matches'])
-            self.stdout.write(f'Created tournament: {tournament.title}')
+            standings += [Standing(tournament_id=tournament.id, team_id=team_id, **stats) for team_id, stats in table.items()]
+        Tournament.teams.through.objects.bulk_create(tournament_teams, batch_size=BATCH_SIZE)
+        Tournament.matches.through.objects.bulk_create(tournament_matches, batch_size=BATCH_SIZE)
+        Standing.objects.bulk_create(standings, batch_size=BATCH_SIZE)
 
-        self.stdout.write(self.style.SUCCESS('Successfully populated database with dummy data!'))
+        return {
+            'players': len(players),
+            'teams': len(teams),
+            'team members': len(members),
+            'announcements': len(announcements),
+            'matches': len(matches),
+            'tournaments': len(tournaments),
+            'tournament entries': len(tournament_teams),
+            'tournament matches': len(tournament_matches),
+            'standings': len(standings),
+        }
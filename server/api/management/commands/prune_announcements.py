@@ -0,0 +1,65 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import ExpiredAnnouncement
+from api.serializers import ANNOUNCEMENT, dumps
+
+ARCHIVED_FIELDS = (*ANNOUNCEMENT.names, 'updated_at')
+
+
+def archived_ids(path):
+    """Ids already in the archive, so a rerun after a failed delete adds no duplicates."""
+    ids = set()
+    try:
+        with open(path, 'rb') as archive:
+            for line in archive:
+                try:
+                    ids.add(json.loads(line)['id'])
+                except (ValueError, KeyError, TypeError):
+                    continue
+    except FileNotFoundError:
+        pass
+    return ids
+
+
+class Command(BaseCommand):
+    help = 'Delete expired announcements in batches, optionally archiving them to a JSON lines file first'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=0, help='Days past expiry before a row is pruned')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--archive', metavar='PATH', help='Append the pruned rows to this file, one JSON object per line',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        cutoff = timezone.now() - timedelta(days=options['older_than'])
+        # Expired rows are already out of every response, so the proxy's
+        # deletes skip the per-row signals and leave cached feeds alone.
+        expired = ExpiredAnnouncement.objects.filter(expires_at__lt=cutoff).order_by('pk')
+        archived = archived_ids(options['archive']) if options['archive'] else None
+        archive = open(options['archive'], 'ab') if options['archive'] else None
+
+        pruned = 0
+        try:
+            while True:
+                with transaction.atomic():
+                    rows = list(expired.values(*ARCHIVED_FIELDS)[:options['batch_size']])
+                    if not rows:
+                        break
+                    if archive:
+                        # Written before the delete commits, so no row is lost.
+                        archive.write(b''.join(dumps(row) + b'\n' for row in rows if row['id'] not in archived))
+                        archive.flush()
+                        archived.update(row['id'] for row in rows)
+                    pruned += ExpiredAnnouncement.objects.filter(pk__in=[row['id'] for row in rows]).delete()[0]
+        finally:
+            if archive:
+                archive.close()
+        self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} expired announcement(s)'))
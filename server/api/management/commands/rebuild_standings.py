@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.models import Tournament
+from api.standings import rebuild_standings
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored standings from match results and report any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tournament_ids', nargs='*', type=int, help='Tournaments to rebuild (default: all)')
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only report drift and exit with an error if any is found',
+        )
+
+    def handle(self, *args, **options):
+        tournaments = Tournament.objects.order_by('id')
+        if options['tournament_ids']:
+            tournaments = tournaments.filter(id__in=options['tournament_ids'])
+
+        drifted = 0
+        for tournament in tournaments:
+            drift = rebuild_standings(tournament.id, commit=not options['check'])
+            if not drift:
+                continue
+            drifted += 1
+            self.stdout.write(self.style.WARNING(f'{tournament.title} (#{tournament.id}): {len(drift)} drifted values'))
+            for team_id, field, stored, expected in drift:
+                if field is None:
+                    self.stdout.write(f'  team #{team_id}: stored row {stored}, expected {expected}')
+                else:
+                    self.stdout.write(f'  team #{team_id} {field}: stored {stored}, expected {expected}')
+
+        if drifted and options['check']:
+            raise CommandError(f'Standings drifted in {drifted} tournament(s)')
+        if drifted:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt standings for {drifted} tournament(s)'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Standings are consistent'))
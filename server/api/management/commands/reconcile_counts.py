@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import cache
+from api.counters import COUNTERS, TEAM_COUNT, reconcile
+from api.signals import tournaments_changed
+
+
+class Command(BaseCommand):
+    help = 'Recount stored team member and tournament team counts and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only report drift and exit with an error if any is found',
+        )
+
+    def handle(self, *args, **options):
+        drifted = 0
+        for counter in COUNTERS:
+            drift = reconcile(counter, commit=not options['check'])
+            drifted += len(drift)
+            label = f'{counter.model._meta.verbose_name} {counter.field}'
+            for pk, stored, actual in drift:
+                self.stdout.write(self.style.WARNING(f'{label} #{pk}: stored {stored}, actual {actual}'))
+            if drift and not options['check']:
+                tournament_ids = [pk for pk, _, _ in drift] if counter is TEAM_COUNT else []
+                tournaments_changed(tournament_ids, cache.TEAMS, cache.TOURNAMENTS)
+
+        if drifted and options['check']:
+            raise CommandError(f'{drifted} stored count(s) drifted')
+        if drifted:
+            self.stdout.write(self.style.SUCCESS(f'Fixed {drifted} stored count(s)'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Stored counts are consistent'))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api import cache
+from api.models import Match, Tournament
+from api.signals import tournaments_changed
+
+
+class Command(BaseCommand):
+    help = 'Recompute bracket winners and re-seat them in the next round, fixing matches edited without signals'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tournament_ids', nargs='*', type=int, help='Tournaments to repair (default: all)')
+        parser.add_argument('--check', action='store_true', help='Only report what would change')
+
+    def handle(self, *args, **options):
+        matches = Match.objects.filter(round__isnull=False).order_by('round', 'slot').only(
+            'id', 'round', 'slot', 'next_match', 'team_a', 'team_b', 'score_a', 'score_b', 'is_completed', 'winner',
+        )
+        if options['tournament_ids']:
+            matches = matches.filter(tournaments__in=options['tournament_ids']).distinct()
+
+        with transaction.atomic():
+            matches = {match.id: match for match in matches}
+            changed = set()
+            # Rounds in order, so a re-seated team can decide its next match too.
+            for match in matches.values():
+                winner_id = match.decided_winner_id()
+                if match.winner_id != winner_id:
+                    match.winner_id = winner_id
+                    changed.add(match.id)
+                following = matches.get(match.next_match_id)
+                if following is not None and getattr(following, f'{match.next_match_side}_id') != winner_id:
+                    setattr(following, f'{match.next_match_side}_id', winner_id)
+                    changed.add(following.id)
+
+            if changed and not options['check']:
+                now = timezone.now()
+                repaired = [matches[match_id] for match_id in changed]
+                for match in repaired:
+                    match.updated_at = now
+                # bulk_update sends no signals, so nothing cascades twice.
+                Match.objects.bulk_update(repaired, ['winner', 'team_a', 'team_b', 'updated_at'], batch_size=500)
+                tournament_ids = Tournament.matches.through.objects.filter(
+                    match_id__in=changed
+                ).values_list('tournament_id', flat=True).distinct()
+                tournaments_changed(tournament_ids, cache.TOURNAMENTS)
+
+        if not changed:
+            self.stdout.write(self.style.SUCCESS(f'{len(matches)} bracket matches are consistent'))
+        elif options['check']:
+            self.stdout.write(self.style.WARNING(f'{len(changed)} of {len(matches)} bracket matches need repair'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(changed)} of {len(matches)} bracket matches'))
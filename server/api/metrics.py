@@ -0,0 +1,183 @@
+"""
+Per-request performance measurements and per-route histograms.
+
+PerformanceMiddleware (api.middleware) opens a RequestTiming for each
+request. Every database connection gets record_query as an execute wrapper
+and api.responses.JsonResponse reports its encoding time; both find the
+current request through a context variable, so this works for sync views and
+for async views whose ORM calls run in worker threads.
+
+Histograms are cumulative per process, as Prometheus expects; use rate() and
+histogram_quantile() over the scraped series for rolling windows.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from api import cache
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = contextvars.ContextVar('api_request_timing', default=None)
+
+
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.sql_seconds = 0.0
+        self.serialize_seconds = 0.0
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def slowest_queries(self, count=5):
+        return sorted(self.queries, key=lambda query: query[1], reverse=True)[:count]
+
+
+def start_request():
+    timing = RequestTiming()
+    return _current.set(timing), timing
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        timing.queries.append((sql, elapsed))
+        timing.sql_seconds += elapsed
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    # Connection wrappers are per thread and outlive reconnects, so install once.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def timed_serialization():
+    timing = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timing is not None:
+            timing.serialize_seconds += time.perf_counter() - started
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                self.buckets[index] += 1
+        self.count += 1
+        self.sum += value
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.duration = Histogram()
+        self.sql_duration = Histogram()
+        self.queries = 0
+        self.serialize_seconds = 0.0
+
+
+# Per-process metrics keyed by (method, route)
+_routes = {}
+_routes_lock = threading.Lock()
+
+
+def observe(method, route, timing, total):
+    with _routes_lock:
+        metrics = _routes.setdefault((method, route), RouteMetrics())
+        metrics.duration.observe(total)
+        metrics.sql_duration.observe(timing.sql_seconds)
+        metrics.queries += len(timing.queries)
+        metrics.serialize_seconds += timing.serialize_seconds
+
+
+def reset_metrics():
+    with _routes_lock:
+        _routes.clear()
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + '}'
+
+
+def _histogram_lines(name, help_text, histograms):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for labels, histogram in histograms:
+        for bound, count in zip(DURATION_BUCKETS, histogram.buckets):
+            lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {count}')
+        lines.append(f'{name}_bucket{_labels(**labels, le="+Inf")} {histogram.count}')
+        lines.append(f'{name}_sum{_labels(**labels)} {histogram.sum}')
+        lines.append(f'{name}_count{_labels(**labels)} {histogram.count}')
+    return lines
+
+
+def _counter_lines(name, help_text, values):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+    lines.extend(f'{name}{_labels(**labels)} {value}' for labels, value in values)
+    return lines
+
+
+def metrics_text():
+    """Render the per-route metrics and cache counters in Prometheus text format."""
+    with _routes_lock:
+        routes = [
+            ({'method': method, 'route': route}, metrics)
+            for (method, route), metrics in sorted(_routes.items())
+        ]
+        lines = [
+            *_histogram_lines(
+                'api_request_duration_seconds', 'Time to build the response.',
+                [(labels, metrics.duration) for labels, metrics in routes],
+            ),
+            *_histogram_lines(
+                'api_request_sql_duration_seconds', 'Time spent in SQL queries per request.',
+                [(labels, metrics.sql_duration) for labels, metrics in routes],
+            ),
+            *_counter_lines(
+                'api_request_sql_queries_total', 'SQL queries run.',
+                [(labels, metrics.queries) for labels, metrics in routes],
+            ),
+            *_counter_lines(
+                'api_request_serialize_seconds_total', 'Time spent encoding JSON responses.',
+                [(labels, metrics.serialize_seconds) for labels, metrics in routes],
+            ),
+        ]
+
+    stats = cache.cache_stats()
+    lines += _counter_lines(
+        'api_cache_requests_total', 'Response cache lookups.',
+        [
+            ({'endpoint': endpoint, 'result': result}, counters[key])
+            for endpoint, counters in sorted(stats.items())
+            for result, key in (('hit', 'hits'), ('miss', 'misses'))
+        ],
+    )
+    return '\n'.join(lines) + '\n'
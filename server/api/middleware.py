@@ -0,0 +1,227 @@
+import logging
+import os
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.responders import MissingFileError
+
+from api import metrics, nplusone, routers, snapshots
+
+logger = logging.getLogger('api.performance')
+
+
+class PerformanceMiddleware:
+    """
+    Measure each request's SQL, JSON encoding and total time, report them in
+    the per-route metrics and, per API_SERVER_TIMING, a Server-Timing header,
+    and log slow requests with their slowest queries.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token, timing = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        user = getattr(request, 'user', None) if settings.API_SERVER_TIMING == 'staff' else None
+        return self.finish(request, response, timing, self.shows_timing(user))
+
+    async def __acall__(self, request):
+        token, timing = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        user = None
+        if settings.API_SERVER_TIMING == 'staff' and hasattr(request, 'auser'):
+            user = await request.auser()
+        return self.finish(request, response, timing, self.shows_timing(user))
+
+    def shows_timing(self, user):
+        # Timings reveal how a request was served, so by default nobody sees them.
+        mode = settings.API_SERVER_TIMING
+        return mode == 'all' or (mode == 'staff' and user is not None and user.is_staff)
+
+    def finish(self, request, response, timing, show_timing):
+        total = timing.elapsed()
+        match = request.resolver_match
+        route = match.route if match else 'unmatched'
+        metrics.observe(request.method, route, timing, total)
+
+        if show_timing:
+            app = max(total - timing.sql_seconds - timing.serialize_seconds, 0)
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={timing.sql_seconds * 1000:.1f};desc="{len(timing.queries)} queries"',
+                f'serialize;dur={timing.serialize_seconds * 1000:.1f}',
+                f'app;dur={app * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
+
+        if total * 1000 >= settings.API_SLOW_REQUEST_MS:
+            logger.warning(
+                'Slow request %s %s: %.1fms total, %d queries in %.1fms, %.1fms serializing. Slowest queries:%s',
+                request.method, request.get_full_path(), total * 1000, len(timing.queries),
+                timing.sql_seconds * 1000, timing.serialize_seconds * 1000,
+                ''.join(f'\n  {seconds * 1000:.1f}ms {sql[:200]}' for sql, seconds in timing.slowest_queries()),
+            )
+        return response
+
+
+class NPlusOneMiddleware:
+    """
+    Watch each request for query shapes repeated from the same api call site
+    and log them, or raise with API_NPLUSONE = 'raise'. Off by default
+    outside DEBUG.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if settings.API_NPLUSONE == 'off':
+            return self.get_response(request)
+        token, watcher = nplusone.start_watching()
+        try:
+            response = self.get_response(request)
+        finally:
+            nplusone.stop_watching(token)
+        return self.check(request, response, watcher)
+
+    async def __acall__(self, request):
+        if settings.API_NPLUSONE == 'off':
+            return await self.get_response(request)
+        token, watcher = nplusone.start_watching()
+        try:
+            response = await self.get_response(request)
+        finally:
+            nplusone.stop_watching(token)
+        return self.check(request, response, watcher)
+
+    def check(self, request, response, watcher):
+        if watcher.repeated():
+            message = f'N+1 queries in {request.method} {request.get_full_path()}:\n{watcher.report()}'
+            if settings.API_NPLUSONE == 'raise':
+                raise nplusone.NPlusOneError(message)
+            nplusone.logger.warning(message)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Read from one of the replicas during GET and HEAD requests. Responses
+    that depend on recently changed data are read from the primary instead
+    (see api.cache), so clients read their own writes while the replicas
+    catch up.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if self.use_replicas(request):
+            with routers.use_replicas():
+                return self.get_response(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if self.use_replicas(request):
+            with routers.use_replicas():
+                return await self.get_response(request)
+        return await self.get_response(request)
+
+    def use_replicas(self, request):
+        return request.method in ('GET', 'HEAD') and bool(routers.replicas())
+
+
+class SnapshotWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that also serves the tournament snapshots in api.snapshots.
+    They are written while the server runs, so unlike the files indexed at
+    startup they are looked up on disk per request. Their hashed files are
+    cached forever; the manifests get the usual WHITENOISE_MAX_AGE.
+
+    WhiteNoise's own middleware is sync only. This one also runs natively
+    under ASGI, where only the lookups that touch the disk leave the event
+    loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    HASHED_SNAPSHOT = re.compile(r'\.[0-9a-f]{12}\.json$')
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @property
+    def snapshot_prefix(self):
+        return f'{self.static_prefix}{snapshots.DIRECTORY}/'
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        static_file = self.find_static_file(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        url = request.path_info
+        if self.autorefresh or self.is_snapshot(url):
+            static_file = await sync_to_async(self.find_static_file)(url)
+        else:
+            static_file = self.find_static_file(url)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+    def is_snapshot(self, url):
+        return bool(self.static_root) and url.startswith(self.snapshot_prefix)
+
+    def find_static_file(self, url):
+        if self.is_snapshot(url):
+            return self.find_snapshot(url)
+        if self.autorefresh:
+            return self.find_file(url)
+        return self.files.get(url)
+
+    def find_snapshot(self, url):
+        if not self.url_is_canonical(url):
+            return None
+        root = os.path.join(self.static_root, '')
+        path = os.path.join(root, url[len(self.static_prefix):])
+        if os.path.commonprefix((root, path)) != root:
+            return None
+        try:
+            return self.find_file_at_path(path, url)
+        except MissingFileError:
+            return None
+
+    def immutable_file_test(self, path, url):
+        if url.startswith(self.snapshot_prefix):
+            return bool(self.HASHED_SNAPSHOT.search(url))
+        return super().immutable_file_test(path, url)
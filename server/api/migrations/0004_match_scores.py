@@ -0,0 +1,42 @@
+from django.db import migrations, models
+
+
+def results_to_scores(apps, schema_editor):
+    # The old free-text results only recorded "<team> wins", so carry those
+    # over as a 1 - 0 scoreline and leave anything unparseable without a score.
+    Match = apps.get_model('api', 'Match')
+    db_alias = schema_editor.connection.alias
+    for match in Match.objects.using(db_alias).filter(is_completed=True).exclude(result=None).select_related('team_a', 'team_b'):
+        result = match.result.strip().lower()
+        if result == f'{match.team_a.name} wins'.lower():
+            match.score_a, match.score_b = 1, 0
+        elif result == f'{match.team_b.name} wins'.lower():
+            match.score_a, match.score_b = 0, 1
+        else:
+            continue
+        match.save(using=db_alias, update_fields=['score_a', 'score_b'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_team_passcode_tournament_entry_fee'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='score_a',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='score_b',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(results_to_scores, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='match',
+            name='result',
+        ),
+    ]
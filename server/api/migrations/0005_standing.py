@@ -0,0 +1,60 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_standings(apps, schema_editor):
+    Tournament = apps.get_model('api', 'Tournament')
+    Standing = apps.get_model('api', 'Standing')
+    db_alias = schema_editor.connection.alias
+    for tournament in Tournament.objects.using(db_alias).prefetch_related('teams', 'matches'):
+        rows = {team.id: Standing(tournament=tournament, team=team) for team in tournament.teams.all()}
+        for match in tournament.matches.all():
+            if not match.is_completed or match.score_a is None or match.score_b is None:
+                continue
+            for team_id, scored, conceded in (
+                (match.team_a_id, match.score_a, match.score_b),
+                (match.team_b_id, match.score_b, match.score_a),
+            ):
+                row = rows.get(team_id)
+                if row is None:
+                    continue
+                row.played += 1
+                row.wins += scored > conceded
+                row.draws += scored == conceded
+                row.losses += scored < conceded
+                row.scored += scored
+                row.conceded += conceded
+                row.score_difference += scored - conceded
+                row.points += 3 * (scored > conceded) + (scored == conceded)
+        Standing.objects.using(db_alias).bulk_create(rows.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_match_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Standing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('played', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('draws', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('scored', models.IntegerField(default=0)),
+                ('conceded', models.IntegerField(default=0)),
+                ('score_difference', models.IntegerField(default=0)),
+                ('points', models.IntegerField(default=0)),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='api.team')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='api.tournament')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tournament', '-points', '-score_difference', '-scored'], name='standing_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tournament', 'team'), name='unique_tournament_standing')],
+            },
+        ),
+        migrations.RunPython(build_standings, migrations.RunPython.noop),
+    ]
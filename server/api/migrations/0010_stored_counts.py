@@ -0,0 +1,38 @@
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_links(apps, schema_editor):
+    Team = apps.get_model('api', 'Team')
+    Tournament = apps.get_model('api', 'Tournament')
+    db_alias = schema_editor.connection.alias
+    for model, field, through, key in (
+        (Team, 'member_count', Team.members.through, 'team_id'),
+        (Tournament, 'team_count', Tournament.teams.through, 'tournament_id'),
+    ):
+        links = through.objects.using(db_alias).filter(**{key: OuterRef('pk')}).order_by()
+        model.objects.using(db_alias).update(**{field: Coalesce(
+            Subquery(links.values(key).annotate(count=Count('pk')).values('count')), 0, output_field=IntegerField(),
+        )})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_match_bracket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='team_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_links, migrations.RunPython.noop),
+    ]
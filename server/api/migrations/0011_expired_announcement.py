@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 20:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_stored_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpiredAnnouncement',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('api.announcement',),
+        ),
+    ]
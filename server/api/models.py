@@ -49,39 +49,121 @@ class Team(models.Model):
     name = models.CharField(max_length=50, unique=True)
     passcode = models.CharField(max_length=50, null=True, blank=True)
     members = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name="teams")
+    member_count = models.PositiveIntegerField(default=0)  # maintained by api.counters
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="team_created_idx"),
+            models.Index(fields=["updated_at"], name="team_updated_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
 
 # Announcement
+class AnnouncementQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(
+            models.Q(expires_at__gte=timezone.now()) | models.Q(expires_at__isnull=True)
+        )
+
+
 class Announcement(models.Model):
     title = models.CharField(max_length=100)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     expires_at = models.DateTimeField(null=True, blank=True)
 
+    objects = AnnouncementQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="announcement_recent_idx"),
+            models.Index(fields=["expires_at"], name="announcement_expires_idx"),
+            # Announcements without an expiry are always active.
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(expires_at__isnull=True),
+                name="announcement_permanent_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
 
+class ExpiredAnnouncement(Announcement):
+    # No signal receivers are registered for this proxy, so queryset deletes
+    # through it are single DELETE statements (see prune_announcements).
+    class Meta:
+        proxy = True
+
+
 # Match
 class Match(models.Model):
+    # Later bracket rounds wait for their teams until earlier matches finish.
     team_a = models.ForeignKey(
-        Team, related_name="matches_as_team_a", on_delete=models.CASCADE
+        Team, related_name="matches_as_team_a", on_delete=models.CASCADE, null=True, blank=True
     )
     team_b = models.ForeignKey(
-        Team, related_name="matches_as_team_b", on_delete=models.CASCADE
+        Team, related_name="matches_as_team_b", on_delete=models.CASCADE, null=True, blank=True
     )
     scheduled_time = models.DateTimeField()
     location = models.CharField(max_length=100)
     is_completed = models.BooleanField(default=False)
-    result = models.CharField(max_length=50, null=True, blank=True)
+    score_a = models.PositiveIntegerField(null=True, blank=True)
+    score_b = models.PositiveIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Knockout brackets: match ``slot`` of a round feeds slot ``slot // 2`` of
+    # the next round, as team_a from even slots and team_b from odd ones.
+    round = models.PositiveSmallIntegerField(null=True, blank=True)
+    slot = models.PositiveSmallIntegerField(null=True, blank=True)
+    next_match = models.ForeignKey(
+        "self", related_name="previous_matches", on_delete=models.SET_NULL, null=True, blank=True
+    )
+    winner = models.ForeignKey(
+        Team, related_name="matches_won", on_delete=models.SET_NULL, null=True, blank=True
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["is_completed", "team_a"], name="match_completed_team_a_idx"),
+            models.Index(fields=["is_completed", "team_b"], name="match_completed_team_b_idx"),
+            models.Index(fields=["scheduled_time"], name="match_scheduled_idx"),
+            models.Index(fields=["updated_at"], name="match_updated_idx"),
+        ]
 
     def __str__(self):
         return f"{self.team_a} vs {self.team_b} at {self.scheduled_time}"
 
+    @property
+    def has_result(self):
+        return (
+            self.is_completed and self.team_a_id is not None and self.team_b_id is not None
+            and self.score_a is not None and self.score_b is not None
+        )
+
+    def decided_winner_id(self):
+        """The winning team's id, or None until the match ends without a draw."""
+        if not self.has_result or self.score_a == self.score_b:
+            return None
+        return self.team_a_id if self.score_a > self.score_b else self.team_b_id
+
+    @property
+    def next_match_side(self):
+        return "team_a" if self.slot % 2 == 0 else "team_b"
+
+    @property
+    def result(self):
+        if not self.has_result:
+            return None
+        return f"{self.score_a} - {self.score_b}"
+
 
 # Tournament
 class Tournament(models.Model):
@@ -89,10 +171,51 @@ class Tournament(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
     entry_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    max_teams = models.PositiveIntegerField(null=True, blank=True)  # no limit when null
     teams = models.ManyToManyField(Team, related_name="tournaments")
+    team_count = models.PositiveIntegerField(default=0)  # maintained by api.counters
     matches = models.ManyToManyField(Match, related_name="tournaments", blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     # Standings system
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-start_date", "-id"], name="tournament_start_idx"),
+            models.Index(fields=["updated_at"], name="tournament_updated_idx"),
+        ]
+
     def __str__(self):
         return self.title
+
+
+# Standing
+class Standing(models.Model):
+    tournament = models.ForeignKey(
+        Tournament, related_name="standings", on_delete=models.CASCADE
+    )
+    team = models.ForeignKey(Team, related_name="standings", on_delete=models.CASCADE)
+    played = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    draws = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    scored = models.IntegerField(default=0)
+    conceded = models.IntegerField(default=0)
+    score_difference = models.IntegerField(default=0)
+    points = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tournament", "team"], name="unique_tournament_standing"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["tournament", "-points", "-score_difference", "-scored"],
+                name="standing_rank_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.team} in {self.tournament}: {self.points} pts"
@@ -0,0 +1,133 @@
+"""
+N+1 query detection for the api app.
+
+While a QueryWatcher is active, every query issued from api code is grouped
+by its normalized SQL and the innermost api call site. A group that repeats
+more than API_NPLUSONE_THRESHOLD times is reported: NPlusOneMiddleware logs
+it or, with API_NPLUSONE = 'raise' (as in the tests), raises NPlusOneError.
+detect_n_plus_one() watches code outside requests, and allow_n_plus_one
+exempts functions whose repeated queries are intentional.
+"""
+import contextvars
+import logging
+import re
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from inspect import iscoroutinefunction
+from pathlib import Path
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger('api.nplusone')
+
+API_DIR = str(Path(__file__).resolve().parent)
+# Frames in these modules are plumbing, never the call site to blame.
+IGNORED_FILES = {str(Path(API_DIR, name)) for name in ('nplusone.py', 'metrics.py', 'middleware.py')}
+
+_watcher = contextvars.ContextVar('api_nplusone_watcher', default=None)
+_allowed = contextvars.ContextVar('api_nplusone_allowed', default=False)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\bIN \((?:[^()]*)\)', re.IGNORECASE)
+
+
+class NPlusOneError(AssertionError):
+    pass
+
+
+def normalize(sql):
+    """Reduce a query to its shape: literals and IN lists of any length collapse."""
+    sql = _IN_LISTS.sub('IN (...)', sql)
+    return ' '.join(_LITERALS.sub('?', sql).split())
+
+
+def call_site():
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(API_DIR) and filename not in IGNORED_FILES:
+            return f'{Path(filename).relative_to(Path(API_DIR).parent)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+class QueryWatcher:
+    def __init__(self, threshold=None):
+        self.threshold = settings.API_NPLUSONE_THRESHOLD if threshold is None else threshold
+        self.counts = Counter()
+
+    def record(self, sql):
+        site = call_site()
+        if site is not None:
+            self.counts[normalize(sql), site] += 1
+
+    def repeated(self):
+        """(count, sql, call site) for each query shape over the threshold."""
+        return [
+            (count, sql, site) for (sql, site), count in self.counts.most_common() if count > self.threshold
+        ]
+
+    def report(self):
+        return '\n'.join(
+            f'{count} x {sql[:200]} at {site}' for count, sql, site in self.repeated()
+        )
+
+
+def watch_query(execute, sql, params, many, context):
+    watcher = _watcher.get()
+    if watcher is not None and not _allowed.get():
+        watcher.record(sql)
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_watcher(sender, connection, **kwargs):
+    if watch_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(watch_query)
+
+
+def start_watching(threshold=None):
+    watcher = QueryWatcher(threshold)
+    return _watcher.set(watcher), watcher
+
+
+def stop_watching(token):
+    _watcher.reset(token)
+
+
+@contextmanager
+def detect_n_plus_one(threshold=None):
+    """Raise NPlusOneError if the block repeats a query shape too often."""
+    token, watcher = start_watching(threshold)
+    try:
+        yield watcher
+    finally:
+        stop_watching(token)
+    if watcher.repeated():
+        raise NPlusOneError(f'Repeated queries:\n{watcher.report()}')
+
+
+def allow_n_plus_one(function):
+    """Exempt a function's queries from detection, for intentional per-row queries."""
+    if iscoroutinefunction(function):
+        @wraps(function)
+        async def async_wrapper(*args, **kwargs):
+            token = _allowed.set(True)
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                _allowed.reset(token)
+        return async_wrapper
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        token = _allowed.set(True)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _allowed.reset(token)
+    return wrapper
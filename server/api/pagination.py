@@ -0,0 +1,108 @@
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def page_size(request):
+    default = getattr(settings, 'API_PAGE_SIZE', 50)
+    maximum = getattr(settings, 'API_MAX_PAGE_SIZE', 500)
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        raise PaginationError('limit must be an integer')
+    if limit < 1:
+        raise PaginationError('limit must be positive')
+    return min(limit, maximum)
+
+
+def select_fields(request, allowed):
+    """The ``fields=`` columns the client asked for, in ``allowed`` order."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(allowed)
+    requested = {field.strip() for field in raw.split(',') if field.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise PaginationError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [field for field in allowed if field in requested]
+
+
+def _encode_cursor(values):
+    raw = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor, model, ordering):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != len(ordering):
+            raise ValueError
+        return [
+            model._meta.get_field(name.lstrip('-')).to_python(value)
+            for name, value in zip(ordering, values)
+        ]
+    except Exception:
+        raise PaginationError('Invalid cursor')
+
+
+def _after(ordering, values):
+    # Rows strictly after the cursor in ``ordering``: (a, b) > (x, y) is
+    # a > x OR (a = x AND b > y), with the comparison flipped for "-" fields.
+    condition = Q()
+    for position, name in enumerate(ordering):
+        field = name.lstrip('-')
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        step = Q(**{f'{field}__{lookup}': values[position]})
+        for previous, value in zip(ordering[:position], values):
+            step &= Q(**{previous.lstrip('-'): value})
+        condition |= step
+    return condition
+
+
+def _page_queryset(request, queryset, ordering):
+    limit = page_size(request)
+    queryset = queryset.order_by(*ordering)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        queryset = queryset.filter(_after(ordering, _decode_cursor(cursor, queryset.model, ordering)))
+    return queryset[:limit + 1], limit
+
+
+def _page(rows, limit, ordering):
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    get = last.get if isinstance(last, dict) else lambda name: getattr(last, name)
+    return rows, _encode_cursor([get(name.lstrip('-')) for name in ordering])
+
+
+def paginate(request, queryset, ordering):
+    """
+    Keyset-paginate ``queryset`` (model instances or ``.values()`` rows) on
+    ``ordering``, which must end in a unique field. Returns the page and the
+    cursor for the next one, or None on the last page.
+    """
+    page, limit = _page_queryset(request, queryset, ordering)
+    return _page(list(page), limit, ordering)
+
+
+async def apaginate(request, queryset, ordering):
+    page, limit = _page_queryset(request, queryset, ordering)
+    return _page([row async for row in page], limit, ordering)
+
+
+def add_next_link(request, response, next_cursor):
+    if next_cursor:
+        query = request.GET.copy()
+        query['cursor'] = next_cursor
+        url = request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+        response['Link'] = f'<{url}>; rel="next"'
+    return response
@@ -0,0 +1,19 @@
+from django.http import HttpResponse
+
+from api.metrics import timed_serialization
+from api.serializers import dumps
+
+
+class JsonResponse(HttpResponse):
+    """
+    JSON response encoded with api.serializers.dumps, reporting its encoding
+    time to the request metrics. Like django.http.JsonResponse, only dicts
+    are accepted unless safe=False.
+    """
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError('In order to allow non-dict objects to be serialized set the safe parameter to False.')
+        kwargs.setdefault('content_type', 'application/json')
+        with timed_serialization():
+            content = dumps(data)
+        super().__init__(content=content, **kwargs)
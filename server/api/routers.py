@@ -0,0 +1,55 @@
+"""
+Read-replica routing.
+
+Writes always go to the primary ("default"). Reads go to the primary too,
+except inside use_replicas(), which ReplicaRoutingMiddleware applies to GET
+and HEAD requests; those read from one alias in DATABASE_REPLICAS, picked
+at random per request. api.cache sends reads of recently changed scopes
+back to the primary with use_primary().
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+
+PRIMARY = 'default'
+
+_replica = contextvars.ContextVar('api_replica', default=None)
+
+
+def replicas():
+    return settings.DATABASE_REPLICAS
+
+
+def reading_from_replicas():
+    return _replica.get() is not None
+
+
+@contextmanager
+def _read_from(alias):
+    token = _replica.set(alias)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def use_replicas():
+    return _read_from(random.choice(replicas()) if replicas() else None)
+
+
+def use_primary():
+    return _read_from(None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _replica.get() or PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
@@ -0,0 +1,203 @@
+"""
+Fixture generation for whole tournaments.
+
+round_robin() pairs every team with every other (circle method);
+knockout_bracket() seeds a single-elimination bracket, giving the top seeds
+byes when the field is not a power of two, with every later round's matches
+waiting for their teams. assign_slots() lays the rounds out over the venues
+and time window: a round starts after the previous one ends, no team plays
+twice in one slot, no venue hosts two matches at once, and slots already
+taken by existing matches of the same teams or venues are skipped.
+schedule_tournament() writes the result with bulk_create (one per bracket
+round, so each can point at the next) and one bulk insert of the tournament
+links.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+
+from api import cache
+from api.models import Match, Tournament
+from api.signals import tournaments_changed
+
+BATCH_SIZE = 2000
+
+ROUND_ROBIN = 'round_robin'
+SINGLE_ELIMINATION = 'single_elimination'
+FORMATS = (ROUND_ROBIN, SINGLE_ELIMINATION)
+
+Fixture = namedtuple('Fixture', 'team_a team_b slot venue round position')
+
+
+class SchedulingError(Exception):
+    pass
+
+
+def round_robin(team_ids):
+    """Rounds of (team_a, team_b) pairs in which every team meets every other once."""
+    teams = list(team_ids)
+    if len(teams) % 2:
+        teams.append(None)  # bye
+    count = len(teams)
+    rounds = []
+    for number in range(count - 1):
+        pairs = []
+        for index in range(count // 2):
+            a, b = teams[index], teams[count - 1 - index]
+            if a is None or b is None:
+                continue
+            # The fixed team alternates sides; the others already do as they rotate.
+            pairs.append((b, a) if index == 0 and number % 2 else (a, b))
+        rounds.append(pairs)
+        teams = [teams[0], teams[-1], *teams[1:-1]]
+    return rounds
+
+
+def seeding(size):
+    """Bracket positions of seeds 1..size (a power of two), top seeds kept apart: 1, 8, 4, 5, 2, 7, 3, 6."""
+    order = [1]
+    while len(order) < size:
+        total = len(order) * 2 + 1
+        order = [seed for top in order for seed in (top, total - top)]
+    return order
+
+
+def bracket_size(team_count):
+    size = 1
+    while size < team_count:
+        size *= 2
+    return size
+
+
+def knockout_bracket(team_ids):
+    """
+    Rounds of (team_a, team_b) pairs for a single-elimination bracket seeded
+    in ``team_ids`` order. Pair ``position`` of a round feeds pair
+    ``position // 2`` of the next. Opening pairs that would be byes are None,
+    and their team starts in the second round; later teams are None until
+    decided.
+    """
+    teams = list(team_ids)
+    order = seeding(bracket_size(len(teams)))
+    entrants = [teams[seed - 1] if seed <= len(teams) else None for seed in order]
+    opening = [(entrants[index], entrants[index + 1]) for index in range(0, len(entrants), 2)]
+    rounds = [[None if b is None else (a, b) for a, b in opening]]
+    advancing = [a if b is None else None for a, b in opening]
+    while len(advancing) > 1:
+        rounds.append([(advancing[index], advancing[index + 1]) for index in range(0, len(advancing), 2)])
+        advancing = [None] * len(rounds[-1])
+    return rounds
+
+
+def _overlapping_slots(start, duration, when):
+    """Slot indexes that a match starting at ``when`` overlaps."""
+    offset = (when - start) / duration
+    first = int(offset // 1)
+    return (first,) if offset == first else (first, first + 1)
+
+
+def busy_slots(team_ids, venues, start, end, duration):
+    """(team, slot) and (venue, slot) pairs taken by matches already scheduled in the window."""
+    existing = Match.objects.filter(
+        Q(team_a__in=team_ids) | Q(team_b__in=team_ids) | Q(location__in=venues),
+        scheduled_time__gt=start - duration, scheduled_time__lt=end,
+    ).values_list('team_a_id', 'team_b_id', 'location', 'scheduled_time')
+    teams, places = set(), set()
+    for team_a, team_b, location, when in existing.iterator():
+        for slot in _overlapping_slots(start, duration, when):
+            # Later bracket rounds have no teams yet.
+            teams.update((team, slot) for team in (team_a, team_b) if team is not None)
+            places.add((location, slot))
+    return teams, places
+
+
+def assign_slots(rounds, venues, slot_count, busy_teams=frozenset(), busy_venues=frozenset()):
+    """Place each round's pairs into (slot, venue); raises SchedulingError if they do not fit."""
+    fixtures = []
+    slot = 0
+    for round_number, pairs in enumerate(rounds, 1):
+        pending = [(position, pair) for position, pair in enumerate(pairs) if pair is not None]
+        while pending:
+            if slot >= slot_count:
+                raise SchedulingError(
+                    'The time window is too short for these fixtures; add venues or extend it'
+                )
+            free = iter([venue for venue in venues if (venue, slot) not in busy_venues])
+            waiting = []
+            for position, (a, b) in pending:
+                venue = None if (a, slot) in busy_teams or (b, slot) in busy_teams else next(free, None)
+                if venue is None:
+                    waiting.append((position, (a, b)))
+                else:
+                    fixtures.append(Fixture(a, b, slot, venue, round_number, position))
+            pending = waiting
+            slot += 1
+    return fixtures
+
+
+def schedule_tournament(tournament_id, fixture_format, venues, start, end, match_minutes):
+    """
+    Generate and save the fixtures for a tournament's teams, in the order
+    they joined. Returns the new matches. Raises Tournament.DoesNotExist
+    and SchedulingError.
+    """
+    if fixture_format not in FORMATS:
+        raise SchedulingError(f'Format must be one of: {", ".join(FORMATS)}')
+    venues = list(dict.fromkeys(venues))
+    if not venues:
+        raise SchedulingError('At least one venue is required')
+    if match_minutes <= 0:
+        raise SchedulingError('Match length must be positive')
+    duration = timedelta(minutes=match_minutes)
+    slot_count = int((end - start) / duration)
+    if slot_count < 1:
+        raise SchedulingError('The time window must fit at least one match')
+
+    through = Tournament.teams.through
+    with transaction.atomic():
+        # Locked so two requests cannot schedule the same tournament at once.
+        tournament = Tournament.objects.select_for_update().only('id').get(id=tournament_id)
+        team_ids = list(
+            through.objects.filter(tournament_id=tournament.id).order_by('id').values_list('team_id', flat=True)
+        )
+        if len(team_ids) < 2:
+            raise SchedulingError('At least two teams must have joined')
+
+        if fixture_format == ROUND_ROBIN:
+            rounds = round_robin(team_ids)
+        else:
+            rounds = knockout_bracket(team_ids)
+        fixtures = assign_slots(rounds, venues, slot_count, *busy_slots(team_ids, venues, start, end, duration))
+
+        def build(fixture, **bracket):
+            return Match(
+                team_a_id=fixture.team_a, team_b_id=fixture.team_b, location=fixture.venue,
+                scheduled_time=start + fixture.slot * duration, **bracket,
+            )
+
+        if fixture_format == ROUND_ROBIN:
+            matches = Match.objects.bulk_create([build(fixture) for fixture in fixtures], batch_size=BATCH_SIZE)
+        else:
+            # From the final back, so every match can point at the next one.
+            matches, created = [], {}
+            for round_number in range(len(rounds), 0, -1):
+                batch = [
+                    build(
+                        fixture, round=round_number, slot=fixture.position,
+                        next_match=created.get((round_number + 1, fixture.position // 2)),
+                    )
+                    for fixture in fixtures if fixture.round == round_number
+                ]
+                Match.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+                created.update(((round_number, created_match.slot), created_match) for created_match in batch)
+                matches.extend(batch)
+        Tournament.matches.through.objects.bulk_create(
+            [Tournament.matches.through(tournament_id=tournament.id, match_id=match.id) for match in matches],
+            batch_size=BATCH_SIZE,
+        )
+        # Bulk inserts send no signals. Unplayed matches leave the standings
+        # alone, so only the tournament's own pages change.
+        tournaments_changed([tournament.id], cache.TOURNAMENTS)
+    return matches
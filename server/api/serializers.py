@@ -0,0 +1,157 @@
+"""
+Response schemas and the shared JSON encoder.
+
+A Schema lists the fields a model contributes to API responses and reads
+them from model instances (``dump``/``dump_many``) or from ``.values()``
+rows (``dump_rows``). Values stay as they come from the database: dumps()
+renders dates and datetimes as ISO 8601 and Decimals as numbers, using
+orjson when it is installed and an equivalent stdlib encoder otherwise, so
+every view produces the same bytes for the same data.
+"""
+import datetime
+import json
+from decimal import Decimal
+from operator import attrgetter, itemgetter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def stdlib_dumps(data):
+    return json.dumps(
+        data, default=_default, ensure_ascii=False, separators=(',', ':'), allow_nan=False,
+    ).encode()
+
+
+def orjson_dumps(data):
+    return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+dumps = orjson_dumps if orjson is not None else stdlib_dumps
+
+
+def _path(path):
+    """attrgetter for a dotted path that stops at a None along the way."""
+    names = path.split('.')
+    if len(names) == 1:
+        return attrgetter(path)
+
+    def get(obj):
+        for name in names:
+            if obj is None:
+                return None
+            obj = getattr(obj, name)
+        return obj
+    return get
+
+
+class Nested:
+    """A related object, or with many=True a related manager or list, dumped with ``schema``."""
+    def __init__(self, schema, source=None, many=False):
+        self.schema = schema
+        self.source = source
+        self.many = many
+
+
+class Schema:
+    def __init__(self, *names, **fields):
+        # Each field is read from the attribute of the same name (None), a
+        # dotted attribute path, a callable taking the object, or Nested.
+        self.fields = {**dict.fromkeys(names), **fields}
+        self._getters = {name: self._getter(name, spec) for name, spec in self.fields.items()}
+        self._items = tuple(self._getters.items())
+
+    @property
+    def names(self):
+        return tuple(self.fields)
+
+    def replace(self, **fields):
+        return Schema(**{**self.fields, **fields})
+
+    def _getter(self, name, spec):
+        if spec is None:
+            return attrgetter(name)
+        if isinstance(spec, str):
+            return _path(spec)
+        if isinstance(spec, Nested):
+            source = attrgetter(spec.source or name)
+            if spec.many:
+                return lambda obj: spec.schema.dump_many(source(obj).all())
+            return lambda obj: None if (value := source(obj)) is None else spec.schema.dump(value)
+        return spec
+
+    def _selected(self, fields):
+        return self._items if fields is None else [(name, self._getters[name]) for name in fields]
+
+    def dump(self, obj, fields=None):
+        return {name: get(obj) for name, get in self._selected(fields)}
+
+    def dump_many(self, objs, fields=None):
+        getters = self._selected(fields)
+        return [{name: get(obj) for name, get in getters} for obj in objs]
+
+    def dump_rows(self, rows, fields=None):
+        """``.values()`` rows, which already hold each field under its name."""
+        names = fields or self.names
+        return [{name: row[name] for name in names} for row in rows]
+
+
+PLAYER = Schema('id', 'username')
+MEMBER = Schema('username')
+
+ANNOUNCEMENT = Schema('id', 'title', 'content', 'created_at', 'expires_at')
+
+TEAM = Schema('id', 'name', 'member_count', 'created_at')
+TEAM_REF = Schema('id', 'name')
+DETAIL_TEAM = Schema('id', 'name', members=Nested(MEMBER, many=True))
+
+MATCH = Schema(
+    'id', 'team_a', 'team_b', 'scheduled_time', 'location', 'is_completed', 'score_a', 'score_b', 'result',
+    team_a=Nested(TEAM_REF), team_b=Nested(TEAM_REF),
+)
+# The tournament detail names the teams instead of nesting them.
+DETAIL_MATCH = MATCH.replace(team_a='team_a.name', team_b='team_b.name')
+
+TOURNAMENT = Schema(
+    'id', 'title', 'start_date', 'end_date', 'entry_fee', 'max_teams', 'teams', 'team_count',
+    teams=Nested(TEAM_REF, many=True),
+)
+TOURNAMENT_DETAIL = Schema('id', 'title', 'start_date', 'end_date')
+
+
+def _row_team(side):
+    def get(row):
+        team_id = row[f'{side}_id']
+        return None if team_id is None else {'id': team_id, 'name': row[f'{side}__name']}
+    return get
+
+
+# Bracket matches come from .values() rows (BRACKET_MATCH_VALUES) so that the
+# whole bracket is one query; the round is implied by the list they are in.
+BRACKET_MATCH_VALUES = (
+    'id', 'round', 'slot', 'team_a_id', 'team_a__name', 'team_b_id', 'team_b__name',
+    'score_a', 'score_b', 'is_completed', 'winner_id', 'scheduled_time', 'location',
+)
+BRACKET_MATCH = Schema(
+    id=itemgetter('id'), slot=itemgetter('slot'), team_a=_row_team('team_a'), team_b=_row_team('team_b'),
+    score_a=itemgetter('score_a'), score_b=itemgetter('score_b'), is_completed=itemgetter('is_completed'),
+    winner_id=itemgetter('winner_id'), scheduled_time=itemgetter('scheduled_time'), location=itemgetter('location'),
+)
+
+
+def bracket_payload(rows):
+    """Rounds of bracket matches from rows ordered by round and slot."""
+    rounds = {}
+    for row in rows:
+        rounds.setdefault(row['round'], []).append(row)
+    return {'rounds': [BRACKET_MATCH.dump_many(matches) for _, matches in sorted(rounds.items())]}
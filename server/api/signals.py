@@ -0,0 +1,282 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from api import cache, counters
+from api.events import ANNOUNCEMENTS_CHANNEL, broker, tournament_channel
+from api.models import Announcement, Match, Player, Standing, Team, Tournament
+from api.standings import add_standings, apply_result, rebuild_standings, remove_standings, result_state
+
+# Marks a Match loaded with deferred result fields, whose previous result is unknown.
+UNKNOWN_RESULT = object()
+RESULT_FIELDS = {'team_a_id', 'team_b_id', 'is_completed', 'score_a', 'score_b'}
+LIVE_FIELDS = ('is_completed', 'score_a', 'score_b')
+
+
+# Standings
+@receiver(post_init, sender=Match)
+def remember_match_result(sender, instance, **kwargs):
+    if RESULT_FIELDS & instance.get_deferred_fields():
+        instance._standing_state = UNKNOWN_RESULT
+        instance._live_state = UNKNOWN_RESULT
+    else:
+        instance._standing_state = result_state(instance)
+        instance._live_state = live_state(instance)
+    instance._winner_state = UNKNOWN_RESULT if 'winner' in instance.get_deferred_fields() else instance.winner_id
+
+
+def stored_result(match):
+    if match._standing_state is UNKNOWN_RESULT:
+        match._standing_state = result_state(Match.objects.get(pk=match.pk))
+    return match._standing_state
+
+
+@receiver(post_save, sender=Match)
+def update_standings_for_match(sender, instance, created, raw, **kwargs):
+    previous, current = instance._standing_state, result_state(instance)
+    instance._standing_state = current
+    if raw or created or previous == current:
+        return
+
+    tournament_ids = list(instance.tournaments.values_list('id', flat=True))
+    if previous is UNKNOWN_RESULT:
+        for tournament_id in tournament_ids:
+            rebuild_standings(tournament_id)
+        return
+    apply_result(previous, tournament_ids, sign=-1)
+    apply_result(current, tournament_ids)
+
+
+@receiver(pre_delete, sender=Match)
+def remove_match_from_standings(sender, instance, **kwargs):
+    tournament_ids = list(instance.tournaments.values_list('id', flat=True))
+    apply_result(stored_result(instance), tournament_ids, sign=-1)
+
+
+@receiver(m2m_changed, sender=Tournament.matches.through)
+def update_standings_for_tournament_matches(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'pre_remove', 'pre_clear'):
+        return
+    sign = 1 if action == 'post_add' else -1
+
+    if reverse:
+        tournaments = instance.tournaments.all()
+        if action == 'pre_remove':
+            tournaments = tournaments.filter(pk__in=pk_set)
+        tournament_ids = pk_set if action == 'post_add' else tournaments.values_list('id', flat=True)
+        apply_result(stored_result(instance), list(tournament_ids), sign=sign)
+        return
+
+    matches = Match.objects.filter(pk__in=pk_set) if action == 'post_add' else instance.matches.all()
+    if action == 'pre_remove':
+        matches = matches.filter(pk__in=pk_set)
+    for match in matches.filter(is_completed=True, score_a__isnull=False, score_b__isnull=False):
+        apply_result(result_state(match), [instance.pk], sign=sign)
+
+
+@receiver(m2m_changed, sender=Tournament.teams.through)
+def update_standings_for_tournament_teams(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'post_add':
+        if reverse:
+            for tournament_id in pk_set:
+                add_standings(tournament_id, [instance.pk])
+        else:
+            add_standings(instance.pk, pk_set)
+    elif action in ('post_remove', 'post_clear'):
+        if reverse:
+            standings = Standing.objects.filter(team=instance)
+            if action == 'post_remove':
+                standings = standings.filter(tournament_id__in=pk_set)
+            standings.delete()
+        else:
+            remove_standings(instance.pk, pk_set if action == 'post_remove' else None)
+
+
+# Brackets
+@receiver(pre_save, sender=Match)
+def decide_winner(sender, instance, raw, **kwargs):
+    if not raw:
+        instance.winner_id = instance.decided_winner_id()
+
+
+@receiver(post_save, sender=Match)
+def advance_winner(sender, instance, created, raw, **kwargs):
+    previous, current = instance._winner_state, instance.winner_id
+    instance._winner_state = current
+    if raw or previous == current or instance.next_match_id is None:
+        return
+    # A single write: the winner, or nobody if the result was undone, takes
+    # this match's side of the next one.
+    Match.objects.filter(pk=instance.next_match_id).update(
+        **{instance.next_match_side: current, 'updated_at': timezone.now()}
+    )
+
+
+# Stored counts
+@receiver(m2m_changed, sender=Team.members.through)
+def count_team_members(sender, instance, action, reverse, pk_set, **kwargs):
+    counters.links_changed(counters.MEMBER_COUNT, instance, action, reverse, pk_set)
+
+
+@receiver(m2m_changed, sender=Tournament.teams.through)
+def count_tournament_teams(sender, instance, action, reverse, pk_set, **kwargs):
+    counters.links_changed(counters.TEAM_COUNT, instance, action, reverse, pk_set)
+
+
+# Deleting a player or team cascades to its links without m2m_changed.
+@receiver(pre_delete, sender=Player)
+def uncount_deleted_player(sender, instance, **kwargs):
+    counters.links_changed(counters.MEMBER_COUNT, instance, 'pre_clear', True, None)
+
+
+@receiver(pre_delete, sender=Team)
+def uncount_deleted_team(sender, instance, **kwargs):
+    counters.links_changed(counters.TEAM_COUNT, instance, 'pre_clear', True, None)
+
+
+# Cache invalidation and modification stamps
+
+# Sent with ``tournament_ids`` whenever something published under those
+# tournaments changes (see api.snapshots).
+tournaments_updated = Signal()
+
+
+def tournament_scopes(tournament_ids):
+    return [cache.tournament_scope(tournament_id) for tournament_id in tournament_ids]
+
+
+def tournaments_changed(tournament_ids, *scopes):
+    # A tournament's updated_at doubles as the version stamp for everything
+    # published under it, so changes to its teams and matches touch it too.
+    tournament_ids = list(tournament_ids)
+    if tournament_ids:
+        Tournament.objects.filter(pk__in=tournament_ids).update(updated_at=timezone.now())
+    cache.invalidate(*scopes, *tournament_scopes(tournament_ids))
+    if tournament_ids:
+        tournaments_updated.send(sender=Tournament, tournament_ids=tournament_ids)
+
+
+@receiver([post_save, post_delete], sender=Announcement)
+def announcement_changed(sender, **kwargs):
+    cache.invalidate(cache.ANNOUNCEMENTS)
+
+
+@receiver([post_save, post_delete], sender=Tournament)
+def tournament_changed(sender, instance, **kwargs):
+    cache.invalidate(cache.TOURNAMENTS, cache.tournament_scope(instance.pk))
+    tournaments_updated.send(sender=Tournament, tournament_ids=[instance.pk])
+
+
+@receiver([post_save, pre_delete], sender=Team)
+def team_changed(sender, instance, created=False, **kwargs):
+    tournament_ids = [] if created else instance.tournaments.values_list('id', flat=True)
+    tournaments_changed(tournament_ids, cache.TEAMS, cache.TOURNAMENTS, cache.STANDINGS)
+
+
+@receiver([post_save, pre_delete], sender=Match)
+def match_changed(sender, instance, created=False, **kwargs):
+    tournament_ids = [] if created else instance.tournaments.values_list('id', flat=True)
+    tournaments_changed(tournament_ids, cache.STANDINGS)
+
+
+@receiver([post_save, pre_delete], sender=Player)
+def player_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    # Usernames are listed under each team in the tournament detail, and
+    # deleting a player changes its teams' member counts.
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    teams = Team.objects.filter(members=instance)
+    teams.update(updated_at=timezone.now())
+    tournament_ids = Tournament.objects.filter(teams__in=teams).values_list('id', flat=True)
+    tournaments_changed(tournament_ids.distinct(), cache.TEAMS)
+
+
+@receiver(m2m_changed, sender=Tournament.teams.through)
+@receiver(m2m_changed, sender=Tournament.matches.through)
+def tournament_relations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        tournament_ids = [instance.pk]
+    elif action == 'pre_clear':
+        tournament_ids = instance.tournaments.values_list('id', flat=True)
+    else:
+        tournament_ids = pk_set
+    tournaments_changed(tournament_ids, cache.TOURNAMENTS, cache.STANDINGS)
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+def team_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        team_ids = [instance.pk]
+    elif action == 'pre_clear':
+        team_ids = list(instance.teams.values_list('id', flat=True))
+    else:
+        team_ids = pk_set
+    Team.objects.filter(pk__in=team_ids).update(updated_at=timezone.now())
+    tournament_ids = Tournament.objects.filter(teams__in=team_ids).values_list('id', flat=True)
+    tournaments_changed(tournament_ids.distinct(), cache.TEAMS)
+
+
+# Live events
+def live_state(match):
+    return tuple(getattr(match, field) for field in LIVE_FIELDS)
+
+
+def publish(channels, event_type, data):
+    # Subscribers must never see writes that end up rolled back.
+    channels = list(channels)
+    if channels:
+        transaction.on_commit(lambda: [broker.publish(channel, event_type, data) for channel in channels])
+
+
+@receiver(post_save, sender=Match)
+def publish_match_result(sender, instance, created, raw, **kwargs):
+    previous, current = getattr(instance, '_live_state', UNKNOWN_RESULT), live_state(instance)
+    instance._live_state = current
+    if raw or created or previous == current:
+        return
+
+    was_completed = previous is not UNKNOWN_RESULT and previous[0]
+    if instance.is_completed and not was_completed:
+        event_type = 'match-completed'
+    elif previous is UNKNOWN_RESULT or previous[1:] != current[1:]:
+        event_type = 'score-updated'
+    else:
+        return
+    tournament_ids = instance.tournaments.values_list('id', flat=True)
+    publish(map(tournament_channel, tournament_ids), event_type, {
+        'match_id': instance.pk,
+        'team_a_id': instance.team_a_id,
+        'team_b_id': instance.team_b_id,
+        'score_a': instance.score_a,
+        'score_b': instance.score_b,
+        'is_completed': instance.is_completed,
+    })
+
+
+@receiver(m2m_changed, sender=Tournament.teams.through)
+def publish_team_joined(sender, instance, action, reverse, pk_set, **kwargs):
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        for tournament_id in pk_set:
+            publish([tournament_channel(tournament_id)], 'team-joined', {'team_id': instance.pk, 'team_name': instance.name})
+    else:
+        for team_id, name in Team.objects.filter(pk__in=pk_set).values_list('id', 'name'):
+            publish([tournament_channel(instance.pk)], 'team-joined', {'team_id': team_id, 'team_name': name})
+
+
+@receiver(post_save, sender=Announcement)
+def publish_announcement(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        publish([ANNOUNCEMENTS_CHANNEL], 'announcement-created', {
+            'id': instance.pk,
+            'title': instance.title,
+            'content': instance.content,
+            'created_at': instance.created_at.isoformat(),
+            'expires_at': instance.expires_at and instance.expires_at.isoformat(),
+        })
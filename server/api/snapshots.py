@@ -0,0 +1,171 @@
+"""
+Static snapshots of each tournament's public pages.
+
+export() renders the tournament detail, fixtures and standings through
+their views, exactly as an anonymous GET would, and writes each payload to
+STATIC_ROOT/snapshots/tournaments/<id>/ under a content-hashed name with
+gzip and (when the brotli package is installed) brotli variants next to
+it. api.middleware.SnapshotWhiteNoiseMiddleware serves the hashed files
+with far-future caching. A manifest.json in the same directory, revalidated
+like any unhashed static file, maps each page to its current file:
+
+    {"detail": "/static/snapshots/tournaments/1/detail.3f2a9c1b7d4e.json", ...}
+
+With API_SNAPSHOTS on, every change published under a tournament schedules
+it for export once the transaction commits. Exports run on a background
+thread API_SNAPSHOT_DELAY seconds later, so requests never wait for them and
+a burst of changes to one tournament exports it once.
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.dispatch import receiver
+from django.test import RequestFactory
+
+from api.signals import tournaments_updated
+from api.views import FixturesView, StandingsView, TournamentDetailView
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DIRECTORY = 'snapshots'
+MANIFEST = 'manifest.json'
+
+PAGES = {
+    'detail': TournamentDetailView.as_view(),
+    'fixtures': FixturesView.as_view(),
+    'standings': StandingsView.as_view(),
+}
+
+
+def tournaments_directory():
+    return Path(settings.STATIC_ROOT, DIRECTORY, 'tournaments')
+
+
+def tournament_directory(tournament_id):
+    return tournaments_directory() / str(tournament_id)
+
+
+def tournament_url(tournament_id, name):
+    return f'{settings.STATIC_URL}{DIRECTORY}/tournaments/{tournament_id}/{name}'
+
+
+def _write(path, content):
+    # Readers must never see a partly written file.
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix='.', delete=False) as tmp:
+        tmp.write(content)
+    os.chmod(tmp.name, 0o644)
+    os.replace(tmp.name, path)
+
+
+def _variants(content):
+    # The plain file goes last: once it exists, so do its variants.
+    yield '.gz', gzip.compress(content, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield '.br', brotli.compress(content)
+    yield '', content
+
+
+def render(tournament_id):
+    """Each page's response body, or None if the tournament does not exist."""
+    pages = {}
+    for page, view in PAGES.items():
+        response = view(RequestFactory().get(f'/{page}/'), tournament_id=tournament_id)
+        if response.status_code != 200:
+            return None
+        pages[page] = response.content
+    return pages
+
+
+def _manifest_names(directory):
+    try:
+        manifest = json.loads((directory / MANIFEST).read_bytes())
+    except (FileNotFoundError, ValueError):
+        return set()
+    return {url.rsplit('/', 1)[1] for url in manifest.values()}
+
+
+def export(tournament_id):
+    """
+    Write a tournament's snapshot and return its manifest, or remove the
+    snapshot and return None if the tournament no longer exists.
+    """
+    directory = tournament_directory(tournament_id)
+    pages = render(tournament_id)
+    if pages is None:
+        shutil.rmtree(directory, ignore_errors=True)
+        return None
+
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+    for page, content in pages.items():
+        name = f'{page}.{hashlib.md5(content).hexdigest()[:12]}.json'
+        if not (directory / name).exists():
+            for suffix, variant in _variants(content):
+                _write(directory / f'{name}{suffix}', variant)
+        manifest[page] = tournament_url(tournament_id, name)
+
+    # Clients may hold the previous manifest for a while, so its files stay
+    # until the export after this one.
+    keep = _manifest_names(directory) | {url.rsplit('/', 1)[1] for url in manifest.values()}
+    _write(directory / MANIFEST, json.dumps(manifest).encode())
+    for path in directory.iterdir():
+        name = path.name.removesuffix('.gz').removesuffix('.br')
+        if name != MANIFEST and name not in keep and not name.startswith('.'):
+            path.unlink(missing_ok=True)
+    return manifest
+
+
+_pending = set()
+_pending_lock = threading.Lock()
+_timer = None
+# One export at a time, so two never prune each other's files.
+_export_lock = threading.Lock()
+
+
+def schedule(tournament_ids):
+    """Export the tournaments API_SNAPSHOT_DELAY seconds from now, with any others scheduled by then."""
+    global _timer
+    with _pending_lock:
+        _pending.update(tournament_ids)
+        if _timer is None:
+            _timer = threading.Timer(settings.API_SNAPSHOT_DELAY, _export_in_background)
+            _timer.daemon = True
+            _timer.start()
+
+
+def export_pending():
+    """Export every scheduled tournament now."""
+    global _timer
+    with _pending_lock:
+        tournament_ids = sorted(_pending)
+        _pending.clear()
+        _timer = None
+    with _export_lock:
+        for tournament_id in tournament_ids:
+            export(tournament_id)
+
+
+def _export_in_background():
+    try:
+        export_pending()
+    finally:
+        # The timer thread's own connections; nothing else will close them.
+        connections.close_all()
+
+
+@receiver(tournaments_updated)
+def export_updated_tournaments(sender, tournament_ids, **kwargs):
+    if settings.API_SNAPSHOTS:
+        tournament_ids = set(tournament_ids)
+        transaction.on_commit(lambda: schedule(tournament_ids))
@@ -0,0 +1,181 @@
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, When
+from django.db.models.functions import Coalesce
+
+from api.models import Match, Standing, Team
+
+POINTS_FOR_WIN = 3
+POINTS_FOR_DRAW = 1
+
+STANDINGS_ORDER = ('-points', '-score_difference', '-scored', 'name')
+
+STAT_FIELDS = (
+    'played', 'wins', 'draws', 'losses', 'scored', 'conceded', 'score_difference', 'points',
+)
+
+
+def compute_standings(tournament_id=None, limit=None):
+    """
+    Return teams annotated with played/wins/draws/losses/scored/conceded/points,
+    ranked in a single grouped query over the matches of each team's
+    tournaments. Without a tournament, a team's results in all of its
+    tournaments add up, as its stored Standing rows do.
+    """
+    teams = Team.objects.only('id', 'name')
+    if tournament_id is not None:
+        # Filtering first makes the annotations join through this tournament only.
+        teams = teams.filter(tournaments=tournament_id)
+
+    match = 'tournaments__matches__'
+    is_team_a = Q(**{f'{match}team_a': F('pk')})
+    is_team_b = Q(**{f'{match}team_b': F('pk')})
+    score_a, score_b = F(f'{match}score_a'), F(f'{match}score_b')
+    played = (is_team_a | is_team_b) & Q(**{
+        f'{match}is_completed': True, f'{match}score_a__isnull': False, f'{match}score_b__isnull': False,
+    })
+    teams = teams.annotate(
+        played=Count(f'{match}pk', filter=played),
+        wins=Count(f'{match}pk', filter=played & (
+            (is_team_a & Q(**{f'{match}score_a__gt': score_b})) | (is_team_b & Q(**{f'{match}score_b__gt': score_a}))
+        )),
+        draws=Count(f'{match}pk', filter=played & Q(**{f'{match}score_a': score_b})),
+        scored=Coalesce(Sum(Case(When(is_team_a, then=score_a), default=score_b), filter=played), 0),
+        conceded=Coalesce(Sum(Case(When(is_team_a, then=score_b), default=score_a), filter=played), 0),
+    ).annotate(
+        losses=F('played') - F('wins') - F('draws'),
+        points=F('wins') * POINTS_FOR_WIN + F('draws') * POINTS_FOR_DRAW,
+        score_difference=F('scored') - F('conceded'),
+    ).order_by(*STANDINGS_ORDER)
+
+    if limit is not None:
+        teams = teams[:limit]
+    return teams
+
+
+def standings_payload(rows):
+    """Rank either compute_standings() teams or stored Standing rows."""
+    payload = []
+    for idx, row in enumerate(rows):
+        team = row.team if isinstance(row, Standing) else row
+        payload.append({
+            'rank': idx + 1,
+            'team_id': team.id,
+            'team_name': team.name,
+            **{field: getattr(row, field) for field in STAT_FIELDS},
+        })
+    return payload
+
+
+def result_state(match):
+    """The part of a match that feeds the standings, or None if it has no result yet."""
+    if not match.has_result:
+        return None
+    return (match.team_a_id, match.team_b_id, match.score_a, match.score_b)
+
+
+def _team_deltas(scored, conceded):
+    won, drawn = scored > conceded, scored == conceded
+    return {
+        'played': 1,
+        'wins': int(won),
+        'draws': int(drawn),
+        'losses': int(scored < conceded),
+        'scored': scored,
+        'conceded': conceded,
+        'score_difference': scored - conceded,
+        'points': won * POINTS_FOR_WIN + drawn * POINTS_FOR_DRAW,
+    }
+
+
+def apply_result(state, tournament_ids, sign=1):
+    """Add (sign=1) or remove (sign=-1) one match result from the stored standings."""
+    if state is None or not tournament_ids:
+        return
+    team_a_id, team_b_id, score_a, score_b = state
+    for team_id, deltas in (
+        (team_a_id, _team_deltas(score_a, score_b)),
+        (team_b_id, _team_deltas(score_b, score_a)),
+    ):
+        Standing.objects.filter(tournament_id__in=tournament_ids, team_id=team_id).update(**{
+            field: F(field) + sign * value for field, value in deltas.items() if value
+        })
+
+
+def tally_standings(team_ids, results):
+    """
+    Standings stats per team in ``team_ids`` from (team_a_id, team_b_id,
+    score_a, score_b) results, for building rows without the ORM signals.
+    """
+    table = {team_id: dict.fromkeys(STAT_FIELDS, 0) for team_id in team_ids}
+    for team_a_id, team_b_id, score_a, score_b in results:
+        for team_id, deltas in (
+            (team_a_id, _team_deltas(score_a, score_b)),
+            (team_b_id, _team_deltas(score_b, score_a)),
+        ):
+            if team_id in table:
+                for field, value in deltas.items():
+                    table[team_id][field] += value
+    return table
+
+
+def add_standings(tournament_id, team_ids):
+    # A team can join after matches were played, so seed its row from the
+    # aggregated query rather than from zero.
+    rows = compute_standings(tournament_id).filter(pk__in=team_ids)
+    Standing.objects.bulk_create(
+        [
+            Standing(tournament_id=tournament_id, team_id=row.id, **{field: getattr(row, field) for field in STAT_FIELDS})
+            for row in rows
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def remove_standings(tournament_id, team_ids=None):
+    standings = Standing.objects.filter(tournament_id=tournament_id)
+    if team_ids is not None:
+        standings = standings.filter(team_id__in=team_ids)
+    standings.delete()
+
+
+def stored_standings(tournament_id):
+    return Standing.objects.filter(tournament_id=tournament_id).select_related('team').order_by(
+        *STANDINGS_ORDER[:-1], 'team__name'
+    )
+
+
+def rebuild_standings(tournament_id, commit=True):
+    """
+    Recompute a tournament's standings from scratch and return the rows whose
+    stored values drifted, as (team_id, field, stored, expected) tuples.
+    """
+    expected = {
+        row.id: {field: getattr(row, field) for field in STAT_FIELDS}
+        for row in compute_standings(tournament_id)
+    }
+    stored = {
+        standing.team_id: {field: getattr(standing, field) for field in STAT_FIELDS}
+        for standing in Standing.objects.filter(tournament_id=tournament_id)
+    }
+
+    drift = []
+    for team_id in sorted(expected.keys() | stored.keys()):
+        if team_id not in stored:
+            drift.append((team_id, None, None, expected[team_id]))
+        elif team_id not in expected:
+            drift.append((team_id, None, stored[team_id], None))
+        else:
+            drift.extend(
+                (team_id, field, stored[team_id][field], value)
+                for field, value in expected[team_id].items()
+                if stored[team_id][field] != value
+            )
+
+    if drift and commit:
+        with transaction.atomic():
+            remove_standings(tournament_id)
+            Standing.objects.bulk_create(
+                Standing(tournament_id=tournament_id, team_id=team_id, **stats)
+                for team_id, stats in expected.items()
+            )
+    return drift
@@ -1,3 +1,1688 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.management import CommandError, call_command
+from django.conf import settings
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from api import announcements, cache, checks, metrics, routers, scheduling, serializers, snapshots, views
+from api.async_views import TournamentEventsView
+from api.benchmarks import CASES, check_budgets, check_latency, load_budgets, run_benchmarks
+from api.events import ANNOUNCEMENTS_CHANNEL, EventBroker, tournament_channel
+from api.nplusone import NPlusOneError, allow_n_plus_one, detect_n_plus_one, normalize
+from api.middleware import ReplicaRoutingMiddleware, SnapshotWhiteNoiseMiddleware
+from api.models import Announcement, Match, Player, Standing, Team, Tournament
+from api.routers import ReplicaRouter
+from api.urls import urlpatterns
+
+
+# Reads stay on the primary unless a test opts into replicas.
+@override_settings(API_NPLUSONE='raise', DATABASE_REPLICAS=[])
+class APITestCase(TestCase):
+    def setUp(self):
+        cache.get_cache().clear()
+        cache.reset_cache_stats()
+
+
+class TournamentViewTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.player = Player.objects.create(username='player_1', phone_number='+10000000001')
+        self.teams = []
+        for i in range(3):
+            team = Team.objects.create(name=f'Team {i}', passcode='secret')
+            team.members.add(self.player)
+            self.teams.append(team)
+
+    def create_tournament(self, index):
+        tournament = Tournament.objects.create(
+            title=f'Tournament {index}',
+            start_date=date(2026, 1, 1) + timedelta(days=index),
+            end_date=date(2026, 2, 1) + timedelta(days=index),
+        )
+        tournament.teams.set(self.teams)
+        return tournament
+
+    def test_listing_includes_teams_and_counts(self):
+        self.create_tournament(0)
+        empty = Tournament.objects.create(
+            title='Empty', start_date=date(2025, 1, 1), end_date=date(2025, 2, 1)
+        )
+
+        response = self.client.get(reverse('tournaments'))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([t['title'] for t in data], ['Tournament 0', 'Empty'])
+        self.assertEqual(data[0]['team_count'], 3)
+        self.assertEqual(
+            sorted(team['name'] for team in data[0]['teams']),
+            ['Team 0', 'Team 1', 'Team 2'],
+        )
+        self.assertEqual(data[1]['id'], empty.id)
+        self.assertEqual(data[1]['team_count'], 0)
+        self.assertEqual(data[1]['teams'], [])
+
+    def test_query_count_is_constant(self):
+        # version stamp, tournaments with team counts, prefetched teams
+        self.create_tournament(0)
+        with self.assertNumQueries(3):
+            self.client.get(reverse('tournaments'))
+
+        for i in range(1, 20):
+            self.create_tournament(i)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('tournaments'))
+        self.assertEqual(len(response.json()), 20)
+
+
+class TournamentDetailViewTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        call_command('populate_db', stdout=StringIO())
+
+    def test_detail_payload(self):
+        tournament = Tournament.objects.get(title='Central Finest')
+
+        response = self.client.get(reverse('tournament_detail', args=[tournament.id]))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['teams']), 5)
+        raptors = next(team for team in data['teams'] if team['name'] == 'Raptors')
+        self.assertEqual(
+            sorted(member['username'] for member in raptors['members']),
+            ['jane_smith', 'john_doe', 'mike_ross', 'sarah_connor'],
+        )
+        self.assertEqual(len(data['matches']), 4)
+        self.assertEqual(
+            {(match['team_a'], match['team_b']) for match in data['matches']},
+            {('Raptors', 'Warriors'), ('Warriors', 'Lakers'), ('Lakers', 'Bulls'), ('Bulls', 'Heat')},
+        )
+
+    def test_query_count_is_bounded(self):
+        # version stamp, tournament, teams, members and matches (with both teams joined)
+        for tournament in Tournament.objects.all():
+            with self.assertNumQueries(5):
+                response = self.client.get(reverse('tournament_detail', args=[tournament.id]))
+            self.assertEqual(response.status_code, 200)
+
+    def test_missing_tournament(self):
+        response = self.client.get(reverse('tournament_detail', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+
+class StandingsViewTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.heat = Team.objects.create(name='Heat')
+        self.reserves = Team.objects.create(name='Heat Reserves')
+        self.bulls = Team.objects.create(name='Bulls')
+        self.idle = Team.objects.create(name='Idle')
+        self.tournament = Tournament.objects.create(
+            title='League', start_date=date(2026, 1, 1), end_date=date(2026, 2, 1)
+        )
+        self.tournament.teams.set([self.heat, self.reserves, self.bulls, self.idle])
+        self.tournament.matches.set([
+            self.play(self.reserves, self.heat, 2, 1),
+            self.play(self.bulls, self.reserves, 0, 0),
+            self.play(self.heat, self.bulls, 3, 0),
+            self.play(self.bulls, self.heat, None, None, is_completed=False),
+        ])
+        # The overall table adds up each team's tournaments, and only those.
+        self.other = Tournament.objects.create(title='Cup', start_date=date(2026, 3, 1), end_date=date(2026, 4, 1))
+        self.other.teams.set([self.heat, self.bulls])
+        self.other.matches.set([self.play(self.bulls, self.heat, 5, 0)])
+        self.play(self.bulls, self.heat, 7, 0)
+
+    def play(self, team_a, team_b, score_a, score_b, is_completed=True):
+        return Match.objects.create(
+            team_a=team_a, team_b=team_b, score_a=score_a, score_b=score_b,
+            scheduled_time=timezone.now(), location='Court 1', is_completed=is_completed,
+        )
+
+    def test_tournament_standings(self):
+        # version stamp and the stored standings
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('tournament_standings', args=[self.tournament.id]))
+
+        rows = response.json()
+        self.assertEqual(
+            [(row['rank'], row['team_name'], row['points']) for row in rows],
+            [(1, 'Heat Reserves', 4), (2, 'Heat', 3), (3, 'Bulls', 1), (4, 'Idle', 0)],
+        )
+        heat = rows[1]
+        self.assertEqual(
+            {key: heat[key] for key in ('played', 'wins', 'draws', 'losses', 'scored', 'conceded', 'score_difference')},
+            {'played': 2, 'wins': 1, 'draws': 0, 'losses': 1, 'scored': 4, 'conceded': 2, 'score_difference': 2},
+        )
+        self.assertEqual(rows[3]['played'], 0)
+
+    def test_overall_standings(self):
+        rows = self.client.get(reverse('standings')).json()
+
+        self.assertEqual(
+            [(row['team_name'], row['played'], row['points'], row['scored']) for row in rows],
+            [('Bulls', 3, 4, 5), ('Heat Reserves', 2, 4, 2), ('Heat', 3, 3, 4), ('Idle', 0, 0, 0)],
+        )
+
+    def test_missing_tournament(self):
+        response = self.client.get(reverse('tournament_standings', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    def standings(self):
+        response = self.client.get(reverse('tournament_standings', args=[self.tournament.id]))
+        return {row['team_name']: row for row in response.json()}
+
+    def assertConsistent(self):
+        call_command('rebuild_standings', '--check', stdout=StringIO())
+
+    def test_completing_a_match_updates_standings(self):
+        match = self.tournament.matches.get(is_completed=False)
+        match.is_completed, match.score_a, match.score_b = True, 4, 4
+        match.save()
+
+        rows = self.standings()
+        self.assertEqual((rows['Bulls']['draws'], rows['Bulls']['points']), (2, 2))
+        self.assertEqual((rows['Heat']['played'], rows['Heat']['points']), (3, 4))
+        self.assertConsistent()
+
+    def test_correcting_a_result_updates_standings(self):
+        match = self.tournament.matches.get(team_a=self.reserves)
+        match.score_a = 0
+        match.save()
+
+        rows = self.standings()
+        self.assertEqual((rows['Heat']['wins'], rows['Heat']['points']), (2, 6))
+        self.assertEqual((rows['Heat Reserves']['losses'], rows['Heat Reserves']['points']), (1, 1))
+        self.assertConsistent()
+
+    def test_removing_and_deleting_matches(self):
+        self.tournament.matches.remove(self.tournament.matches.get(team_a=self.reserves))
+        self.tournament.matches.get(team_a=self.heat).delete()
+
+        rows = self.standings()
+        self.assertEqual(rows['Heat']['played'], 0)
+        self.assertEqual(rows['Bulls']['points'], 1)
+        self.assertConsistent()
+
+    def test_late_joining_team_gets_existing_results(self):
+        latecomer = Team.objects.create(name='Latecomer')
+        self.tournament.matches.add(self.play(latecomer, self.idle, 1, 0))
+        self.tournament.teams.add(latecomer)
+
+        rows = self.standings()
+        self.assertEqual(rows['Latecomer']['points'], 3)
+        self.assertEqual(rows['Idle']['losses'], 1)
+        self.tournament.teams.remove(latecomer)
+        self.assertNotIn('Latecomer', self.standings())
+        self.assertConsistent()
+
+    def test_rebuild_standings_repairs_drift(self):
+        Standing.objects.filter(team=self.heat).update(points=99)
+
+        with self.assertRaises(CommandError):
+            self.assertConsistent()
+        call_command('rebuild_standings', stdout=StringIO())
+        self.assertEqual(self.standings()['Heat']['points'], 3)
+        self.assertConsistent()
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.team = Team.objects.create(name='Raptors', passcode='raptors123')
+        self.tournaments = [
+            Tournament.objects.create(title=title, start_date=date(2026, 1, 1), end_date=date(2026, 2, 1))
+            for title in ('Central Finest', 'Winter Championship')
+        ]
+
+    def test_repeated_reads_are_served_from_cache(self):
+        url = reverse('tournament_detail', args=[self.tournaments[0].id])
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(cache.cache_stats()['tournament_detail'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_query_string_is_part_of_the_key(self):
+        self.client.get(reverse('teams'))
+        self.assertEqual(self.client.get(reverse('teams'), {'page': 2})['X-Cache'], 'MISS')
+
+    def test_saving_an_announcement_only_invalidates_announcements(self):
+        self.client.get(reverse('announcements'))
+        self.client.get(reverse('teams'))
+
+        Announcement.objects.create(title='Welcome', content='Registration is open')
+
+        response = self.client.get(reverse('announcements'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([a['title'] for a in response.json()], ['Welcome'])
+        self.assertEqual(self.client.get(reverse('teams'))['X-Cache'], 'HIT')
+
+    def test_joining_invalidates_only_the_joined_tournament(self):
+        joined, other = self.tournaments
+        for tournament in self.tournaments:
+            self.client.get(reverse('tournament_detail', args=[tournament.id]))
+
+        response = self.client.post(
+            reverse('join_tournament'),
+            {'tournament_id': joined.id, 'team_id': self.team.id, 'passcode': 'raptors123'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(reverse('tournament_detail', args=[joined.id]))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([team['name'] for team in response.json()['teams']], ['Raptors'])
+        self.assertEqual(self.client.get(reverse('tournament_detail', args=[other.id]))['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get(reverse('tournaments'))['X-Cache'], 'MISS')
+
+    def test_errors_are_not_cached(self):
+        self.client.get(reverse('tournament_detail', args=[0]))
+        self.assertEqual(self.client.get(reverse('tournament_detail', args=[0]))['X-Cache'], 'MISS')
+
+    def test_stats_require_staff(self):
+        self.assertEqual(self.client.get(reverse('cache_stats')).status_code, 403)
+
+        staff = Player.objects.create_user('admin', '+10000000099', 'password', is_staff=True)
+        self.client.force_login(staff)
+        self.client.get(reverse('teams'))
+        response = self.client.get(reverse('cache_stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['teams']['misses'], 1)
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.teams = [Team.objects.create(name=name) for name in ('Raptors', 'Warriors')]
+        self.tournament = Tournament.objects.create(
+            title='Central Finest', start_date=date(2026, 1, 1), end_date=date(2026, 2, 1)
+        )
+        self.match = Match.objects.create(
+            team_a=self.teams[0], team_b=self.teams[1],
+            scheduled_time=timezone.now(), location='Court 1',
+        )
+        self.tournament.matches.add(self.match)
+        self.url = reverse('tournament_fixtures', args=[self.tournament.id])
+
+    def test_validators_are_stable_between_cache_misses_and_hits(self):
+        miss = self.client.get(self.url)
+        hit = self.client.get(self.url)
+
+        self.assertEqual(hit['X-Cache'], 'HIT')
+        self.assertTrue(miss['ETag'].startswith('"'))
+        self.assertEqual(miss['ETag'], hit['ETag'])
+        self.assertEqual(miss['Last-Modified'], hit['Last-Modified'])
+        self.assertEqual(hit['Cache-Control'], 'no-cache')
+
+    def test_if_none_match_skips_building_the_response(self):
+        etag = self.client.get(self.url)['ETag']
+        cache.get_cache().clear()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.url)['Last-Modified']
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_produce_a_new_etag(self):
+        etags = {self.client.get(self.url)['ETag']}
+
+        self.match.is_completed, self.match.score_a, self.match.score_b = True, 2, 1
+        self.match.save()
+        etags.add(self.client.get(self.url)['ETag'])
+
+        self.tournament.teams.add(*self.teams)
+        etags.add(self.client.get(self.url)['ETag'])
+
+        self.teams[1].members.add(Player.objects.create(username='late_signing'))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=', '.join(etags))
+        self.assertEqual(response.status_code, 200)
+        etags.add(response['ETag'])
+        self.assertEqual(len(etags), 4)
+
+    def test_list_endpoints_emit_etags(self):
+        for name in ('announcements', 'tournaments', 'teams', 'standings'):
+            response = self.client.get(reverse(name))
+            self.assertIn('ETag', response)
+            self.assertEqual(
+                self.client.get(reverse(name), HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304
+            )
+
+    def test_etag_depends_on_the_query_string(self):
+        self.assertNotEqual(
+            self.client.get(reverse('teams'))['ETag'],
+            self.client.get(reverse('teams'), {'fields': 'id'})['ETag'],
+        )
+
+    def test_missing_tournament_has_no_validators(self):
+        response = self.client.get(reverse('tournament_fixtures', args=[0]))
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response)
+
+
+class PaginationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.player = Player.objects.create(username='player_1', phone_number='+10000000001')
+        self.teams = [Team.objects.create(name=f'Team {i}') for i in range(5)]
+        self.teams[0].members.add(self.player)
+        for i in range(5):
+            # Shared start dates force the cursor to break ties on id.
+            Tournament.objects.create(
+                title=f'Tournament {i}', start_date=date(2026, 1, 1 + i // 2), end_date=date(2026, 2, 1)
+            )
+
+    def follow(self, name, params):
+        pages, url = [], reverse(name)
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+            link = response.get('Link')
+            url = link[1:link.index('>')] if link else None
+            params = None
+        return pages
+
+    def test_teams_are_paginated_by_cursor(self):
+        pages = self.follow('teams', {'limit': 2})
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual([team['name'] for page in pages for team in page], [f'Team {i}' for i in range(5)])
+        self.assertEqual(pages[0][0]['member_count'], 1)
+
+    def test_tournament_pages_break_ties_on_id(self):
+        pages = self.follow('tournaments', {'limit': 2, 'fields': 'title'})
+
+        self.assertEqual(
+            [t['title'] for page in pages for t in page],
+            ['Tournament 4', 'Tournament 3', 'Tournament 2', 'Tournament 1', 'Tournament 0'],
+        )
+        self.assertEqual(pages[0][0], {'title': 'Tournament 4'})
+
+    def test_link_survives_caching(self):
+        first = self.client.get(reverse('announcements'))
+        for i in range(3):
+            Announcement.objects.create(title=f'Notice {i}', content='...')
+        miss = self.client.get(reverse('announcements'), {'limit': 2})
+        hit = self.client.get(reverse('announcements'), {'limit': 2})
+
+        self.assertNotIn('Link', first)
+        self.assertEqual(hit['X-Cache'], 'HIT')
+        self.assertEqual(miss['Link'], hit['Link'])
+
+    def test_fields_are_pushed_down(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('tournaments'), {'fields': 'id,title'})
+
+        self.assertEqual(response.json()[0], {'id': Tournament.objects.get(title='Tournament 4').id, 'title': 'Tournament 4'})
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('entry_fee', queries[-1]['sql'])
+        self.assertNotIn('api_tournament_teams', queries[-1]['sql'])
+
+    def test_invalid_parameters(self):
+        for params in ({'fields': 'id,passcode'}, {'cursor': 'not-a-cursor'}, {'limit': 'all'}, {'limit': 0}):
+            response = self.client.get(reverse('teams'), params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class QueryPlanTests(APITestCase):
+    # A bare "SCAN <table>" step reads the whole table without any index.
+    FULL_SCAN = re.compile(r'^SCAN \w+$')
+
+    def setUp(self):
+        super().setUp()
+        call_command('populate_db', stdout=StringIO())
+
+    def assertNoFullScans(self, url):
+        cache.get_cache().clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        self.assertTrue(queries.captured_queries, url)
+
+        for query in queries.captured_queries:
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                plan = [row[-1] for row in cursor.fetchall()]
+            full_scans = [step for step in plan if self.FULL_SCAN.match(step)]
+            self.assertFalse(full_scans, f"{url}: {query['sql']}\n" + '\n'.join(plan))
+
+    def test_read_endpoints_use_indexes(self):
+        tournament = Tournament.objects.get(title='Central Finest')
+        urls = [
+            reverse('announcements'),
+            reverse('tournaments'),
+            reverse('teams'),
+            reverse('tournament_detail', args=[tournament.id]),
+            reverse('tournament_fixtures', args=[tournament.id]),
+            reverse('tournament_standings', args=[tournament.id]),
+            reverse('standings'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertNoFullScans(url)
+
+
+@override_settings(SCRYPT_WORK_FACTOR=2**10, SCRYPT_PARALLELISM=1)
+class PasswordTests(APITestCase):
+    def register(self, password='s3cret-pass'):
+        return self.client.post(
+            reverse('register'),
+            {'username': 'mike_ross', 'phone_number': '+10000000002', 'password': password},
+            content_type='application/json',
+        )
+
+    def login(self, password):
+        return self.client.post(
+            reverse('login'), {'username': 'mike_ross', 'password': password}, content_type='application/json'
+        )
+
+    def test_registration_stores_a_real_hash(self):
+        self.assertEqual(self.register().status_code, 201)
+
+        player = Player.objects.get(username='mike_ross')
+        self.assertTrue(player.password.startswith('scrypt$1024$'))
+        self.assertTrue(player.check_password('s3cret-pass'))
+
+    def test_login_checks_the_password(self):
+        self.register()
+
+        self.assertEqual(self.login('s3cret-pass').status_code, 200)
+        self.assertEqual(self.login('wrong').status_code, 401)
+        response = self.client.post(
+            reverse('login'), {'username': 'nobody', 'password': 'x'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_login_upgrades_outdated_hashes(self):
+        player = Player.objects.create(
+            username='mike_ross', password=make_password('s3cret-pass', hasher='pbkdf2_sha256')
+        )
+
+        self.assertEqual(self.login('s3cret-pass').status_code, 200)
+        player.refresh_from_db()
+        self.assertTrue(player.password.startswith('scrypt$1024$'))
+
+        with self.settings(SCRYPT_WORK_FACTOR=2**11):
+            self.assertEqual(self.login('s3cret-pass').status_code, 200)
+        player.refresh_from_db()
+        self.assertTrue(player.password.startswith('scrypt$2048$'))
+
+    def test_failed_login_does_not_rehash(self):
+        encoded = make_password('s3cret-pass', hasher='pbkdf2_sha256')
+        player = Player.objects.create(username='mike_ross', password=encoded)
+
+        self.assertEqual(self.login('wrong').status_code, 401)
+        player.refresh_from_db()
+        self.assertEqual(player.password, encoded)
+
+    def test_saturated_pool_answers_503(self):
+        with mock.patch('api.hashers._slots.acquire', return_value=False):
+            response = self.register()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(Player.objects.exists())
+
+
+class AsyncViewTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        call_command('populate_db', stdout=StringIO())
+        self.tournament = Tournament.objects.get(title='Central Finest')
+
+    def urls(self):
+        return [
+            reverse('announcements'),
+            reverse('tournaments') + '?limit=2',
+            reverse('teams'),
+            reverse('tournament_detail', args=[self.tournament.id]),
+            reverse('tournament_fixtures', args=[self.tournament.id]),
+            reverse('tournament_standings', args=[self.tournament.id]),
+            reverse('standings'),
+        ]
+
+    async def test_async_views_match_sync_views(self):
+        urls = self.urls()
+        expected = []
+        for url in urls:
+            response = await sync_to_async(self.client.get)(url)
+            expected.append((response.status_code, response.json(), response.get('Link')))
+        await sync_to_async(cache.get_cache().clear)()
+
+        with override_settings(ROOT_URLCONF='api.async_urls'):
+            for url, (status, data, link) in zip(urls, expected):
+                response = await self.async_client.get(url.removeprefix('/api'))
+                self.assertEqual(response['X-Cache'], 'MISS')
+                self.assertEqual((response.status_code, response.json()), (status, data), url)
+                self.assertEqual(response.get('Link') is None, link is None)
+
+    @override_settings(ROOT_URLCONF='api.async_urls')
+    async def test_not_found_and_conditional_requests(self):
+        response = await self.async_client.get('/tournaments/0/')
+        self.assertEqual(response.status_code, 404)
+
+        url = f'/tournaments/{self.tournament.id}/fixtures/'
+        etag = (await self.async_client.get(url))['ETag']
+        await sync_to_async(cache.get_cache().clear)()
+        response = await self.async_client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(ROOT_URLCONF='api.async_urls')
+    async def test_team_creation_still_works(self):
+        response = await self.async_client.post(
+            '/teams/', {'name': 'Knicks', 'passcode': 'knicks123'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        response = await self.async_client.get('/teams/', {'fields': 'name', 'limit': 100})
+        self.assertIn({'name': 'Knicks'}, response.json())
+
+
+class LiveEventTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.broker = EventBroker(history=3)
+        for target in ('api.signals.broker', 'api.async_views.broker'):
+            patcher = mock.patch(target, self.broker)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.heat = Team.objects.create(name='Heat')
+        self.bulls = Team.objects.create(name='Bulls')
+        self.tournament = Tournament.objects.create(
+            title='League', start_date=date(2026, 1, 1), end_date=date(2026, 2, 1)
+        )
+        self.channel = tournament_channel(self.tournament.id)
+
+    def history(self, channel):
+        return [(event.type, event.data) for event in self.broker._history[channel]]
+
+    def test_model_changes_publish_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tournament.teams.add(self.heat)
+        match = Match.objects.create(
+            team_a=self.heat, team_b=self.bulls, scheduled_time=timezone.now(), location='Court 1'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tournament.matches.add(match)
+            match.score_a, match.score_b = 1, 0
+            match.save()
+            match.score_a, match.is_completed = 2, True
+            match.save()
+            match.location = 'Court 2'
+            match.save()
+        with self.captureOnCommitCallbacks() as callbacks:
+            Announcement.objects.create(title='Final', content='Tonight')
+        self.assertEqual(self.history(ANNOUNCEMENTS_CHANNEL), [])
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual([event_type for event_type, _ in self.history(self.channel)], [
+            'team-joined', 'score-updated', 'match-completed',
+        ])
+        self.assertEqual(self.history(self.channel)[0][1], {'team_id': self.heat.id, 'team_name': 'Heat'})
+        self.assertEqual(self.history(self.channel)[-1][1]['score_a'], 2)
+        self.assertEqual(self.history(ANNOUNCEMENTS_CHANNEL)[0][0], 'announcement-created')
+
+    async def stream(self, **headers):
+        request = AsyncRequestFactory().get(f'/tournaments/{self.tournament.id}/events/', headers=headers)
+        response = await TournamentEventsView.as_view()(request, tournament_id=self.tournament.id)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return response.streaming_content
+
+    async def read(self, stream, count):
+        return [(await anext(stream)).decode() for _ in range(count)]
+
+    async def disconnect(self, stream):
+        # The ASGI handler cancels the response task when the client goes away.
+        task = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+    async def test_stream_delivers_and_replays(self):
+        first = self.broker.publish(self.channel, 'team-joined', {'team_id': 1})
+        stream = await self.stream()
+        self.assertEqual(await self.read(stream, 1), ['retry: 3000\n\n'])
+
+        # Published from another thread, as the sync write views do.
+        second = await sync_to_async(self.broker.publish)(ANNOUNCEMENTS_CHANNEL, 'announcement-created', {'id': 1})
+        self.broker.publish(tournament_channel(0), 'team-joined', {'team_id': 2})
+        self.assertEqual(await self.read(stream, 1), [second.encode()])
+        await self.disconnect(stream)
+        self.assertEqual(self.broker.subscriber_count(), 0)
+
+        third = self.broker.publish(self.channel, 'match-completed', {'match_id': 1})
+        stream = await self.stream(**{'Last-Event-ID': first.id})
+        self.assertEqual((await self.read(stream, 3))[1:], [second.encode(), third.encode()])
+        await self.disconnect(stream)
+
+    async def test_stream_asks_for_resync_when_events_are_gone(self):
+        first = self.broker.publish(self.channel, 'team-joined', {'team_id': 1})
+        for team_id in range(2, 6):
+            self.broker.publish(self.channel, 'team-joined', {'team_id': team_id})
+
+        for last_event_id in (first.id, 'previous-run-1'):
+            stream = await self.stream(**{'Last-Event-ID': last_event_id})
+            chunks = await self.read(stream, 5)
+            self.assertEqual(chunks[1], 'event: resync\ndata: {}\n\n')
+            self.assertEqual(chunks[2:], [event.encode() for event in self.broker._history[self.channel]])
+            await self.disconnect(stream)
+
+    async def test_unknown_tournament(self):
+        request = AsyncRequestFactory().get('/tournaments/0/events/')
+        response = await TournamentEventsView.as_view()(request, tournament_id=0)
+        self.assertEqual(response.status_code, 404)
+
+
+class PopulateDbTests(APITestCase):
+    def populate(self, **options):
+        call_command('populate_db', stdout=StringIO(), **options)
+        return list(Match.objects.order_by('id').values_list('team_a_id', 'team_b_id', 'location', 'score_a', 'score_b'))
+
+    def test_scaled_dataset_is_deterministic(self):
+        matches = self.populate(scale=3, seed=7)
+        self.assertEqual(
+            (Player.objects.count(), Team.objects.count(), Tournament.objects.count(), len(matches)),
+            (60, 24, 12, 36),
+        )
+        self.assertEqual(self.populate(scale=3, seed=7), matches)
+        self.assertNotEqual(self.populate(scale=3, seed=8), matches)
+
+    def test_reloading_deletes_players_in_bulk(self):
+        admin = Player.objects.create_superuser('admin', '+19999999999', 'password')
+        self.populate(scale=3)
+        player = Player.objects.get(username='john_doe')
+        player.groups.add(Group.objects.create(name='Captains'))
+        with CaptureQueriesContext(connection) as queries:
+            self.populate(scale=1)
+        self.assertLess(len(queries), 40)
+        self.assertEqual(Player.objects.count(), 21)
+        self.assertTrue(Player.objects.filter(pk=admin.pk).exists())
+
+    def test_standings_match_the_results(self):
+        self.populate(scale=2)
+        out = StringIO()
+        call_command('rebuild_standings', check=True, stdout=out)
+        self.assertIn('Standings are consistent', out.getvalue())
+
+
+@override_settings(SCRYPT_WORK_FACTOR=2**10, SCRYPT_PARALLELISM=1)
+class BenchmarkTests(APITestCase):
+    def test_every_route_has_a_case_and_a_budget(self):
+        self.assertEqual({route for _, route, _ in CASES}, {pattern.name for pattern in urlpatterns})
+        self.assertEqual(set(load_budgets()), {case for case, _, _ in CASES})
+
+    def test_routes_stay_within_query_budgets(self):
+        results = run_benchmarks([1, 2], iterations=2)
+        self.assertEqual(check_budgets(results, load_budgets()), [])
+
+    def test_latency_over_budget_is_only_reported(self):
+        results = {'1': {'teams': {'statuses': [200], 'queries': 2, 'p95_ms': 11.5}}}
+        budgets = {'teams': {'queries': 2, 'p95_ms': 10}}
+        self.assertEqual(check_budgets(results, budgets), [])
+        self.assertEqual(check_latency(results, budgets), ['teams at scale 1: p95 11.5ms, budget 10ms'])
+
+
+class InstrumentationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.reset_metrics()
+        call_command('populate_db', stdout=StringIO())
+        self.staff = Player.objects.create(username='staff', phone_number='+10000000009', is_staff=True)
+
+    def server_timing(self, response):
+        return dict(
+            re.match(r'(\w+);dur=([\d.]+)', part.strip()).groups()
+            for part in response['Server-Timing'].split(',')
+        )
+
+    @override_settings(API_SERVER_TIMING='all')
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('tournaments'))
+        self.assertIn(f'desc="{len(queries)} queries"', response['Server-Timing'])
+        timing = self.server_timing(response)
+        self.assertEqual(set(timing), {'db', 'serialize', 'app', 'total'})
+        self.assertGreater(float(timing['serialize']) + float(timing['db']), 0)
+
+    def test_server_timing_is_off_by_default(self):
+        self.assertFalse(self.client.get(reverse('tournaments')).has_header('Server-Timing'))
+
+    @override_settings(API_SERVER_TIMING='staff')
+    def test_server_timing_for_staff_only(self):
+        self.assertFalse(self.client.get(reverse('tournaments')).has_header('Server-Timing'))
+        self.client.force_login(self.staff)
+        self.assertTrue(self.client.get(reverse('tournaments')).has_header('Server-Timing'))
+
+    @override_settings(ROOT_URLCONF='api.async_urls', API_SERVER_TIMING='all')
+    async def test_async_views_are_measured(self):
+        response = await self.async_client.get('/tournaments/')
+        self.assertNotIn('desc="0 queries"', response['Server-Timing'])
+
+    @override_settings(ROOT_URLCONF='api.async_urls', API_SERVER_TIMING='staff')
+    async def test_async_server_timing_for_staff_only(self):
+        self.assertFalse((await self.async_client.get('/tournaments/')).has_header('Server-Timing'))
+        await self.async_client.aforce_login(self.staff)
+        self.assertTrue((await self.async_client.get('/tournaments/')).has_header('Server-Timing'))
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('tournaments'))
+        self.client.get(reverse('tournaments'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('api_request_duration_seconds_count{method="GET",route="api/tournaments/"} 2', body)
+        self.assertIn('api_request_sql_duration_seconds_bucket{method="GET",route="api/tournaments/",le="+Inf"} 2', body)
+        self.assertIn('api_cache_requests_total{endpoint="tournaments",result="hit"} 1', body)
+
+    @override_settings(API_METRICS_TOKEN='scrape-token')
+    def test_metrics_token(self):
+        response = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer scrape-token'})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer wrong'})
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(API_SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged_with_their_queries(self):
+        with self.assertLogs('api.performance', 'WARNING') as logs:
+            self.client.get(reverse('tournament_fixtures', args=[Tournament.objects.first().id]))
+        self.assertIn('Slow request GET /api/tournaments/', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+        # Each statement is cut short, like the N+1 report's.
+        for line in logs.output[0].splitlines()[1:]:
+            self.assertLessEqual(len(line.split('ms ', 1)[1]), 200)
+
+
+@override_settings(API_NPLUSONE_THRESHOLD=2)
+class NPlusOneTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        call_command('populate_db', stdout=StringIO())
+        self.url = reverse('tournament_detail', args=[Tournament.objects.get(title='Central Finest').id])
+
+    def test_normalize(self):
+        self.assertEqual(
+            normalize('SELECT * FROM "api_team" WHERE ("id" IN (%s, %s, %s) AND "name" = \'Heat\') LIMIT 21'),
+            'SELECT * FROM "api_team" WHERE ("id" IN (...) AND "name" = ?) LIMIT ?',
+        )
+
+    def test_requests_that_repeat_queries_fail(self):
+        unprefetched = mock.patch.object(views, 'detail_teams', lambda: Team.objects.all())
+        with unprefetched, self.assertRaisesRegex(NPlusOneError, r'5 x SELECT .* at api/serializers.py:\d+ in dump_many'):
+            self.client.get(self.url)
+
+        cache.get_cache().clear()
+        with unprefetched, override_settings(API_NPLUSONE='log'), self.assertLogs('api.nplusone', 'WARNING'):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_allowlisted_code_is_ignored(self):
+        payload = allow_n_plus_one(views.tournament_detail_payload)
+        with mock.patch.object(views, 'detail_teams', lambda: Team.objects.all()), \
+                mock.patch.object(views, 'tournament_detail_payload', payload):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_detect_outside_requests(self):
+        with self.assertRaises(NPlusOneError):
+            with detect_n_plus_one():
+                for team in Team.objects.all():
+                    list(team.members.all())
+        with detect_n_plus_one():
+            list(Team.objects.prefetch_related('members'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1', 'replica_2'])
+class ReplicaRoutingTests(APITestCase):
+    def route(self, request):
+        seen = {}
+
+        def view(request):
+            seen['read'] = ReplicaRouter().db_for_read(Team)
+            seen['write'] = ReplicaRouter().db_for_write(Team)
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(view)(request)
+        return seen['read'], seen['write'], response
+
+    def test_reads_in_get_requests_go_to_one_replica(self):
+        read, write, _ = self.route(RequestFactory().get('/api/tournaments/'))
+        self.assertIn(read, ['replica_1', 'replica_2'])
+        self.assertEqual(write, 'default')
+        self.assertEqual(ReplicaRouter().db_for_read(Team), 'default')
+
+        with routers.use_replicas():
+            self.assertEqual(len({ReplicaRouter().db_for_read(Team) for _ in range(20)}), 1)
+
+    def test_writes_read_from_the_primary(self):
+        read, write, response = self.route(RequestFactory().post('/api/join-tournament/'))
+        self.assertEqual((read, write), ('default', 'default'))
+        self.assertEqual(response.cookies, {})
+
+    def test_reads_of_recently_changed_scopes_go_to_the_primary(self):
+        reads = []
+
+        class View:
+            @cache.cached_response('test', lambda team_id: [cache.TEAMS, f'team:{team_id}'])
+            def get(self, request, team_id):
+                reads.append(ReplicaRouter().db_for_read(Team))
+                return HttpResponse()
+
+        request = RequestFactory().get('/')
+        with routers.use_replicas():
+            View().get(request, team_id=1)
+            cache.invalidate('team:2')
+            View().get(request, team_id=2)
+            # The primary's response is current, so it is cached.
+            self.assertEqual(View().get(request, team_id=2)['X-Cache'], 'HIT')
+        self.assertIn(reads[0], ['replica_1', 'replica_2'])
+        self.assertEqual(reads[1:], ['default'])
+
+        with self.settings(API_REPLICA_LAG_SECONDS=0):
+            cache.invalidate('team:2')
+        with routers.use_replicas():
+            View().get(request, team_id=2)
+        self.assertIn(reads[-1], ['replica_1', 'replica_2'])
+
+    def test_replica_reads_racing_a_change_are_not_cached(self):
+        class View:
+            @cache.cached_response('test', lambda: [cache.TEAMS])
+            def get(self, request):
+                return HttpResponse()
+
+        request = RequestFactory().get('/')
+        # The scope changes after the lookup, while the replica is being read.
+        with routers.use_replicas(), mock.patch('api.cache._may_be_stale', side_effect=[False, True, False, False]):
+            self.assertEqual(View().get(request)['X-Cache'], 'MISS')
+            self.assertEqual(View().get(request)['X-Cache'], 'MISS')
+        self.assertEqual(View().get(request)['X-Cache'], 'HIT')
+
+    def test_check_warns_about_a_per_process_cache(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://'}}
+        with override_settings(CACHES=locmem):
+            self.assertEqual([warning.id for warning in checks.check_replica_cache(None)], ['api.W001'])
+        with override_settings(CACHES=redis):
+            self.assertEqual(checks.check_replica_cache(None), [])
+        with override_settings(CACHES=locmem, DATABASE_REPLICAS=[]):
+            self.assertEqual(checks.check_replica_cache(None), [])
+
+
+@skipUnless(
+    'replica_1' in settings.DATABASES and not settings.DATABASES['replica_1'].get('TEST', {}).get('MIRROR'),
+    'needs a separate replica_1 database (DJANGO_DB=sqlite DJANGO_DB_REPLICA=1)',
+)
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaDatabaseTests(APITestCase):
+    # replica_1 is an unreplicated database here, so rows written to the
+    # primary are only visible to requests that read from it.
+    databases = {'default', 'replica_1'} & set(settings.DATABASES)
+
+    def test_clients_read_their_own_writes(self):
+        team = Team.objects.create(name='Heat')
+        tournament = Tournament.objects.create(title='League', start_date=date(2026, 1, 1), end_date=date(2026, 2, 1))
+        # Past the lag window, reads go to the replica.
+        cache.get_cache().clear()
+        self.assertEqual(self.client.get(reverse('tournaments')).json(), [])
+
+        response = self.client.post(
+            reverse('join_tournament'), {'tournament_id': tournament.id, 'team_id': team.id},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        # No cookies: a cross-origin client reads its writes too.
+        detail = Client().get(reverse('tournament_detail', args=[tournament.id])).json()
+        self.assertEqual([team['name'] for team in detail['teams']], ['Heat'])
+
+
+class JoinTournamentTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.tournament = Tournament.objects.create(
+            title='Cup', start_date=date(2026, 1, 1), end_date=date(2026, 2, 1), max_teams=2,
+        )
+        self.teams = [Team.objects.create(name=f'Team {i}') for i in range(3)]
+
+    def join(self, team):
+        return self.client.post(
+            reverse('join_tournament'), {'tournament_id': self.tournament.id, 'team_id': team.id},
+            content_type='application/json',
+        )
+
+    def test_joining_twice_is_rejected(self):
+        self.assertEqual(self.join(self.teams[0]).status_code, 200)
+        response = self.join(self.teams[0])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Team already joined this tournament'})
+        self.assertEqual(self.tournament.teams.count(), 1)
+
+    def test_joining_a_full_tournament_is_rejected(self):
+        self.join(self.teams[0])
+        self.join(self.teams[1])
+        response = self.join(self.teams[2])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), {'error': 'Tournament is full'})
+        self.assertEqual(self.join(self.teams[1]).status_code, 400)
+
+    def test_joining_adds_standings_and_publishes_the_team(self):
+        with mock.patch('api.signals.broker.publish') as publish, self.captureOnCommitCallbacks(execute=True):
+            self.join(self.teams[0])
+        self.assertTrue(Standing.objects.filter(tournament=self.tournament, team=self.teams[0]).exists())
+        publish.assert_called_once_with(
+            tournament_channel(self.tournament.id), 'team-joined', {'team_id': self.teams[0].id, 'team_name': 'Team 0'},
+        )
+
+
+@skipUnless(connection.features.has_select_for_update, 'needs row locks, e.g. PostgreSQL')
+@override_settings(API_NPLUSONE='raise', DATABASE_REPLICAS=[])
+class JoinTournamentConcurrencyTests(TransactionTestCase):
+    def join_in_parallel(self, tournament, teams):
+        def join(team):
+            try:
+                return Client().post(
+                    reverse('join_tournament'), {'tournament_id': tournament.id, 'team_id': team.id},
+                    content_type='application/json',
+                ).status_code
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            return sorted(pool.map(join, teams))
+
+    def test_parallel_joins_never_exceed_capacity(self):
+        tournament = Tournament.objects.create(
+            title='Cup', start_date=date(2026, 1, 1), end_date=date(2026, 2, 1), max_teams=50,
+        )
+        teams = Team.objects.bulk_create(Team(name=f'Team {i}') for i in range(300))
+
+        statuses = self.join_in_parallel(tournament, teams)
+
+        self.assertEqual(statuses, [200] * 50 + [409] * 250)
+        self.assertEqual(tournament.teams.count(), 50)
+        self.assertEqual(Standing.objects.filter(tournament=tournament).count(), 50)
+
+    def test_parallel_joins_of_one_team_add_it_once(self):
+        tournament = Tournament.objects.create(title='Cup', start_date=date(2026, 1, 1), end_date=date(2026, 2, 1))
+        team = Team.objects.create(name='Heat')
+
+        statuses = self.join_in_parallel(tournament, [team] * 200)
+
+        self.assertEqual(statuses, [200] + [400] * 199)
+        self.assertEqual(tournament.teams.count(), 1)
+
+
+class BulkEndpointTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = Player.objects.create_user('organizer', '+10000000090', 'password', is_staff=True)
+        self.client.force_login(self.staff)
+
+    def post(self, name, data):
+        return self.client.post(reverse(name), data, content_type='application/json')
+
+    def test_bulk_endpoints_require_staff(self):
+        self.client.logout()
+        for name in ('bulk_teams', 'bulk_register', 'bulk_join_tournament'):
+            self.assertEqual(self.post(name, {}).status_code, 403)
+
+    def test_malformed_and_oversized_batches_are_rejected(self):
+        self.assertEqual(self.post('bulk_teams', {'teams': []}).json(), {'error': '"teams" must be a non-empty list'})
+        with override_settings(API_BULK_MAX_ITEMS=1):
+            response = self.post('bulk_teams', {'teams': [{'name': 'A', 'passcode': 'a'}] * 2})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Team.objects.count(), 0)
+
+    def test_teams_are_validated_together(self):
+        Team.objects.create(name='Heat')
+        response = self.post('bulk_teams', {'teams': [
+            {'name': 'Bulls', 'passcode': 'b'},
+            {'name': 'Heat', 'passcode': 'h'},
+            {'name': 'Bulls', 'passcode': 'b'},
+            {'name': 'Suns'},
+            'Nets',
+        ]})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['succeeded'], body['failed']), (1, 4))
+        self.assertEqual(body['results'], [
+            {'index': 0, 'id': Team.objects.get(name='Bulls').id, 'name': 'Bulls'},
+            {'index': 1, 'error': 'Team name already exists'},
+            {'index': 2, 'error': 'Duplicate team name in this batch'},
+            {'index': 3, 'error': 'Team passcode is required'},
+            {'index': 4, 'error': 'Team name is required'},
+        ])
+
+    def test_a_thousand_teams_take_a_handful_of_queries(self):
+        self.client.get(reverse('teams'))
+        teams = [{'name': f'Team {i}', 'passcode': 'secret'} for i in range(1000)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post('bulk_teams', {'teams': teams})
+        self.assertEqual(response.json()['succeeded'], 1000)
+        # SQLite caps the rows per INSERT, so the batch takes six of these.
+        self.assertLessEqual(len(queries), 11)
+        self.assertEqual(self.client.get(reverse('teams'), {'limit': 1})['X-Cache'], 'MISS')
+
+    def test_players_are_registered_with_or_without_a_password(self):
+        Player.objects.create(username='taken', phone_number='+10000000001')
+        response = self.post('bulk_register', {'players': [
+            {'username': 'ana', 'phone_number': '+10000000002', 'password': 'secret-password'},
+            {'username': 'ben', 'phone_number': '+10000000003'},
+            {'username': 'taken', 'phone_number': '+10000000004'},
+            {'username': 'cy', 'phone_number': '+10000000001'},
+            {'username': 'dee', 'phone_number': '+10000000002'},
+        ]})
+        self.assertEqual([result.get('error') for result in response.json()['results']], [
+            None, None, 'Username already exists', 'Phone number already exists', 'Duplicate phone number in this batch',
+        ])
+        self.assertTrue(Player.objects.get(username='ana').check_password('secret-password'))
+        self.assertFalse(Player.objects.get(username='ben').has_usable_password())
+
+    def test_batches_with_too_many_passwords_are_rejected(self):
+        players = [
+            {'username': f'player{i}', 'phone_number': f'+1000000010{i}', 'password': 'secret-password'}
+            for i in range(3)
+        ]
+        with override_settings(API_BULK_MAX_PASSWORDS=2):
+            response = self.post('bulk_register', {'players': players})
+        self.assertEqual(response.json(), {'error': 'At most 2 players with a password per request'})
+        self.assertFalse(Player.objects.filter(username__startswith='player').exists())
+
+    def test_batches_hash_on_their_own_slots(self):
+        with mock.patch('api.hashers._bulk_slots.acquire', return_value=False):
+            response = self.post('bulk_register', {'players': [
+                {'username': 'ana', 'phone_number': '+10000000002', 'password': 'secret-password'},
+            ]})
+            self.assertEqual(response.status_code, 503)
+            # Single registrations and logins do not wait on bulk slots.
+            self.client.logout()
+            response = self.post('register', {
+                'username': 'ben', 'phone_number': '+10000000003', 'password': 'secret-password',
+            })
+            self.assertEqual(response.status_code, 201)
+
+    def test_players_taken_while_hashing_fail_on_their_own(self):
+        def hash_passwords(raw_passwords):
+            Player.objects.create(username='ben', phone_number='+10000000009')
+            return [make_password(raw_password) for raw_password in raw_passwords]
+
+        with mock.patch('api.hashers.hash_passwords', side_effect=hash_passwords):
+            response = self.post('bulk_register', {'players': [
+                {'username': 'ana', 'phone_number': '+10000000002', 'password': 'secret-password'},
+                {'username': 'ben', 'phone_number': '+10000000003'},
+                {'username': 'cy', 'phone_number': '+10000000004'},
+            ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [
+            {'index': 0, 'id': Player.objects.get(username='ana').id, 'username': 'ana'},
+            {'index': 1, 'error': 'Username or phone number already exists'},
+            {'index': 2, 'id': Player.objects.get(username='cy').id, 'username': 'cy'},
+        ])
+
+    def test_joins_check_passcodes_and_capacity(self):
+        tournament = Tournament.objects.create(
+            title='Cup', start_date=date(2026, 1, 1), end_date=date(2026, 2, 1), max_teams=3,
+        )
+        heat, bulls, suns, nets = (Team.objects.create(name=name, passcode='pass') for name in ('Heat', 'Bulls', 'Suns', 'Nets'))
+        tournament.teams.add(heat)
+
+        response = self.post('bulk_join_tournament', {'tournament_id': tournament.id, 'teams': [
+            {'team_id': heat.id, 'passcode': 'pass'},
+            {'team_id': bulls.id, 'passcode': 'wrong'},
+            {'team_id': suns.id, 'passcode': 'pass'},
+            {'team_id': 0},
+            {'team_id': bulls.id, 'passcode': 'pass'},
+            {'team_id': nets.id, 'passcode': 'pass'},
+        ]})
+        self.assertEqual([result.get('error') for result in response.json()['results']], [
+            'Team already joined this tournament', 'Invalid team passcode', None, 'Team not found', None,
+            'Tournament is full',
+        ])
+        self.assertEqual(set(tournament.teams.values_list('name', flat=True)), {'Heat', 'Suns', 'Bulls'})
+        self.assertEqual(Standing.objects.filter(tournament=tournament).count(), 3)
+
+        response = self.post('bulk_join_tournament', {'tournament_id': tournament.id + 1, 'teams': [{'team_id': heat.id}]})
+        self.assertEqual(response.status_code, 404)
+
+
+class SerializationTests(APITestCase):
+    @skipUnless(serializers.orjson, 'needs orjson')
+    def test_encoders_produce_identical_bytes(self):
+        data = {
+            'when': timezone.now(), 'day': date(2026, 1, 2), 'fee': Decimal('12.50'), 'none': None,
+            'name': 'Zoë "Z" \\ \n', 'nested': [{'a': 1.5, 'b': True}], 3: 'int key',
+        }
+        self.assertEqual(serializers.orjson_dumps(data), serializers.stdlib_dumps(data))
+
+    def test_views_render_the_same_match_identically(self):
+        tournament = Tournament.objects.create(
+            title='Cup', start_date=date(2026, 1, 1), end_date=date(2026, 2, 1), entry_fee=Decimal('10.50'),
+        )
+        heat, bulls = Team.objects.create(name='Heat'), Team.objects.create(name='Bulls')
+        tournament.teams.add(heat, bulls)
+        tournament.matches.add(Match.objects.create(
+            team_a=heat, team_b=bulls, scheduled_time=timezone.now(), location='Court 1',
+        ))
+
+        fixture = self.client.get(reverse('tournament_fixtures', args=[tournament.id])).json()[0]
+        detail = self.client.get(reverse('tournament_detail', args=[tournament.id])).json()
+        self.assertEqual(
+            detail['matches'][0], {**fixture, 'team_a': 'Heat', 'team_b': 'Bulls'},
+        )
+        self.assertEqual(fixture['scheduled_time'], Match.objects.get().scheduled_time.isoformat())
+        listed = self.client.get(reverse('tournaments')).json()[0]
+        self.assertEqual((listed['start_date'], listed['entry_fee']), ('2026-01-01', 10.5))
+
+    def test_benchmark_command_compares_encoders(self):
+        out = StringIO()
+        call_command('benchmark_serialization', fixtures=50, repeat=1, stdout=out)
+        self.assertIn('dicts + django JsonResponse (before)', out.getvalue())
+        self.assertIn('schema + stdlib json', out.getvalue())
+
+
+class SchedulingTests(APITestCase):
+    start = datetime(2026, 3, 1, 9, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        super().setUp()
+        self.staff = Player.objects.create_user('organizer', '+10000000090', 'password', is_staff=True)
+        self.client.force_login(self.staff)
+        self.tournament = Tournament.objects.create(
+            title='League', start_date=date(2026, 3, 1), end_date=date(2026, 6, 1),
+        )
+
+    def add_teams(self, count):
+        teams = Team.objects.bulk_create(Team(name=f'Team {i}') for i in range(count))
+        self.tournament.teams.add(*teams)
+        return [team.id for team in teams]
+
+    def schedule(self, **data):
+        return self.client.post(reverse('tournament_schedule', args=[self.tournament.id]), {
+            'format': 'round_robin', 'venues': ['Court 1', 'Court 2'], 'match_minutes': 60,
+            'start': self.start.isoformat(), 'end': (self.start + timedelta(days=30)).isoformat(), **data,
+        }, content_type='application/json')
+
+    def assert_no_clashes(self, matches):
+        seen = set()
+        for match in matches:
+            for key in (match.team_a_id, match.team_b_id, match.location):
+                if key is None:
+                    continue
+                self.assertNotIn((key, match.scheduled_time), seen)
+                seen.add((key, match.scheduled_time))
+
+    def test_round_robin_pairs_every_team_once(self):
+        for count in (2, 7, 8):
+            rounds = scheduling.round_robin(range(count))
+            pairs = [frozenset(pair) for pairs in rounds for pair in pairs]
+            self.assertEqual(len(pairs), count * (count - 1) // 2)
+            self.assertEqual(len(set(pairs)), len(pairs))
+            for pairs in rounds:
+                teams = [team for pair in pairs for team in pair]
+                self.assertEqual(len(teams), len(set(teams)))
+
+    def test_knockout_gives_the_top_seeds_byes(self):
+        self.assertEqual(scheduling.seeding(8), [1, 8, 4, 5, 2, 7, 3, 6])
+        self.assertEqual(scheduling.knockout_bracket('ABCDEF'), [
+            [None, ('D', 'E'), None, ('C', 'F')],
+            [('A', None), ('B', None)],
+            [(None, None)],
+        ])
+
+    def test_schedules_a_round_robin_without_clashes(self):
+        self.add_teams(6)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.schedule()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 15)
+        self.assertLessEqual(len(queries), 12)
+
+        matches = list(self.tournament.matches.all())
+        self.assertEqual(len(matches), 15)
+        self.assert_no_clashes(matches)
+        # Two venues for three matches per round: each round takes two slots.
+        self.assertEqual(max(match.scheduled_time for match in matches), self.start + timedelta(hours=9))
+
+    def test_existing_matches_block_their_teams_and_venues(self):
+        team_ids = self.add_teams(4)
+        other = Team.objects.create(name='Other')
+        Match.objects.create(team_a_id=team_ids[0], team_b=other, scheduled_time=self.start, location='Hall')
+        Match.objects.create(
+            team_a=other, team_b=Team.objects.create(name='Another'), scheduled_time=self.start + timedelta(minutes=30),
+            location='Court 1',
+        )
+
+        self.assertEqual(self.schedule(format='single_elimination').status_code, 201)
+        self.assert_no_clashes(Match.objects.all())
+        # Team 0 is busy at 9:00 and Court 1 until 10:30.
+        self.assertEqual(
+            sorted(
+                (match.team_a_id, match.location, match.scheduled_time)
+                for match in self.tournament.matches.filter(round=1)
+            ),
+            [
+                (team_ids[0], 'Court 2', self.start + timedelta(hours=1)),
+                (team_ids[1], 'Court 2', self.start),
+            ],
+        )
+        # The final waits for both semi-finals.
+        final = self.tournament.matches.get(round=2)
+        self.assertEqual(final.scheduled_time, self.start + timedelta(hours=2))
+
+    def test_invalid_requests(self):
+        self.add_teams(4)
+        self.assertEqual(
+            self.schedule(format='swiss').json(), {'error': 'Format must be one of: round_robin, single_elimination'},
+        )
+        self.assertEqual(self.schedule(venues=[]).status_code, 400)
+        response = self.schedule(end=(self.start + timedelta(hours=2)).isoformat(), venues=['Court 1'])
+        self.assertEqual(
+            response.json(), {'error': 'The time window is too short for these fixtures; add venues or extend it'},
+        )
+        self.assertFalse(Match.objects.exists())
+        self.client.logout()
+        self.assertEqual(self.schedule().status_code, 403)
+
+    def test_512_team_knockout_is_one_bulk_insert_per_round(self):
+        self.add_teams(512)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.schedule(format='single_elimination', venues=[f'Court {i}' for i in range(16)])
+        self.assertEqual(response.json()['created'], 511)
+        # SQLite splits the first round's insert by its variable limit.
+        self.assertLessEqual(len(queries), 25)
+
+
+class BracketTests(APITestCase):
+    start = datetime(2026, 3, 1, 9, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        super().setUp()
+        self.tournament = Tournament.objects.create(
+            title='Cup', start_date=date(2026, 3, 1), end_date=date(2026, 3, 2),
+        )
+        self.teams = Team.objects.bulk_create(Team(name=f'Seed {i}') for i in range(1, 6))
+        self.tournament.teams.add(*self.teams)
+        scheduling.schedule_tournament(
+            self.tournament.id, scheduling.SINGLE_ELIMINATION, ['Court 1', 'Court 2'],
+            self.start, self.start + timedelta(days=1), 60,
+        )
+
+    def match(self, round_number, slot):
+        return Match.objects.get(round=round_number, slot=slot)
+
+    def finish(self, match, score_a, score_b):
+        match.is_completed, match.score_a, match.score_b = True, score_a, score_b
+        match.save()
+
+    def test_scheduling_links_every_round_to_the_next(self):
+        # Five teams: seeds 1-3 get byes into the semi-finals.
+        self.assertEqual(self.tournament.matches.count(), 4)
+        opening = self.match(1, 1)
+        self.assertEqual((opening.team_a_id, opening.team_b_id), (self.teams[3].id, self.teams[4].id))
+        self.assertEqual(opening.next_match, self.match(2, 0))
+        self.assertEqual(self.match(2, 0).team_a_id, self.teams[0].id)
+        self.assertIsNone(self.match(2, 0).team_b_id)
+        self.assertEqual(self.match(2, 1).next_match, self.match(3, 0))
+        self.assertIsNone(self.match(3, 0).next_match)
+
+    def test_winner_advances_with_one_update(self):
+        opening = self.match(1, 1)
+        with CaptureQueriesContext(connection) as queries:
+            self.finish(opening, 1, 3)
+        self.assertEqual(opening.winner_id, self.teams[4].id)
+        self.assertEqual(self.match(2, 0).team_b_id, self.teams[4].id)
+        advances = [query for query in queries if f'WHERE "api_match"."id" = {opening.next_match_id}' in query['sql']]
+        self.assertEqual(len(advances), 1)
+
+        # A draw or an undone result takes the team back out.
+        self.finish(opening, 2, 2)
+        self.assertIsNone(opening.winner_id)
+        self.assertIsNone(self.match(2, 0).team_b_id)
+
+        semi_final = self.match(2, 1)
+        self.finish(semi_final, 0, 1)
+        self.assertEqual(self.match(3, 0).team_b_id, self.teams[2].id)
+
+    def test_bracket_endpoint(self):
+        self.finish(self.match(1, 1), 3, 0)
+        url = reverse('tournament_bracket', args=[self.tournament.id])
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        rounds = response.json()['rounds']
+        self.assertEqual([len(matches) for matches in rounds], [1, 2, 1])
+        self.assertEqual(rounds[0][0]['winner_id'], self.teams[3].id)
+        self.assertEqual(rounds[1][0]['team_a'], {'id': self.teams[0].id, 'name': 'Seed 1'})
+        self.assertEqual(rounds[1][0]['team_b'], {'id': self.teams[3].id, 'name': 'Seed 4'})
+        self.assertIsNone(rounds[2][0]['team_a'])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).json(), response.json())
+        self.assertEqual(self.client.get(reverse('tournament_bracket', args=[0])).status_code, 404)
+
+    def test_repair_brackets(self):
+        opening = self.match(1, 1)
+        Match.objects.filter(pk=opening.pk).update(is_completed=True, score_a=0, score_b=2)
+        Match.objects.filter(pk=self.match(2, 1).pk).update(winner=self.teams[1])
+
+        out = StringIO()
+        call_command('repair_brackets', '--check', stdout=out)
+        self.assertIn('3 of 4 bracket matches need repair', out.getvalue())
+        self.assertIsNone(self.match(2, 0).team_b_id)
+
+        call_command('repair_brackets', self.tournament.id, stdout=out)
+        self.assertEqual(self.match(1, 1).winner_id, self.teams[4].id)
+        self.assertEqual(self.match(2, 0).team_b_id, self.teams[4].id)
+        self.assertIsNone(self.match(2, 1).winner_id)
+        self.assertIsNone(self.match(3, 0).team_b_id)
+
+        out = StringIO()
+        call_command('repair_brackets', stdout=out)
+        self.assertIn('4 bracket matches are consistent', out.getvalue())
+
+
+class StoredCountTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.players = [
+            Player.objects.create(username=f'member_{i}', phone_number=f'+1000000020{i}') for i in range(3)
+        ]
+        self.team = Team.objects.create(name='Counted')
+        self.tournament = Tournament.objects.create(
+            title='Counted Cup', start_date=date(2026, 5, 1), end_date=date(2026, 5, 2),
+        )
+
+    def counts(self):
+        self.team.refresh_from_db(fields=['member_count'])
+        self.tournament.refresh_from_db(fields=['team_count'])
+        return self.team.member_count, self.tournament.team_count
+
+    def test_links_keep_the_counts(self):
+        self.team.members.add(*self.players)
+        self.team.members.add(self.players[0])
+        self.assertEqual(self.counts(), (3, 0))
+        # Removing a non-member changes nothing.
+        self.team.members.remove(self.players[0], Player.objects.create(username='outsider', phone_number='+1999'))
+        self.assertEqual(self.counts(), (2, 0))
+        self.players[1].teams.remove(self.team)
+        self.assertEqual(self.counts(), (1, 0))
+        self.players[1].teams.add(self.team)
+        self.team.members.clear()
+        self.assertEqual(self.counts(), (0, 0))
+
+        other = Team.objects.create(name='Other')
+        self.tournament.teams.add(self.team, other)
+        self.team.tournaments.clear()
+        self.assertEqual(self.counts(), (0, 1))
+        views.join_tournament(self.tournament.id, self.team)
+        views.join_tournament(self.tournament.id, self.team)
+        self.assertEqual(self.counts(), (0, 2))
+
+    def test_deletes_uncount_their_links(self):
+        self.team.members.add(*self.players)
+        other = Team.objects.create(name='Other')
+        self.tournament.teams.add(self.team, other)
+        self.players[0].delete()
+        other.delete()
+        self.assertEqual(self.counts(), (2, 1))
+
+    def test_list_views_read_the_stored_counts(self):
+        self.team.members.add(*self.players)
+        self.tournament.teams.add(self.team)
+        with CaptureQueriesContext(connection) as queries:
+            teams = self.client.get(reverse('teams'), {'fields': 'id,member_count'}).json()
+            tournaments = self.client.get(reverse('tournaments'), {'fields': 'id,team_count'}).json()
+        self.assertEqual(teams, [{'id': self.team.id, 'member_count': 3}])
+        self.assertEqual(tournaments, [{'id': self.tournament.id, 'team_count': 1}])
+        self.assertFalse([query for query in queries if 'COUNT' in query['sql'] and 'api_team_' in query['sql']])
+
+    def test_reconcile_counts(self):
+        self.team.members.add(*self.players)
+        Team.objects.filter(pk=self.team.pk).update(member_count=7)
+        Tournament.teams.through.objects.create(tournament=self.tournament, team=self.team)
+
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, '2 stored count(s) drifted'):
+            call_command('reconcile_counts', '--check', stdout=out)
+        self.assertIn(f'team member_count #{self.team.id}: stored 7, actual 3', out.getvalue())
+        self.assertEqual(self.counts(), (7, 0))
+
+        call_command('reconcile_counts', stdout=out)
+        self.assertEqual(self.counts(), (3, 1))
+        out = StringIO()
+        call_command('reconcile_counts', stdout=out)
+        self.assertIn('Stored counts are consistent', out.getvalue())
+
+
+class AnnouncementFeedTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.url = reverse('announcements')
+
+    def announce(self, title, **expires):
+        return Announcement.objects.create(
+            title=title, content='...', expires_at=self.now + timedelta(**expires) if expires else None,
+        )
+
+    def test_feed_is_cached_until_the_next_expiry(self):
+        self.announce('Soon', seconds=90)
+        self.announce('Later', days=1)
+        backend = cache.get_cache()
+        with mock.patch.object(backend, 'set', wraps=backend.set) as cache_set:
+            self.client.get(self.url)
+        timeouts = {call.args[0].split(':')[1]: call.args[2] for call in cache_set.call_args_list}
+        self.assertEqual(set(timeouts), {'value', 'response'})
+        for timeout in timeouts.values():
+            self.assertIn(timeout, (89, 90))
+
+    def test_only_the_feed_aggregate_is_cached(self):
+        soon = self.announce('Soon', seconds=90)
+        self.announce('Permanent')
+        self.assertEqual(len(self.client.get(self.url).json()), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(announcements.next_expiry(), soon.expires_at)
+
+        # Once the cached responses expire, the feed is read from the table again.
+        cache.get_cache().clear()
+        with mock.patch('django.utils.timezone.now', return_value=self.now + timedelta(minutes=2)):
+            with self.assertNumQueries(2):
+                response = self.client.get(self.url, {'fields': 'title'})
+            self.assertIsNone(announcements.next_expiry())
+        self.assertEqual(response.json(), [{'title': 'Permanent'}])
+
+    def test_since_returns_only_newer_announcements(self):
+        first, second, third = [self.announce(f'Notice {i}') for i in range(3)]
+        response = self.client.get(self.url, {'since': first.id, 'fields': 'id'})
+        self.assertEqual(response.json(), [{'id': third.id}, {'id': second.id}])
+
+        page = self.client.get(self.url, {'since': first.id, 'limit': 1})
+        rest = self.client.get(page['Link'].split('<')[1].split('>')[0])
+        self.assertEqual([a['id'] for a in page.json() + rest.json()], [third.id, second.id])
+        self.assertEqual(self.client.get(self.url, {'since': third.id}).json(), [])
+        self.assertEqual(self.client.get(self.url, {'since': 'x'}).json(), {'error': 'since must be an integer'})
+
+    def test_prune_announcements(self):
+        for i in range(3):
+            self.announce(f'Old {i}', days=-2)
+        self.announce('Yesterday', days=-1, hours=1)
+        kept = self.announce('Current', days=1)
+        self.client.get(self.url)
+
+        with tempfile.NamedTemporaryFile(suffix='.jsonl') as archive:
+            # Archived by an earlier run whose delete did not commit.
+            old = Announcement.objects.get(title='Old 0')
+            archive.write(json.dumps({'id': old.id, 'title': old.title}).encode() + b'\n')
+            archive.flush()
+            out = StringIO()
+            with CaptureQueriesContext(connection) as queries:
+                call_command(
+                    'prune_announcements', '--older-than', '1', '--batch-size', '2', '--archive', archive.name,
+                    stdout=out,
+                )
+            archive.seek(0)
+            lines = archive.read().splitlines()
+        # One SELECT and one DELETE per batch, plus the SELECT that finds none left.
+        statements = [query['sql'].split()[0] for query in queries.captured_queries]
+        self.assertEqual((statements.count('SELECT'), statements.count('DELETE')), (3, 2))
+        self.assertIn('Pruned 3 expired announcement(s)', out.getvalue())
+        self.assertEqual(sorted(json.loads(line)['title'] for line in lines), ['Old 0', 'Old 1', 'Old 2'])
+        self.assertEqual(set(Announcement.objects.values_list('title', flat=True)), {'Yesterday', kept.title})
+        # Nothing visible changed, so the cached feed stays.
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+
+
+class SnapshotTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(static_root.cleanup)
+        overrides = self.settings(STATIC_ROOT=static_root.name, API_SNAPSHOTS=True)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        # Exports run when the tests call export_pending(), not on a timer thread.
+        timer = mock.patch('api.snapshots.threading.Timer')
+        self.timer = timer.start()
+        self.addCleanup(timer.stop)
+        self.addCleanup(snapshots.export_pending)
+
+        self.tournament = Tournament.objects.create(
+            title='Snapshot Cup', start_date=date(2026, 7, 1), end_date=date(2026, 7, 2),
+        )
+        self.teams = Team.objects.bulk_create([Team(name='Home'), Team(name='Away')])
+        self.tournament.teams.add(*self.teams)
+        self.match = Match.objects.create(
+            team_a=self.teams[0], team_b=self.teams[1], scheduled_time=timezone.now(), location='Court 1',
+        )
+        self.tournament.matches.add(self.match)
+        self.directory = snapshots.tournament_directory(self.tournament.id)
+
+    def fetch(self, url, **headers):
+        response = self.client.get(url, headers=headers)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, content
+
+    def test_export_writes_hashed_precompressed_pages(self):
+        manifest = snapshots.export(self.tournament.id)
+        self.assertEqual(set(manifest), {'detail', 'fixtures', 'standings'})
+        for page, route in (
+            ('detail', 'tournament_detail'), ('fixtures', 'tournament_fixtures'), ('standings', 'tournament_standings'),
+        ):
+            name = manifest[page].rsplit('/', 1)[1]
+            self.assertRegex(
+                manifest[page], rf'^/static/snapshots/tournaments/{self.tournament.id}/{page}\.[0-9a-f]{{12}}\.json$',
+            )
+            content = (self.directory / name).read_bytes()
+            self.assertEqual(content, self.client.get(reverse(route, args=[self.tournament.id])).content)
+            self.assertEqual(gzip.decompress((self.directory / f'{name}.gz').read_bytes()), content)
+
+    def test_middleware_serves_snapshots(self):
+        manifest = snapshots.export(self.tournament.id)
+        response, content = self.fetch(f'/static/snapshots/tournaments/{self.tournament.id}/manifest.json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(content), manifest)
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+        response, content = self.fetch(manifest['fixtures'], accept_encoding='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Cache-Control'], 'max-age=315360000, public, immutable')
+        self.assertEqual(json.loads(gzip.decompress(content))[0]['location'], 'Court 1')
+
+        self.assertEqual(self.fetch('/static/snapshots/tournaments/0/manifest.json')[0].status_code, 404)
+        self.assertEqual(self.fetch('/static/snapshots/../../settings.py')[0].status_code, 404)
+
+    def test_changes_export_again_on_commit(self):
+        first = snapshots.export(self.tournament.id)
+        self.match.is_completed, self.match.score_a, self.match.score_b = True, 2, 1
+        with self.captureOnCommitCallbacks(execute=True):
+            self.match.save()
+        snapshots.export_pending()
+        second = json.loads((self.directory / snapshots.MANIFEST).read_bytes())
+        self.assertNotEqual(first['standings'], second['standings'])
+        self.assertNotEqual(first['detail'], second['detail'])
+
+        self.match.score_b = 2
+        with self.captureOnCommitCallbacks(execute=True):
+            self.match.save()
+        snapshots.export_pending()
+        names = {path.name for path in self.directory.iterdir()}
+        # The files of the previous manifest stay, older ones go.
+        self.assertIn(second['standings'].rsplit('/', 1)[1], names)
+        self.assertNotIn(first['standings'].rsplit('/', 1)[1], names)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tournament.delete()
+        snapshots.export_pending()
+        self.assertFalse(self.directory.exists())
+
+    def test_changes_are_exported_together_off_the_request(self):
+        with mock.patch('api.snapshots.export') as export:
+            for score in (1, 2, 3):
+                self.match.is_completed, self.match.score_a, self.match.score_b = True, score, 0
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.match.save()
+            export.assert_not_called()
+            self.timer.assert_called_once_with(settings.API_SNAPSHOT_DELAY, mock.ANY)
+            self.timer.return_value.start.assert_called_once_with()
+
+            snapshots.export_pending()
+        export.assert_called_once_with(self.tournament.id)
+
+    async def test_middleware_serves_snapshots_under_asgi(self):
+        manifest = await sync_to_async(snapshots.export)(self.tournament.id)
+
+        async def get_response(request):
+            return HttpResponse(status=404)
+
+        middleware = SnapshotWhiteNoiseMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(AsyncRequestFactory().get(manifest['standings']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'max-age=315360000, public, immutable')
+        response.close()
+        response = await middleware(AsyncRequestFactory().get('/static/snapshots/tournaments/0/manifest.json'))
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_snapshots_command(self):
+        stale = snapshots.tournament_directory(0)
+        stale.mkdir(parents=True)
+        out = StringIO()
+        call_command('export_snapshots', stdout=out)
+        self.assertIn('Exported 1 tournament snapshot(s)', out.getvalue())
+        self.assertIn('Removed 1 stale snapshot(s)', out.getvalue())
+        self.assertTrue((self.directory / snapshots.MANIFEST).exists())
+        self.assertFalse(stale.exists())
 
-# Create your tests here.
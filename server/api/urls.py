@@ -6,12 +6,19 @@ urlpatterns = [
     path('tournaments/', TournamentView.as_view(), name='tournaments'),
     path('tournaments/<int:tournament_id>/', TournamentDetailView.as_view(), name='tournament_detail'),
     path('tournaments/<int:tournament_id>/fixtures/', FixturesView.as_view(), name='tournament_fixtures'),
+    path('tournaments/<int:tournament_id>/bracket/', TournamentBracketView.as_view(), name='tournament_bracket'),
+    path('tournaments/<int:tournament_id>/schedule/', TournamentScheduleView.as_view(), name='tournament_schedule'),
     path('teams/', TeamView.as_view(), name='teams'),
+    path('teams/bulk/', BulkTeamView.as_view(), name='bulk_teams'),
     path('register/', PlayerRegistrationView.as_view(), name='register'),
+    path('register/bulk/', BulkRegistrationView.as_view(), name='bulk_register'),
     path('login/', PlayerLoginView.as_view(), name='login'),
     path('join-tournament/', JoinTournamentView.as_view(), name='join_tournament'),
+    path('join-tournament/bulk/', BulkJoinTournamentView.as_view(), name='bulk_join_tournament'),
     path('report/', ReportView.as_view(), name='report'),
     path('standings/', StandingsView.as_view(), name='standings'),
     path('standings/<int:tournament_id>/', StandingsView.as_view(), name='tournament_standings'),
+    path('_cache/', CacheStatsView.as_view(), name='cache_stats'),
+    path('_metrics', MetricsView.as_view(), name='metrics'),
 ]
 
@@ -7,94 +7,170 @@ except Exception:
     from django.http import JsonResponse as Response
     status = None
 
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse
 from django.utils import timezone
-from django.db.models import Q, Count, Sum
+from django.utils.crypto import constant_time_compare
+from django.utils.dateparse import parse_datetime
+from django.db import IntegrityError, transaction
+from django.db.models import Q, Sum, Prefetch
+from django.db.models.signals import m2m_changed
 from api.models import Announcement, Tournament, Team, Player, Match
+from api import announcements, bulk, cache, hashers, metrics, scheduling, serializers
+from api.cache import cached_response
+from api.conditional import (
+    standings_stamp, teams_stamp, tournament_stamp, tournaments_stamp
+)
+from api.responses import JsonResponse
+from api.pagination import PaginationError, add_next_link, paginate, select_fields
+from api.standings import compute_standings, standings_payload, stored_standings
 import json
 
 
+def announcement_page(request, fields):
+    """The active announcements after the ``since`` id, if given, with their keyset ordering."""
+    queryset = Announcement.objects.active()
+    since = request.GET.get('since')
+    if since is not None:
+        try:
+            queryset = queryset.filter(id__gt=int(since))
+        except ValueError:
+            raise PaginationError('since must be an integer')
+    return queryset.values(*fields, 'created_at', 'id'), ('-created_at', '-id')
+
+
+def tournament_page(fields):
+    tournaments = Tournament.objects.only('id', 'start_date', *(field for field in fields if field != 'teams'))
+    if 'teams' in fields:
+        tournaments = tournaments.prefetch_related(
+            Prefetch('teams', queryset=Team.objects.only('id', 'name'))
+        )
+    return tournaments, ('-start_date', '-id')
+
+
+def team_page(fields):
+    return Team.objects.values(*fields, 'created_at', 'id'), ('created_at', 'id')
+
+
+def detail_teams():
+    return Team.objects.only('id', 'name').prefetch_related(
+        Prefetch('members', queryset=Player.objects.only('id', 'username'))
+    )
+
+
+def detail_matches():
+    return Match.objects.select_related('team_a', 'team_b')
+
+
+def fixture_matches(tournament_id):
+    return detail_matches().filter(tournaments=tournament_id).order_by('scheduled_time')
+
+
+def tournament_detail_payload(tournament, teams, matches):
+    return {
+        **serializers.TOURNAMENT_DETAIL.dump(tournament),
+        'teams': serializers.DETAIL_TEAM.dump_many(teams),
+        'matches': serializers.DETAIL_MATCH.dump_many(matches),
+    }
+
+
+class TournamentFull(Exception):
+    pass
+
+
+def join_tournament(tournament_id, team):
+    """
+    Add ``team`` to the tournament with a single insert into the through
+    table, whose unique constraint turns a repeated join into a no-op.
+    Returns (tournament, joined); raises TournamentFull at max_teams.
+
+    The tournament row is locked while the capacity is checked, so
+    concurrent joins cannot overfill it. m2m_changed('post_add') is sent as
+    teams.add() would, for standings, caching and live events.
+    """
+    through = Tournament.teams.through
+    with transaction.atomic():
+        tournament = Tournament.objects.select_for_update().only('id', 'title', 'max_teams').get(id=tournament_id)
+        if tournament.max_teams is not None:
+            entries = through.objects.filter(tournament_id=tournament.id)
+            if entries.count() >= tournament.max_teams:
+                if entries.filter(team_id=team.id).exists():
+                    return tournament, False
+                raise TournamentFull
+        try:
+            with transaction.atomic():
+                through.objects.create(tournament_id=tournament.id, team_id=team.id)
+        except IntegrityError:
+            return tournament, False
+        m2m_changed.send(
+            sender=through, action='post_add', instance=tournament, reverse=False,
+            model=Team, pk_set={team.id}, using=through.objects.db,
+        )
+    return tournament, True
+
+
+def busy_response():
+    response = JsonResponse({'error': 'Server is busy, please try again shortly'}, status=503)
+    response['Retry-After'] = '1'
+    return response
+
+
 class AnnouncementView(APIView):
+    @cached_response(
+        'announcements', lambda: [cache.ANNOUNCEMENTS], announcements.stamp, announcements.time_to_live,
+    )
     def get(self, request):
-        announcements = Announcement.objects.filter(
-            Q(expires_at__gte=timezone.now()) | Q(expires_at__isnull=True)
-        ).order_by('-created_at').values(
-            'id', 'title', 'content', 'created_at', 'expires_at'
-        )
-        return JsonResponse(list(announcements), safe=False)
+        try:
+            fields = select_fields(request, serializers.ANNOUNCEMENT.names)
+            rows, next_cursor = paginate(request, *announcement_page(request, fields))
+        except PaginationError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        announcement_list = serializers.ANNOUNCEMENT.dump_rows(rows, fields)
+        return add_next_link(request, JsonResponse(announcement_list, safe=False), next_cursor)
 
 
 class TournamentView(APIView):
+    @cached_response('tournaments', lambda: [cache.TOURNAMENTS], tournaments_stamp)
     def get(self, request):
-        tournaments = Tournament.objects.all().order_by('-start_date')
-        
-        tournament_list = []
-        for tournament in tournaments:
-            teams = tournament.teams.all()
-            tournament_data = {
-                'id': tournament.id,
-                'title': tournament.title,
-                'start_date': tournament.start_date.isoformat(),
-                'end_date': tournament.end_date.isoformat(),
-                'entry_fee': float(tournament.entry_fee),
-                'teams': [{'id': team.id, 'name': team.name} for team in teams],
-                'team_count': teams.count()
-            }
-            tournament_list.append(tournament_data)
-        
-        return JsonResponse(tournament_list, safe=False)
+        try:
+            fields = select_fields(request, serializers.TOURNAMENT.names)
+            tournaments, next_cursor = paginate(request, *tournament_page(fields))
+        except PaginationError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        tournament_list = serializers.TOURNAMENT.dump_many(tournaments, fields)
+        return add_next_link(request, JsonResponse(tournament_list, safe=False), next_cursor)
 
 
 class TournamentDetailView(APIView):
+    @cached_response('tournament_detail', lambda tournament_id: [cache.tournament_scope(tournament_id)], tournament_stamp)
     def get(self, request, tournament_id):
         try:
-            tournament = Tournament.objects.get(id=tournament_id)
-            teams = tournament.teams.all()
-            matches = tournament.matches.all()
-            
-            tournament_data = {
-                'id': tournament.id,
-                'title': tournament.title,
-                'start_date': tournament.start_date.isoformat(),
-                'end_date': tournament.end_date.isoformat(),
-                'teams': [
-                    {
-                        'id': team.id,
-                        'name': team.name,
-                        'members': [{'username': player.username} for player in team.members.all()]
-                    } for team in teams
-                ],
-                'matches': [
-                    {
-                        'id': match.id,
-                        'team_a': match.team_a.name,
-                        'team_b': match.team_b.name,
-                        'scheduled_time': match.scheduled_time.isoformat(),
-                        'location': match.location,
-                        'is_completed': match.is_completed,
-                        'result': match.result
-                    } for match in matches
-                ]
-            }
-            
-            return JsonResponse(tournament_data, safe=False)
+            tournament = Tournament.objects.prefetch_related(
+                Prefetch('teams', queryset=detail_teams()),
+                Prefetch('matches', queryset=detail_matches()),
+            ).get(id=tournament_id)
         except Tournament.DoesNotExist:
             return JsonResponse({'error': 'Tournament not found'}, status=404)
 
+        return JsonResponse(
+            tournament_detail_payload(tournament, tournament.teams.all(), tournament.matches.all()), safe=False
+        )
+
 
 class TeamView(APIView):
+    @cached_response('teams', lambda: [cache.TEAMS], teams_stamp)
     def get(self, request):
-        teams = Team.objects.all()
-        team_list = [
-            {
-                'id': team.id,
-                'name': team.name,
-                'member_count': team.members.count(),
-                'created_at': team.created_at.isoformat()
-            } for team in teams
-        ]
-        return JsonResponse(team_list, safe=False)
-    
+        try:
+            fields = select_fields(request, serializers.TEAM.names)
+            teams, next_cursor = paginate(request, *team_page(fields))
+        except PaginationError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        team_list = serializers.TEAM.dump_rows(teams, fields)
+        return add_next_link(request, JsonResponse(team_list, safe=False), next_cursor)
+
     def post(self, request):
         try:
             data = json.loads(request.body)
@@ -112,11 +188,7 @@ class TeamView(APIView):
             
             team = Team.objects.create(name=name, passcode=passcode)
             
-            return JsonResponse({
-                'id': team.id,
-                'name': team.name,
-                'created_at': team.created_at.isoformat()
-            }, status=201)
+            return JsonResponse(serializers.TEAM.dump(team, ('id', 'name', 'created_at')), status=201)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
@@ -141,14 +213,12 @@ class PlayerRegistrationView(APIView):
                 return JsonResponse({'error': 'Phone number already exists'}, status=400)
             
             player = Player(username=username, phone_number=phone_number)
-            player.password = 'pbkdf2_sha256$600000$test$test'  # Dummy hash for now
+            player.password = hashers.hash_password(password)
             player.save()
             
-            return JsonResponse({
-                'id': player.id,
-                'username': player.username,
-                'message': 'Registration successful!'
-            }, status=201)
+            return JsonResponse({**serializers.PLAYER.dump(player), 'message': 'Registration successful!'}, status=201)
+        except hashers.HashingBusy:
+            return busy_response()
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
@@ -166,23 +236,23 @@ class JoinTournamentView(APIView):
                     'error': 'Tournament ID and Team ID are required'
                 }, status=400)
             
-            tournament = Tournament.objects.get(id=tournament_id)
-            team = Team.objects.get(id=team_id)
+            team = Team.objects.only('id', 'name', 'passcode').get(id=team_id)
             
             # Verify team passcode if team has one
             if team.passcode and team.passcode != passcode:
                 return JsonResponse({'error': 'Invalid team passcode'}, status=403)
             
-            if team in tournament.teams.all():
+            tournament, joined = join_tournament(tournament_id, team)
+            if not joined:
                 return JsonResponse({'error': 'Team already joined this tournament'}, status=400)
             
-            tournament.teams.add(team)
-            
             return JsonResponse({
                 'message': f'{team.name} successfully joined {tournament.title}!',
                 'tournament_id': tournament.id,
                 'team_id': team.id
             }, status=200)
+        except TournamentFull:
+            return JsonResponse({'error': 'Tournament is full'}, status=409)
         except Tournament.DoesNotExist:
             return JsonResponse({'error': 'Tournament not found'}, status=404)
         except Team.DoesNotExist:
@@ -217,41 +287,18 @@ class ReportView(APIView):
 
 
 class StandingsView(APIView):
+    @cached_response('standings', lambda tournament_id=None: [
+        cache.STANDINGS if tournament_id is None else cache.tournament_scope(tournament_id)
+    ], standings_stamp)
     def get(self, request, tournament_id=None):
-        # This is a simplified standings calculation
-        # In a real app, you'd have a more sophisticated system
-        
-        if tournament_id:
-            try:
-                tournament = Tournament.objects.get(id=tournament_id)
-                teams = tournament.teams.all()
-            except Tournament.DoesNotExist:
+        if tournament_id is not None:
+            rows = list(stored_standings(tournament_id))
+            if not rows and not Tournament.objects.filter(id=tournament_id).exists():
                 return JsonResponse({'error': 'Tournament not found'}, status=404)
         else:
-            teams = Team.objects.all()[:10]
-        
-        standings = []
-        for idx, team in enumerate(teams):
-            # Calculate points based on wins (this is simplified)
-            wins = Match.objects.filter(
-                Q(team_a=team, result__icontains=team.name) |
-                Q(team_b=team, result__icontains=team.name),
-                is_completed=True
-            ).count()
-            
-            standings.append({
-                'rank': idx + 1,
-                'team_id': team.id,
-                'team_name': team.name,
-                'points': 40 - idx,  # Dummy calculation
-                'wins': wins,
-                'played': Match.objects.filter(
-                    Q(team_a=team) | Q(team_b=team),
-                    is_completed=True
-                ).count()
-            })
-        
-        return JsonResponse(standings, safe=False)
+            rows = compute_standings(limit=10)
+
+        return JsonResponse(standings_payload(rows), safe=False)
 
 
 class PlayerLoginView(APIView):
@@ -268,45 +315,139 @@ class PlayerLoginView(APIView):
             
             try:
                 player = Player.objects.get(username=username)
-                # For now, we'll just check if player exists
-                # In production, you'd verify the password properly
-                
-                return JsonResponse({
-                    'id': player.id,
-                    'username': player.username,
-                    'message': 'Login successful!'
-                }, status=200)
             except Player.DoesNotExist:
+                hashers.reject_password(password)
+                return JsonResponse({'error': 'Invalid username or password'}, status=401)
+
+            if not player.is_active or not hashers.verify_password(player, password):
                 return JsonResponse({'error': 'Invalid username or password'}, status=401)
-                
+
+            return JsonResponse({**serializers.PLAYER.dump(player), 'message': 'Login successful!'}, status=200)
+        except hashers.HashingBusy:
+            return busy_response()
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
 
 class FixturesView(APIView):
+    @cached_response('fixtures', lambda tournament_id: [cache.tournament_scope(tournament_id)], tournament_stamp)
+    def get(self, request, tournament_id):
+        if not Tournament.objects.filter(id=tournament_id).exists():
+            return JsonResponse({'error': 'Tournament not found'}, status=404)
+
+        matches = fixture_matches(tournament_id)
+        return JsonResponse(serializers.MATCH.dump_many(matches), safe=False)
+
+
+def bracket_matches(tournament_id):
+    return Match.objects.filter(tournaments=tournament_id, round__isnull=False).order_by('round', 'slot').values(
+        *serializers.BRACKET_MATCH_VALUES
+    )
+
+
+class TournamentBracketView(APIView):
+    @cached_response('bracket', lambda tournament_id: [cache.tournament_scope(tournament_id)], tournament_stamp)
     def get(self, request, tournament_id):
+        rows = list(bracket_matches(tournament_id))
+        if not rows and not Tournament.objects.filter(id=tournament_id).exists():
+            return JsonResponse({'error': 'Tournament not found'}, status=404)
+        return JsonResponse(serializers.bracket_payload(rows))
+
+
+class BulkTeamView(APIView):
+    def post(self, request):
+        if not request.user.is_staff:
+            return JsonResponse({'error': 'Staff access required'}, status=403)
         try:
-            tournament = Tournament.objects.get(id=tournament_id)
-            matches = tournament.matches.all().order_by('scheduled_time')
-            
-            fixtures = [
-                {
-                    'id': match.id,
-                    'team_a': {
-                        'id': match.team_a.id,
-                        'name': match.team_a.name
-                    },
-                    'team_b': {
-                        'id': match.team_b.id,
-                        'name': match.team_b.name
-                    },
-                    'scheduled_time': match.scheduled_time.isoformat(),
-                    'location': match.location,
-                    'is_completed': match.is_completed,
-                    'result': match.result
-                } for match in matches
-            ]
-            
-            return JsonResponse(fixtures, safe=False)
+            teams = bulk.batch_items(json.loads(request.body), 'teams')
+            return JsonResponse(bulk.summary(bulk.create_teams(teams)))
+        except (ValueError, bulk.BatchError) as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+
+
+class BulkRegistrationView(APIView):
+    def post(self, request):
+        if not request.user.is_staff:
+            return JsonResponse({'error': 'Staff access required'}, status=403)
+        try:
+            players = bulk.batch_items(json.loads(request.body), 'players')
+            return JsonResponse(bulk.summary(bulk.register_players(players)))
+        except (ValueError, bulk.BatchError) as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except hashers.HashingBusy:
+            return busy_response()
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+
+
+class BulkJoinTournamentView(APIView):
+    def post(self, request):
+        if not request.user.is_staff:
+            return JsonResponse({'error': 'Staff access required'}, status=403)
+        try:
+            data = json.loads(request.body)
+            teams = bulk.batch_items(data, 'teams')
+            if not data.get('tournament_id'):
+                return JsonResponse({'error': 'Tournament ID is required'}, status=400)
+            return JsonResponse(bulk.summary(bulk.join_teams(data['tournament_id'], teams)))
+        except (ValueError, bulk.BatchError) as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except Tournament.DoesNotExist:
+            return JsonResponse({'error': 'Tournament not found'}, status=404)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+
+
+def parse_time(value):
+    when = parse_datetime(value) if isinstance(value, str) else None
+    if when is not None and timezone.is_naive(when):
+        when = timezone.make_aware(when)
+    return when
+
+
+class TournamentScheduleView(APIView):
+    def post(self, request, tournament_id):
+        if not request.user.is_staff:
+            return JsonResponse({'error': 'Staff access required'}, status=403)
+        try:
+            data = json.loads(request.body)
+            start, end = parse_time(data.get('start')), parse_time(data.get('end'))
+            venues = data.get('venues')
+            if start is None or end is None:
+                return JsonResponse({'error': 'Start and end must be ISO 8601 date-times'}, status=400)
+            if not isinstance(venues, list) or not all(venue and isinstance(venue, str) for venue in venues):
+                return JsonResponse({'error': 'Venues must be a list of locations'}, status=400)
+
+            matches = scheduling.schedule_tournament(
+                tournament_id, data.get('format'), venues, start, end, int(data.get('match_minutes', 60)),
+            )
+            return JsonResponse({
+                'created': len(matches),
+                'first_match': min(match.scheduled_time for match in matches),
+                'last_match': max(match.scheduled_time for match in matches),
+            }, status=201)
+        except (ValueError, scheduling.SchedulingError) as e:
+            return JsonResponse({'error': str(e)}, status=400)
         except Tournament.DoesNotExist:
             return JsonResponse({'error': 'Tournament not found'}, status=404)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+
+
+class CacheStatsView(APIView):
+    def get(self, request):
+        if not request.user.is_staff:
+            return JsonResponse({'error': 'Staff access required'}, status=403)
+        return JsonResponse(cache.cache_stats())
+
+
+class MetricsView(APIView):
+    def get(self, request):
+        token = settings.API_METRICS_TOKEN
+        if not request.user.is_staff and not (
+            token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+        ):
+            return JsonResponse({'error': 'Staff access required'}, status=403)
+        return HttpResponse(metrics.metrics_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
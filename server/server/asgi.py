@@ -5,6 +5,24 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
+
+Running under uvicorn workers
+-----------------------------
+The default deployment (DockerFile) uses sync gunicorn workers via
+server.wsgi, where every open connection ties up a worker. To let one
+process hold many slow or idle clients, run gunicorn with uvicorn workers
+against this module and switch the read endpoints to their async views:
+
+    pip install uvicorn-worker
+    API_ASYNC_VIEWS=1 gunicorn server.asgi:application \
+        -k uvicorn_worker.UvicornWorker --bind 0.0.0.0:8080 --workers 2
+
+Writes keep using the sync views; Django runs them in a thread pool.
+
+The live event stream (tournaments/<id>/events/) is only routed in this
+mode. Its pub/sub broker (api.events) is per process and only sees writes
+made in that process, so serve the API from a single worker (--workers 1)
+while the live feed is in use.
 """
 
 import os
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -28,6 +29,7 @@ DEBUG = False
 ALLOWED_HOSTS = ['*']
 ALLOWED_METHODS = ['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS']
 CORS_ALLOW_ALL_ORIGINS = True
+CORS_EXPOSE_HEADERS = ['Link']
 CSRF_TRUSTED_ORIGINS = ['https://dlst.up.railway.app']
 
 
@@ -49,9 +51,12 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'api.Player'
 
 MIDDLEWARE = [
+    'api.middleware.PerformanceMiddleware',
+    'api.middleware.NPlusOneMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'api.middleware.SnapshotWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -79,6 +84,43 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'server.wsgi.application'
+ASGI_APPLICATION = 'server.asgi.application'
+
+# Serve the read endpoints with async views (api.async_urls). Only enable
+# this when running under ASGI, see server/asgi.py.
+API_ASYNC_VIEWS = os.environ.get('API_ASYNC_VIEWS', '0') == '1'
+
+# Request instrumentation (api.middleware.PerformanceMiddleware): send a
+# Server-Timing header to nobody ('off'), staff sessions ('staff') or every
+# client ('all'), log requests slower than API_SLOW_REQUEST_MS, and let
+# scrapers presenting "Authorization: Bearer <API_METRICS_TOKEN>" read
+# /api/_metrics without a staff session.
+API_SERVER_TIMING = os.environ.get('API_SERVER_TIMING', 'off')
+if API_SERVER_TIMING == 'all':
+    CORS_EXPOSE_HEADERS.append('Server-Timing')
+API_SLOW_REQUEST_MS = int(os.environ.get('API_SLOW_REQUEST_MS', 500))
+API_METRICS_TOKEN = os.environ.get('API_METRICS_TOKEN', '')
+
+# N+1 query detection (api.nplusone): 'off', 'log' or 'raise' when a query
+# shape repeats more than API_NPLUSONE_THRESHOLD times from one call site
+# within a request. The tests run with 'raise'.
+API_NPLUSONE = os.environ.get('API_NPLUSONE', 'log' if DEBUG else 'off')
+API_NPLUSONE_THRESHOLD = int(os.environ.get('API_NPLUSONE_THRESHOLD', 5))
+
+# Seconds between keep-alive comments on idle event streams.
+API_EVENTS_HEARTBEAT = int(os.environ.get('API_EVENTS_HEARTBEAT', 15))
+
+# Largest batch accepted by the bulk team, registration and join endpoints,
+# and the most players with a password in one registration batch (each is a
+# slow hash the request waits for).
+API_BULK_MAX_ITEMS = int(os.environ.get('API_BULK_MAX_ITEMS', 1000))
+API_BULK_MAX_PASSWORDS = int(os.environ.get('API_BULK_MAX_PASSWORDS', 20))
+
+# Re-export a tournament's static snapshot (api.snapshots) after every change
+# to it, in the background and at most once per API_SNAPSHOT_DELAY seconds.
+# Run `manage.py export_snapshots` once when turning this on.
+API_SNAPSHOTS = os.environ.get('API_SNAPSHOTS', '0') == '1'
+API_SNAPSHOT_DELAY = float(os.environ.get('API_SNAPSHOT_DELAY', 2))
 
 
 # Database
@@ -100,18 +142,124 @@ WSGI_APPLICATION = 'server.wsgi.application'
 DATABASES = {
     'default': {
         #Postgres database settings
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
-        'NAME': 'railway',
-        'USER': 'postgres',
-        'PASSWORD': 'eJSxftjZfTHDKUchSWfTXqlKcOePRkMq', 
-        'HOST': 'caboose.proxy.rlwy.net',
-        'PORT': '41337',
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('DB_NAME', 'railway'),
+        'USER': os.environ.get('DB_USER', 'postgres'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'eJSxftjZfTHDKUchSWfTXqlKcOePRkMq'),
+        'HOST': os.environ.get('DB_HOST', 'caboose.proxy.rlwy.net'),
+        'PORT': os.environ.get('DB_PORT', '41337'),
         'OPTIONS': {
-            'sslmode': 'require',
+            'sslmode': os.environ.get('DB_SSLMODE', 'require'),
         },
+        # Keep connections open between requests instead of paying the TCP,
+        # TLS and auth handshake every time; health checks replace ones the
+        # proxy dropped. Persistent connections are per thread and are not
+        # reused under ASGI, which should use the pool below instead.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0 if API_ASYNC_VIEWS else 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# psycopg 3 connection pool (needs "psycopg[binary,pool]" instead of
+# psycopg2-binary). Pooling replaces persistent connections, so Django
+# requires CONN_MAX_AGE = 0 with it.
+if os.environ.get('DB_POOL') == '1':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+        'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    }
+
+# Read replicas: one alias per host in DB_REPLICA_HOSTS, with the primary's
+# other settings. Their test databases mirror the primary's. Replicas need a
+# cache shared by all workers (see CACHES below): the markers that send reads
+# of just-changed data to the primary live there (check api.W001).
+for index, host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Local SQLite database for offline development and benchmarks. With
+# DJANGO_DB_REPLICA=1 a second, unreplicated file stands in for a replica to
+# exercise the routing.
+if os.environ.get('DJANGO_DB') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+    if os.environ.get('DJANGO_DB_REPLICA') == '1':
+        DATABASES['replica_1'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db-replica.sqlite3',
+        }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+
+# How long replicas may lag: for this many seconds after a change, reads of
+# the responses it affects go to the primary.
+API_REPLICA_LAG_SECONDS = int(os.environ.get('DB_REPLICA_LAG_SECONDS', 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at e.g.
+# django.core.cache.backends.redis.RedisCache to share it between workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'dls-api'),
+    }
+}
+
+# Seconds a cached API response is kept; writes invalidate entries earlier.
+API_CACHE_TIMEOUT = int(os.environ.get('API_CACHE_TIMEOUT', 300))
+
+
+# Cursor pagination for list endpoints (?limit=, ?cursor=)
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/6.0/topics/auth/passwords/
+# PASSWORD_HASHER picks scrypt (built in) or argon2 (needs argon2-cffi).
+# Hashes made with the other listed hashers still verify and are upgraded
+# on the next login, as are hashes made with older cost parameters.
+
+_PREFERRED_HASHERS = {
+    'scrypt': ['api.hashers.ScryptPasswordHasher', 'api.hashers.Argon2PasswordHasher'],
+    'argon2': ['api.hashers.Argon2PasswordHasher', 'api.hashers.ScryptPasswordHasher'],
+}
+PASSWORD_HASHERS = _PREFERRED_HASHERS[os.environ.get('PASSWORD_HASHER', 'scrypt')] + [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+]
+
+SCRYPT_WORK_FACTOR = int(os.environ.get('SCRYPT_WORK_FACTOR', 2**14))
+SCRYPT_BLOCK_SIZE = int(os.environ.get('SCRYPT_BLOCK_SIZE', 8))
+SCRYPT_PARALLELISM = int(os.environ.get('SCRYPT_PARALLELISM', 5))
+
+ARGON2_TIME_COST = int(os.environ.get('ARGON2_TIME_COST', 2))
+ARGON2_MEMORY_COST = int(os.environ.get('ARGON2_MEMORY_COST', 102400))
+ARGON2_PARALLELISM = int(os.environ.get('ARGON2_PARALLELISM', 8))
+
+# Threads per process that may hash passwords at once, and how long a
+# request waits for one before answering 503.
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 5))
+# How many of those bulk registrations may use at once; the rest stay free
+# for logins.
+PASSWORD_BULK_HASH_WORKERS = int(
+    os.environ.get('PASSWORD_BULK_HASH_WORKERS', max(PASSWORD_HASH_WORKERS - 1, 1))
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators